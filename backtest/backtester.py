@@ -0,0 +1,215 @@
+import numpy as np
+import pandas as pd
+from indicators.technical_analysis import TechnicalAnalysis
+from indicators.signal_generator import SignalGenerator
+
+def compute_stats(trades, equity, initial_balance):
+    """Summary statistics from a trades frame (pnl, reason) and an equity curve"""
+    values = equity.to_numpy()
+    peak = np.maximum.accumulate(values)
+    drawdown = values / peak - 1
+    closed = trades[trades['reason'] != 'OPEN']
+    wins = closed[closed['pnl'] > 0]
+    losses = closed[closed['pnl'] <= 0]
+    gross_loss = -losses['pnl'].sum()
+
+    returns = np.diff(values) / values[:-1] if len(values) > 1 else np.array([])
+    sharpe = 0.0
+    if len(returns) and returns.std() > 0:
+        sharpe = returns.mean() / returns.std() * np.sqrt(len(returns))
+
+    return {
+        'initial_balance': initial_balance,
+        'final_equity': float(values[-1]) if len(values) else initial_balance,
+        'total_return': float(values[-1] / initial_balance - 1) if len(values) else 0.0,
+        'pnl': float(trades['pnl'].sum()),
+        'max_drawdown': float(drawdown.min()) if len(values) else 0.0,
+        'trades': int(len(closed)),
+        'win_rate': float(len(wins) / len(closed)) if len(closed) else 0.0,
+        'avg_win': float(wins['pnl'].mean()) if len(wins) else 0.0,
+        'avg_loss': float(losses['pnl'].mean()) if len(losses) else 0.0,
+        'profit_factor': float(wins['pnl'].sum() / gross_loss) if gross_loss > 0 else (float('inf') if len(wins) else 0.0),
+        'sharpe': float(sharpe),
+    }
+
+class BacktestResult:
+    def __init__(self, trades, equity, stats, frame):
+        self.trades = trades
+        self.equity = equity
+        self.stats = stats
+        self.frame = frame
+
+    def __repr__(self):
+        return f"BacktestResult({self.stats})"
+
+class Backtester:
+    """Vectorized backtest of SignalGenerator + ScalpingStrategy rules
+
+    Indicators and signal votes are computed for the whole series in one
+    pass. The position simulation jumps from entry to exit with NumPy
+    searches, so the Python loop only runs once per trade, not per candle.
+    Exits follow ScalpingStrategy: stop loss, take profit, then a SELL
+    signal, checked on the candle close (or on high/low with intrabar).
+    """
+
+    def __init__(self, stop_loss=0.02, take_profit=0.015, max_position_size=0.1,
+                 initial_balance=1000000, fee=0.0, intrabar=False,
+                 indicator_params=None):
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.max_position_size = max_position_size
+        self.initial_balance = initial_balance
+        self.fee = fee
+        self.intrabar = intrabar
+        self.indicator_params = indicator_params or {}
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        return cls(
+            stop_loss=config.stop_loss,
+            take_profit=config.take_profit,
+            max_position_size=config.max_position_size,
+            initial_balance=config.config.get('initial_balance', 1000000),
+            indicator_params=config.indicator_params(),
+            **kwargs
+        )
+
+    def prepare(self, df):
+        """Compute indicators and signal votes for the whole series"""
+        frame = TechnicalAnalysis(df, **self.indicator_params).calculate_all_indicators()
+        return self.add_signals(frame)
+
+    def add_signals(self, frame):
+        """Add signal vote columns to a frame that already has indicators"""
+        votes = SignalGenerator(
+            frame,
+            ma_fast=self.indicator_params.get('ma_fast', 9),
+            ma_slow=self.indicator_params.get('ma_slow', 21)
+        ).generate_signal_series()
+        frame['buy_votes'] = votes['buy_votes']
+        frame['sell_votes'] = votes['sell_votes']
+        frame['signal'] = votes['signal']
+        return frame
+
+    def run(self, df, frame=None):
+        """Run the backtest, `frame` can be a precomputed prepare() result"""
+        if frame is None:
+            frame = self.prepare(df)
+
+        close = frame['close'].to_numpy(dtype='float64')
+        high = frame['high'].to_numpy(dtype='float64')
+        low = frame['low'].to_numpy(dtype='float64')
+        signal = frame['signal'].to_numpy()
+        timestamps = frame['timestamp'].to_numpy()
+        n = len(close)
+
+        buy_idx = np.flatnonzero(signal == 'BUY')
+        sell_mask = signal == 'SELL'
+        exit_low = low if self.intrabar else close
+        exit_high = high if self.intrabar else close
+
+        balance = float(self.initial_balance)
+        cash = np.empty(n)
+        holding = np.zeros(n)
+        trades = []
+        start = 0
+
+        while True:
+            k = np.searchsorted(buy_idx, start)
+            if k >= len(buy_idx):
+                cash[start:] = balance
+                break
+            entry = buy_idx[k]
+            cash[start:entry] = balance
+
+            entry_price = close[entry]
+            amount = balance * self.max_position_size / entry_price
+            cost = entry_price * amount * (1 + self.fee)
+            balance -= cost
+            sl = entry_price * (1 - self.stop_loss)
+            tp = entry_price * (1 + self.take_profit)
+
+            exit_idx, reason = self._find_exit(
+                entry, n, exit_low, exit_high, sell_mask, sl, tp
+            )
+            if exit_idx is None:
+                # Still open at the end, marked to market in the equity curve
+                cash[entry:] = balance
+                holding[entry:] = amount
+                trades.append(self._trade(
+                    timestamps, entry, n - 1, entry_price, close[-1],
+                    amount, 'OPEN'
+                ))
+                break
+
+            if reason == 'STOP_LOSS':
+                exit_price = sl if self.intrabar else close[exit_idx]
+            elif reason == 'TAKE_PROFIT':
+                exit_price = tp if self.intrabar else close[exit_idx]
+            else:
+                exit_price = close[exit_idx]
+
+            cash[entry:exit_idx] = balance
+            holding[entry:exit_idx] = amount
+            balance += exit_price * amount * (1 - self.fee)
+            trades.append(self._trade(
+                timestamps, entry, exit_idx, entry_price, exit_price,
+                amount, reason
+            ))
+            start = exit_idx + 1
+            if start >= n:
+                cash[exit_idx:] = balance
+                break
+            cash[exit_idx] = balance
+
+        equity = pd.Series(cash + holding * close, index=frame.index, name='equity')
+        trades = pd.DataFrame(trades, columns=[
+            'entry_time', 'exit_time', 'entry_price', 'exit_price',
+            'amount', 'pnl', 'return', 'reason'
+        ])
+        return BacktestResult(trades, equity, self._stats(trades, equity), frame)
+
+    def _find_exit(self, entry, n, exit_low, exit_high, sell_mask, sl, tp):
+        """First bar after entry that hits SL, TP or a SELL signal"""
+        pos = entry + 1
+        chunk = 256
+        while pos < n:
+            end = min(n, pos + chunk)
+            hit_sl = exit_low[pos:end] <= sl
+            hit_tp = exit_high[pos:end] >= tp
+            hit = hit_sl | hit_tp | sell_mask[pos:end]
+            if hit.any():
+                i = int(np.argmax(hit))
+                if hit_sl[i]:
+                    return pos + i, 'STOP_LOSS'
+                if hit_tp[i]:
+                    return pos + i, 'TAKE_PROFIT'
+                return pos + i, 'SIGNAL'
+            pos = end
+            chunk *= 2
+        return None, None
+
+    def _trade(self, timestamps, entry, exit_idx, entry_price, exit_price, amount, reason):
+        pnl = (exit_price * (1 - self.fee) - entry_price * (1 + self.fee)) * amount
+        return (
+            timestamps[entry], timestamps[exit_idx], entry_price, exit_price,
+            amount, pnl, pnl / (entry_price * amount), reason
+        )
+
+    def _stats(self, trades, equity):
+        return compute_stats(trades, equity, self.initial_balance)
+if __name__ == "__main__":
+    import argparse
+    from backtest.data_loader import load_candles
+    
+    parser = argparse.ArgumentParser(description="Backtest the scalping strategy")
+    parser.add_argument('source', help="CSV/Parquet file or SQLite database")
+    parser.add_argument('--pair', default=None)
+    parser.add_argument('--fee', type=float, default=0.0)
+    parser.add_argument('--intrabar', action='store_true')
+    args = parser.parse_args()
+    
+    candles = load_candles(args.source, pair=args.pair)
+    result = Backtester(fee=args.fee, intrabar=args.intrabar).run(candles)
+    for key, value in result.stats.items():
+        print(f"{key}: {value}")
\ No newline at end of file
@@ -0,0 +1,88 @@
+import sqlite3
+import pandas as pd
+from marketdata.history_store import HistoryStore
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def _normalize(df):
+    """Keep OHLCV columns as float64, sorted and de-duplicated by timestamp"""
+    df = df[OHLCV_COLUMNS]
+    df = df.drop_duplicates(subset='timestamp', keep='last')
+    df = df.sort_values('timestamp').reset_index(drop=True)
+    for col in OHLCV_COLUMNS[1:]:
+        df[col] = df[col].astype('float64')
+    return df
+
+def load_csv(path):
+    """Load candles from a CSV with timestamp,open,high,low,close,volume columns"""
+    return _normalize(pd.read_csv(path))
+
+def load_parquet(path):
+    """Load candles from a Parquet file or directory (needs pyarrow)"""
+    return _normalize(pd.read_parquet(path))
+
+def load_sqlite(pair, db_path='database/trades.db', start=None, end=None):
+    """Load candles for a pair from the market_data table"""
+    query = '''
+        SELECT timestamp, open, high, low, close, volume
+        FROM market_data
+        WHERE pair = ?
+    '''
+    params = [pair]
+    if start is not None:
+        query += ' AND timestamp >= ?'
+        params.append(start)
+    if end is not None:
+        query += ' AND timestamp < ?'
+        params.append(end)
+    query += ' ORDER BY timestamp'
+
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+    return _normalize(df)
+
+def load_history(pair, timeframe, root='database/history', start=None, end=None):
+    """Load candles for a pair from the columnar HistoryStore"""
+    columns = HistoryStore(root).load(pair, timeframe, start, end)
+    # DataFrame over the memory maps without copying the columns
+    return pd.DataFrame({col: columns[col] for col in OHLCV_COLUMNS}, copy=False)
+
+TRADE_COLUMNS = ['timestamp', 'price', 'amount', 'side']
+
+def load_trades(path):
+    """Load recorded trades from CSV/Parquet for the paper simulator
+
+    Accepts timestamp,price,amount[,side] columns or the REST /trades
+    field names (date, price, amount, type). side becomes 1 for buyer-
+    initiated, -1 for seller-initiated and 0 when unknown.
+    """
+    path = str(path)
+    if path.endswith('.parquet') or path.endswith('.pq'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    df = df.rename(columns={'date': 'timestamp', 'type': 'side'})
+    if 'side' not in df:
+        df['side'] = 0
+    elif df['side'].dtype == object:
+        df['side'] = df['side'].map({'buy': 1, 'sell': -1}).fillna(0)
+    df = df[TRADE_COLUMNS].sort_values('timestamp', kind='stable').reset_index(drop=True)
+    df['timestamp'] = df['timestamp'].astype('float64')
+    df['price'] = df['price'].astype('float64')
+    df['amount'] = df['amount'].astype('float64')
+    df['side'] = df['side'].astype('int8')
+    return df
+
+def load_candles(source, pair=None, **kwargs):
+    """Load candles from a .csv / .parquet path or a SQLite database"""
+    source = str(source)
+    if source.endswith('.csv'):
+        return load_csv(source)
+    if source.endswith('.parquet') or source.endswith('.pq'):
+        return load_parquet(source)
+    if pair is None:
+        raise ValueError("pair is required when loading from SQLite")
+    return load_sqlite(pair, source, **kwargs)
\ No newline at end of file
@@ -0,0 +1,266 @@
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import ta
+from indicators.technical_analysis import TechnicalAnalysis
+from backtest.backtester import Backtester
+
+INDICATOR_PARAMS = ('ma_fast', 'ma_slow', 'rsi_period', 'bb_period')
+STRATEGY_PARAMS = ('stop_loss', 'take_profit', 'max_position_size')
+
+DEFAULT_GRID = {
+    'ma_fast': [5, 9, 12],
+    'ma_slow': [21, 26, 34],
+    'rsi_period': [7, 14],
+    'bb_period': [20],
+    'stop_loss': [0.01, 0.02],
+    'take_profit': [0.01, 0.015, 0.02],
+    'max_position_size': [0.1]
+}
+
+def grid_param_sets(grid):
+    """Every combination of the grid values"""
+    names = list(grid)
+    sets = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    return [p for p in sets if _valid(p)]
+
+def random_param_sets(space, n, seed=None):
+    """n random parameter sets; values are lists to pick from or (low, high) ranges"""
+    rng = random.Random(seed)
+    sets = []
+    attempts = 0
+    while len(sets) < n and attempts < n * 100:
+        attempts += 1
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = rng.uniform(low, high)
+            else:
+                params[name] = rng.choice(values)
+        if _valid(params) and params not in sets:
+            sets.append(params)
+    return sets
+
+def _valid(params):
+    return params.get('ma_fast', 9) < params.get('ma_slow', 21)
+
+def walk_forward_splits(n, n_splits=4, train_fraction=0.75):
+    """Rolling (train, test) row slices; each test window follows its train window"""
+    fold = n // n_splits
+    splits = []
+    for i in range(n_splits):
+        start = i * fold
+        end = n if i == n_splits - 1 else start + fold
+        cut = start + int((end - start) * train_fraction)
+        splits.append((slice(start, cut), slice(cut, end)))
+    return splits
+
+class IndicatorCache:
+    """Indicator columns computed once per distinct window
+
+    Parameter sets that share a window (e.g. the same rsi_period) reuse the
+    same column instead of recomputing it; windows the sweep does not vary
+    (MACD, stochastic, ATR) come from one TechnicalAnalysis pass.
+    """
+
+    BASE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume',
+                    'MACD_cross', 'STOCH_K', 'STOCH_D', 'ATR']
+
+    def __init__(self, df):
+        base = TechnicalAnalysis(df).calculate_all_indicators()
+        self.base = {col: base[col].to_numpy() for col in self.BASE_COLUMNS}
+        self.close = base['close']
+        self.columns = {}
+
+    def sma(self, window):
+        key = ('sma', window)
+        if key not in self.columns:
+            self.columns[key] = ta.trend.sma_indicator(self.close, window=window).to_numpy()
+        return self.columns[key]
+
+    def rsi(self, window):
+        key = ('rsi', window)
+        if key not in self.columns:
+            self.columns[key] = ta.momentum.rsi(self.close, window=window).to_numpy()
+        return self.columns[key]
+
+    def bollinger(self, window, window_dev=2):
+        key = ('bb', window)
+        if key not in self.columns:
+            bb = ta.volatility.BollingerBands(self.close, window=window, window_dev=window_dev)
+            self.columns[key] = (
+                bb.bollinger_hband().to_numpy(),
+                bb.bollinger_lband().to_numpy()
+            )
+        return self.columns[key]
+
+    def precompute(self, param_sets):
+        for params in param_sets:
+            self.frame(params)
+
+    def frame(self, params):
+        """DataFrame with the columns SignalGenerator needs for these params"""
+        fast = params.get('ma_fast', 9)
+        slow = params.get('ma_slow', 21)
+        upper, lower = self.bollinger(params.get('bb_period', 20))
+        columns = dict(self.base)
+        columns[f'MA_{fast}'] = self.sma(fast)
+        columns[f'MA_{slow}'] = self.sma(slow)
+        columns['RSI'] = self.rsi(params.get('rsi_period', 14))
+        columns['BB_upper'] = upper
+        columns['BB_lower'] = lower
+        return pd.DataFrame(columns, copy=False)
+
+_cache = None
+
+def _init_worker(cache):
+    global _cache
+    _cache = cache
+
+def _evaluate(task):
+    params, splits, backtest_kwargs = task
+    backtester = Backtester(
+        indicator_params={k: params[k] for k in INDICATOR_PARAMS if k in params},
+        **{k: params[k] for k in STRATEGY_PARAMS if k in params},
+        **backtest_kwargs
+    )
+    frame = backtester.add_signals(_cache.frame(params))
+
+    rows = []
+    for i, (label, rows_slice) in enumerate(splits):
+        window = frame.iloc[rows_slice].reset_index(drop=True)
+        if len(window) < 2:
+            continue
+        stats = backtester.run(None, frame=window).stats
+        # Train/test windows alternate, so each pair of splits is one fold
+        rows.append({**params, 'fold': i // 2, 'window': label, **stats})
+    return rows
+
+class ParameterSweep:
+    """Grid or random search over strategy parameters on historical candles
+
+    Indicator columns are computed once per distinct window in the parent
+    process and shared with a process pool, which then only has to vote
+    and simulate each parameter set. With walk_forward splits, parameters
+    are picked on each train window and scored on the following test
+    window.
+    """
+
+    def __init__(self, df, param_sets, processes=None, walk_forward=None,
+                 metric='total_return', fee=0.0, intrabar=False):
+        self.df = df
+        self.param_sets = param_sets
+        self.processes = processes or os.cpu_count() or 1
+        self.walk_forward = walk_forward
+        self.metric = metric
+        self.backtest_kwargs = {'fee': fee, 'intrabar': intrabar}
+
+    def _splits(self):
+        if not self.walk_forward:
+            return [('full', slice(0, len(self.df)))]
+        splits = []
+        for train, test in walk_forward_splits(len(self.df), self.walk_forward):
+            splits.append(('train', train))
+            splits.append(('test', test))
+        return splits
+
+    def run(self):
+        """Evaluate every parameter set, return a DataFrame of all windows"""
+        cache = IndicatorCache(self.df)
+        cache.precompute(self.param_sets)
+        splits = self._splits()
+        tasks = [(params, splits, self.backtest_kwargs) for params in self.param_sets]
+
+        if self.processes == 1:
+            _init_worker(cache)
+            results = [_evaluate(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(cache,)
+            ) as executor:
+                results = list(executor.map(_evaluate, tasks, chunksize=4))
+
+        return pd.DataFrame([row for rows in results for row in rows])
+
+    def ranked(self, results=None):
+        """Parameter sets ranked by the metric (mean over train windows)"""
+        if results is None:
+            results = self.run()
+        names = list(self.param_sets[0]) if self.param_sets else []
+        scored = results[results['window'] != 'test']
+        table = scored.groupby(names, as_index=False).agg(
+            score=(self.metric, 'mean'),
+            trades=('trades', 'sum'),
+            max_drawdown=('max_drawdown', 'min'),
+            win_rate=('win_rate', 'mean')
+        )
+        if self.walk_forward:
+            tested = results[results['window'] == 'test'].groupby(names, as_index=False)[self.metric].mean()
+            table = table.merge(tested.rename(columns={self.metric: 'test_score'}), on=names)
+        table = table.sort_values('score', ascending=False).reset_index(drop=True)
+        table.insert(0, 'rank', range(1, len(table) + 1))
+        return table
+
+    def walk_forward_report(self, results):
+        """Best train parameters per fold and how they did on the test window"""
+        names = list(self.param_sets[0])
+        report = []
+        for fold, group in results.groupby('fold'):
+            train = group[group['window'] == 'train']
+            test = group[group['window'] == 'test']
+            if train.empty or test.empty:
+                continue
+            best = train.sort_values(self.metric, ascending=False).iloc[0]
+            chosen = test
+            for name in names:
+                chosen = chosen[chosen[name] == best[name]]
+            report.append({
+                'fold': fold,
+                **{name: best[name] for name in names},
+                'train_score': best[self.metric],
+                'test_score': chosen[self.metric].iloc[0] if len(chosen) else float('nan')
+            })
+        return pd.DataFrame(report)
+
+if __name__ == "__main__":
+    import argparse
+    from backtest.data_loader import load_candles
+
+    parser = argparse.ArgumentParser(description="Parameter sweep for the scalping strategy")
+    parser.add_argument('source', help="CSV/Parquet file or SQLite database")
+    parser.add_argument('--pair', default=None)
+    parser.add_argument('--random', type=int, default=0, help="random search with N sets instead of the grid")
+    parser.add_argument('--walk-forward', type=int, default=0, help="number of walk-forward folds")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--metric', default='total_return')
+    parser.add_argument('--fee', type=float, default=0.0)
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    candles = load_candles(args.source, pair=args.pair)
+    if args.random:
+        param_sets = random_param_sets(DEFAULT_GRID, args.random)
+    else:
+        param_sets = grid_param_sets(DEFAULT_GRID)
+
+    sweep = ParameterSweep(
+        candles, param_sets,
+        processes=args.processes,
+        walk_forward=args.walk_forward,
+        metric=args.metric,
+        fee=args.fee
+    )
+    results = sweep.run()
+    table = sweep.ranked(results)
+    table.to_csv(args.out, index=False)
+    print(table.head(20).to_string(index=False))
+    if args.walk_forward:
+        print(sweep.walk_forward_report(results).to_string(index=False))
\ No newline at end of file
@@ -0,0 +1,441 @@
+import heapq
+import types
+import numpy as np
+import pandas as pd
+from indicators.streaming_indicators import StreamingIndicators
+from indicators.signal_generator import SignalGenerator
+from strategies.scalping_strategy import ScalpingStrategy
+from marketdata.order_book import OrderBook
+from backtest.backtester import compute_stats
+
+class FeeSchedule:
+    """Maker/taker fees as a fraction of notional
+
+    Defaults are the base Indodax retail tier; pass the rates of your
+    own volume tier (maker_fee / taker_fee in the config).
+    """
+
+    def __init__(self, maker=0.001, taker=0.003):
+        self.maker = maker
+        self.taker = taker
+
+    def fee(self, notional, maker):
+        return notional * (self.maker if maker else self.taker)
+
+class SimOrder:
+    __slots__ = (
+        'id', 'side', 'price', 'amount', 'filled', 'notional', 'fees',
+        'status', 'submitted', 'arrived', 'queue_ahead', 'reprices',
+        'reason', 'cancel_sent'
+    )
+
+    def __init__(self, order_id, side, price, amount, submitted, reason):
+        self.id = order_id
+        self.side = side
+        self.price = price
+        self.amount = amount
+        self.filled = 0.0
+        self.notional = 0.0
+        self.fees = 0.0
+        self.status = 'pending'
+        self.submitted = submitted
+        self.arrived = None
+        self.queue_ahead = 0.0
+        self.reprices = 0
+        self.reason = reason
+        self.cancel_sent = False
+
+    @property
+    def remaining(self):
+        return self.amount - self.filled
+
+class SimulationResult:
+    def __init__(self, trades, fills, equity, stats):
+        self.trades = trades
+        self.fills = fills
+        self.equity = equity
+        self.stats = stats
+
+    def __repr__(self):
+        return f"SimulationResult({self.stats})"
+
+class PaperSimulator:
+    """Event-driven replay of recorded trades (and optional book ticks)
+
+    Drives the live code paths: StreamingIndicators and
+    SignalGenerator.generate_signals_from_rows at every candle boundary,
+    like the bot's cycle, and ScalpingStrategy.check_exit on every trade,
+    like TradingBot.on_tick. Orders reach the simulated exchange after
+    a configurable network latency. Marketable orders take liquidity from
+    the book (or the last trade price without one) and pay the taker fee.
+    The rest rests at its price behind the volume already queued there,
+    fills partially from later trades at the maker fee, and is cancelled
+    and repriced after stale_after seconds like the OrderManager.
+    """
+
+    def __init__(self, stop_loss=0.02, take_profit=0.015, max_position_size=0.1,
+                 initial_balance=1000000, timeframe_seconds=300, fees=None,
+                 latency=0.15, latency_jitter=0.05, stale_after=10.0,
+                 max_reprices=3, max_slippage=0.002, indicator_params=None,
+                 seed=0):
+        self.strategy_config = types.SimpleNamespace(
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            max_position_size=max_position_size
+        )
+        self.initial_balance = initial_balance
+        self.timeframe = timeframe_seconds
+        self.fees = fees or FeeSchedule()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.stale_after = stale_after
+        self.max_reprices = max_reprices
+        self.max_slippage = max_slippage
+        self.indicator_params = indicator_params or {}
+        self.seed = seed
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        return cls(
+            stop_loss=config.stop_loss,
+            take_profit=config.take_profit,
+            max_position_size=config.max_position_size,
+            initial_balance=config.config.get('initial_balance', 1000000),
+            timeframe_seconds=config.timeframe_seconds,
+            fees=FeeSchedule(config.maker_fee, config.taker_fee),
+            stale_after=config.order_stale_after,
+            max_reprices=config.max_reprices,
+            max_slippage=config.max_slippage,
+            indicator_params=config.indicator_params(),
+            **kwargs
+        )
+
+    def _reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.strategy = ScalpingStrategy(self.strategy_config)
+        self.indicators = StreamingIndicators(**self.indicator_params)
+        self.signals = SignalGenerator(
+            ma_fast=self.indicator_params.get('ma_fast', 9),
+            ma_slow=self.indicator_params.get('ma_slow', 21)
+        )
+        self.book = None
+        self.cash = float(self.initial_balance)
+        self.coin = 0.0
+        self.last_price = None
+        self.now = 0.0
+        self.events = []
+        self.sequence = 0
+        self.order_ids = 0
+        self.resting = []
+        self.in_flight = 0
+        self.fills = []
+        self.trades = []
+        self.entry = None
+
+    # -- exchange side -------------------------------------------------
+
+    def _delay(self):
+        if self.latency_jitter:
+            return self.latency + self.rng.exponential(self.latency_jitter)
+        return self.latency
+
+    def _schedule(self, at, kind, order):
+        self.sequence += 1
+        heapq.heappush(self.events, (at, self.sequence, kind, order))
+
+    def _submit(self, side, price, amount, reason):
+        self.order_ids += 1
+        order = SimOrder(self.order_ids, side, price, amount, self.now, reason)
+        self.in_flight += 1
+        self._schedule(self.now + self._delay(), 'arrive', order)
+        return order
+
+    def _order_price(self, side, amount):
+        """Marketable limit price, as TradingBot.order_price"""
+        if self.book is not None:
+            fill = self.book.estimate_fill(side, amount)
+            if fill is not None and fill['complete']:
+                return fill['worst_price']
+        return self.last_price
+
+    def _fill(self, order, amount, price, maker):
+        amount = min(amount, order.remaining)
+        if order.side == 'SELL':
+            amount = min(amount, self.coin)
+        if amount <= 0:
+            return
+        notional = amount * price
+        fee = self.fees.fee(notional, maker)
+        order.filled += amount
+        order.notional += notional
+        order.fees += fee
+        if order.side == 'BUY':
+            self.cash -= notional + fee
+            self.coin += amount
+            if self.entry is None:
+                self.entry = {'time': self.now, 'amount': 0.0, 'cost': 0.0}
+            self.entry['amount'] += amount
+            self.entry['cost'] += notional + fee
+        else:
+            self.cash += notional - fee
+            self.coin -= amount
+            self._close_part(amount, notional - fee, order.reason)
+        self.fills.append((self.now, order.id, order.side, price, amount, fee, maker))
+
+    def _close_part(self, amount, proceeds, reason):
+        entry = self.entry
+        if entry is None or entry['amount'] <= 0:
+            return
+        share = min(1.0, amount / entry['amount'])
+        cost = entry['cost'] * share
+        entry['amount'] -= amount
+        entry['cost'] -= cost
+        pnl = proceeds - cost
+        self.trades.append((
+            entry['time'], self.now, cost / amount, proceeds / amount,
+            amount, pnl, pnl / cost if cost else 0.0, reason
+        ))
+        if entry['amount'] <= 1e-12 or self.coin <= 1e-12:
+            self.entry = None
+
+    def _take(self, order):
+        """Fill the marketable part of an arriving order; True if done"""
+        buy = order.side == 'BUY'
+        if self.book is not None and len(self.book.asks if buy else self.book.bids):
+            levels = (self.book.asks if buy else self.book.bids).levels()
+            for price, size in levels:
+                if (price > order.price) if buy else (price < order.price):
+                    break
+                self._fill(order, size, price, maker=False)
+                if order.remaining <= 1e-12:
+                    return True
+            return False
+        last = self.last_price
+        if last is not None and ((last <= order.price) if buy else (last >= order.price)):
+            self._fill(order, order.remaining, last, maker=False)
+            return True
+        return False
+
+    def _arrive(self, order):
+        order.arrived = self.now
+        order.status = 'open'
+        if self._take(order) or (order.side == 'SELL' and self.coin <= 1e-12):
+            self._done(order)
+            return
+        if self.book is not None:
+            side = self.book.bids if order.side == 'BUY' else self.book.asks
+            order.queue_ahead = side.sizes.get(order.price, 0.0)
+        self.resting.append(order)
+
+    def _cancel_arrive(self, order):
+        if order.status != 'open':
+            return
+        self.resting.remove(order)
+        if order.reprices < self.max_reprices and order.remaining > 1e-12:
+            # Same logical order continues at a fresh price
+            price = self._order_price(order.side, order.remaining)
+            order.reprices += 1
+            order.price = price
+            order.cancel_sent = False
+            order.status = 'pending'
+            self._schedule(self.now + self._delay(), 'arrive', order)
+            return
+        order.status = 'cancelled'
+        self._done(order)
+
+    def _done(self, order):
+        """Mirror TradingBot.on_order_done for partial fills"""
+        if order.status == 'open':
+            order.status = 'filled'
+        self.in_flight -= 1
+        strategy = self.strategy
+        if order.side == 'BUY' and order.filled < order.amount - 1e-12:
+            strategy.position_size = order.filled
+            if not order.filled:
+                strategy.position = None
+        elif order.side == 'SELL':
+            if self.coin > 1e-12:
+                strategy.position = 'LONG'
+                strategy.position_size = self.coin
+
+    def _match(self, price, amount, side):
+        """Let a public trade fill resting orders it reached"""
+        for order in list(self.resting):
+            if order.side == 'BUY':
+                if side > 0 or price > order.price:
+                    continue
+                through = price < order.price
+            else:
+                if side < 0 or price < order.price:
+                    continue
+                through = price > order.price
+            available = amount
+            if not through:
+                # Volume queued ahead at our level trades first
+                ahead = order.queue_ahead
+                order.queue_ahead = max(0.0, ahead - available)
+                available -= ahead
+            if available > 0:
+                self._fill(order, available, order.price, maker=True)
+            if order.remaining <= 1e-12:
+                self.resting.remove(order)
+                self._done(order)
+
+    # -- bot side ------------------------------------------------------
+
+    def _on_candle(self, closed, forming):
+        """The bot's cycle at a candle boundary"""
+        indicators = self.indicators
+        if closed is not None:
+            indicators.update(*closed)
+        indicators.update(*forming)
+        previous = indicators.previous
+        if previous is None:
+            return
+        signal = self.signals.generate_signals_from_rows(indicators.latest, previous)
+        if self.in_flight:
+            # One order at a time, the strategy acts again once it is done
+            return
+        price = self.last_price
+        max_amount = None
+        if self.book is not None and self.book.best_ask() is not None:
+            max_amount = self.book.max_amount('BUY', self.max_slippage)
+        action, amount = self.strategy.execute_strategy(signal, price, self.cash, max_amount)
+        if action in ('BUY', 'SELL') and amount > 0:
+            self._submit(action, self._order_price(action, amount), amount, 'SIGNAL')
+
+    def _on_tick(self, price):
+        """TradingBot.on_tick: stop loss / take profit on every trade"""
+        strategy = self.strategy
+        reason = 'STOP_LOSS' if price <= strategy.stop_loss else 'TAKE_PROFIT'
+        action, amount = strategy.check_exit(price)
+        if action == 'SELL' and amount > 0:
+            self._submit('SELL', self._order_price('SELL', amount), amount, reason)
+
+    def run(self, trades, book=None):
+        """Replay trades (DataFrame from load_trades) and optional top-of-book
+        ticks (timestamp, bid, bid_size, ask, ask_size)"""
+        self._reset()
+        ts = trades['timestamp'].to_numpy(dtype='float64')
+        px = trades['price'].to_numpy(dtype='float64')
+        qty = trades['amount'].to_numpy(dtype='float64')
+        sides = (trades['side'].to_numpy(dtype='int8') if 'side' in trades
+                 else np.zeros(len(ts), dtype='int8'))
+        if book is not None:
+            self.book = OrderBook('sim')
+            book_ts = book['timestamp'].to_numpy(dtype='float64')
+            book_rows = book[['bid', 'bid_size', 'ask', 'ask_size']].to_numpy(dtype='float64')
+        else:
+            book_ts = np.empty(0)
+            book_rows = None
+        nb = len(book_ts)
+        bi = 0
+
+        tf = self.timeframe
+        events = self.events
+        strategy = self.strategy
+        candle = None
+        candle_start = None
+        equity_t = []
+        equity_v = []
+        stale_after = self.stale_after
+
+        for t, p, q, s in zip(ts.tolist(), px.tolist(), qty.tolist(), sides.tolist()):
+            while bi < nb and book_ts[bi] <= t:
+                bid, bid_size, ask, ask_size = book_rows[bi]
+                self.now = book_ts[bi]
+                self.book.apply_snapshot([(bid, bid_size)], [(ask, ask_size)])
+                for order in self.resting:
+                    side = self.book.bids if order.side == 'BUY' else self.book.asks
+                    order.queue_ahead = min(order.queue_ahead, side.sizes.get(order.price, 0.0))
+                bi += 1
+            while events and events[0][0] <= t:
+                at, _, kind, order = heapq.heappop(events)
+                self.now = at
+                if kind == 'arrive':
+                    self._arrive(order)
+                else:
+                    self._cancel_arrive(order)
+            self.now = t
+            self.last_price = p
+
+            start = t - t % tf
+            if start != candle_start:
+                closed = candle
+                if closed is not None:
+                    equity_t.append(candle_start)
+                    equity_v.append(self.cash + self.coin * closed[4])
+                candle_start = start
+                candle = [start, p, p, p, p, q]
+                self._on_candle(closed, candle)
+            else:
+                if p > candle[2]:
+                    candle[2] = p
+                if p < candle[3]:
+                    candle[3] = p
+                candle[4] = p
+                candle[5] += q
+
+            if self.resting:
+                self._match(p, q, s)
+                for order in self.resting:
+                    if not order.cancel_sent and t - order.arrived > stale_after:
+                        order.cancel_sent = True
+                        self._schedule(t + self._delay(), 'cancel', order)
+            if strategy.position is not None and not self.in_flight:
+                self._on_tick(p)
+
+        if candle is not None:
+            equity_t.append(candle_start)
+            equity_v.append(self.cash + self.coin * candle[4])
+        return self._result(equity_t, equity_v)
+
+    def _result(self, equity_t, equity_v):
+        trades = pd.DataFrame(self.trades, columns=[
+            'entry_time', 'exit_time', 'entry_price', 'exit_price',
+            'amount', 'pnl', 'return', 'reason'
+        ])
+        if self.entry is not None and self.coin > 0:
+            last = self.last_price
+            pnl = self.coin * last - self.entry['cost']
+            trades.loc[len(trades)] = (
+                self.entry['time'], self.now, self.entry['cost'] / self.entry['amount'],
+                last, self.coin, pnl, pnl / self.entry['cost'], 'OPEN'
+            )
+        fills = pd.DataFrame(self.fills, columns=[
+            'time', 'order_id', 'side', 'price', 'amount', 'fee', 'maker'
+        ])
+        equity = pd.Series(equity_v, index=equity_t, name='equity', dtype='float64')
+        stats = compute_stats(trades, equity, self.initial_balance)
+        stats['fees'] = float(fills['fee'].sum())
+        stats['fills'] = int(len(fills))
+        stats['maker_ratio'] = float(fills['maker'].mean()) if len(fills) else 0.0
+        return SimulationResult(trades, fills, equity, stats)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from backtest.data_loader import load_trades
+
+    parser = argparse.ArgumentParser(description="Replay recorded trades through the paper simulator")
+    parser.add_argument('trades', help="CSV/Parquet with timestamp,price,amount[,side]")
+    parser.add_argument('--book', default=None, help="CSV with timestamp,bid,bid_size,ask,ask_size")
+    parser.add_argument('--timeframe', type=int, default=300, help="candle seconds")
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--maker-fee', type=float, default=0.001)
+    parser.add_argument('--taker-fee', type=float, default=0.003)
+    args = parser.parse_args()
+
+    trades = load_trades(args.trades)
+    book = pd.read_csv(args.book) if args.book else None
+    simulator = PaperSimulator(
+        timeframe_seconds=args.timeframe,
+        latency=args.latency,
+        fees=FeeSchedule(args.maker_fee, args.taker_fee)
+    )
+    start = time.perf_counter()
+    result = simulator.run(trades, book)
+    elapsed = time.perf_counter() - start
+    for key, value in result.stats.items():
+        print(f"{key}: {value}")
+    print(f"events: {len(trades) + (len(book) if book is not None else 0)} in {elapsed:.2f}s")
@@ -0,0 +1,136 @@
+"""Query latency of TradeAnalytics on a synthetic multi-million row history
+
+Generates trades for several pairs over many days through the same
+PnLTracker and statements DatabaseHandler.log_trade uses, checks the
+incremental aggregates against full-table scans and times each query
+next to the scan it replaces.
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics --trades 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from database.db_handler import DatabaseHandler, INSERT_TRADE
+from database.analytics import PnLTracker, TradeAnalytics, UPSERT_DAILY, UPSERT_POSITION
+
+def generate(path, n_trades, n_pairs, days, seed=1):
+    """Write round trips (BUY then SELL) with random prices and fees"""
+    DatabaseHandler(path, async_writes=False).close()
+    rng = np.random.default_rng(seed)
+    pairs = [f"c{i}_idr" for i in range(n_pairs)]
+    start = datetime(2024, 1, 1)
+    step = timedelta(seconds=days * 86400 / n_trades)
+    which = rng.integers(0, n_pairs, n_trades // 2)
+    prices = rng.uniform(1e6, 1e9, n_trades // 2)
+    moves = rng.normal(0.0005, 0.01, n_trades // 2)
+    amounts = rng.uniform(1e-4, 1e-2, n_trades // 2)
+
+    tracker = PnLTracker()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+    batch = []
+    for i in range(n_trades // 2):
+        pair = pairs[which[i]]
+        for k, (action, price) in enumerate((('BUY', prices[i]),
+                                             ('SELL', prices[i] * (1 + moves[i])))):
+            timestamp = start + step * (2 * i + k)
+            amount = float(amounts[i])
+            fee = price * amount * 0.003
+            profit_loss, cum_pnl, daily, position = tracker.record(
+                timestamp.strftime('%Y-%m-%d'), pair, action, price, amount, fee
+            )
+            batch.append((timestamp, pair, action, price, amount, price * amount,
+                          'BUY', fee, profit_loss, cum_pnl, 1e9, daily))
+        if len(batch) >= 50000:
+            _flush(conn, batch)
+            batch = []
+    _flush(conn, batch)
+    with conn:
+        for pair in tracker.positions:
+            conn.execute(UPSERT_POSITION, tracker.position_row(pair))
+    conn.close()
+
+def _flush(conn, batch):
+    with conn:
+        conn.executemany(INSERT_TRADE, [row[:-1] for row in batch])
+        conn.executemany(UPSERT_DAILY, [row[-1] for row in batch])
+
+def timed(fn, repeat=20):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2], result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trades', type=int, default=1000000)
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--scans', action='store_true', help="also time the full-table scans")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'trades.db')
+        start = time.perf_counter()
+        generate(path, args.trades, args.pairs, args.days)
+        print(f"generated {args.trades} trades in {time.perf_counter() - start:.1f}s")
+
+        analytics = TradeAnalytics(path)
+        conn = analytics.conn
+        last_id = conn.execute('SELECT MAX(id) FROM trades').fetchone()[0]
+        mid_day = '2024-07-01'
+
+        queries = [
+            ('newest trades page', lambda: analytics.trades(limit=100),
+             "SELECT * FROM trades ORDER BY timestamp DESC LIMIT 100"),
+            ('newest trades, one pair', lambda: analytics.trades('c3_idr', limit=100),
+             "SELECT * FROM trades WHERE pair = 'c3_idr' ORDER BY timestamp DESC LIMIT 100"),
+            ('equity curve page', lambda: analytics.equity_curve(after_id=last_id // 2, limit=1000),
+             None),
+            ('equity curve page, one pair',
+             lambda: analytics.equity_curve('c3_idr', after_id=last_id // 2, limit=1000), None),
+            ('win rate', lambda: analytics.win_rate(),
+             "SELECT AVG(profit_loss > 0) FROM trades WHERE action = 'SELL'"),
+            ('win rate, one pair, half year',
+             lambda: analytics.win_rate('c3_idr', start_day=mid_day), None),
+            ('per-pair PnL', lambda: analytics.pair_pnl(),
+             "SELECT pair, SUM(profit_loss) FROM trades GROUP BY pair"),
+            ('fee totals', lambda: analytics.fee_totals(),
+             "SELECT SUM(fee), SUM(total) FROM trades"),
+            ('daily page', lambda: analytics.daily(limit=30), None),
+        ]
+        print(f"{'query':<32}{'analytics ms':>14}{'scan ms':>10}")
+        for name, query, scan in queries:
+            elapsed, _ = timed(query)
+            scan_ms = ''
+            if scan and args.scans:
+                scan_elapsed, _ = timed(lambda: conn.execute(scan).fetchall(), repeat=3)
+                scan_ms = f"{scan_elapsed * 1e3:.1f}"
+            print(f"{name:<32}{elapsed * 1e3:>14.3f}{scan_ms:>10}")
+
+        # The incremental aggregates must match a scan of the trades
+        expected = dict(conn.execute(
+            'SELECT pair, SUM(COALESCE(profit_loss, 0)) FROM trades GROUP BY pair'
+        ).fetchall())
+        got = {row['pair']: row['profit_loss'] for row in analytics.pair_pnl()}
+        wins, closed = conn.execute(
+            "SELECT SUM(profit_loss > 0), COUNT(*) FROM trades WHERE action = 'SELL'"
+        ).fetchone()
+        ok = (set(got) == set(expected)
+              and all(abs(got[p] - expected[p]) <= 1e-6 * max(1.0, abs(expected[p])) for p in got)
+              and abs(analytics.win_rate() - wins / closed) < 1e-12)
+        analytics.close()
+        print(f"aggregates match full scans: {'ok' if ok else 'MISMATCH'}")
+        if not ok:
+            raise SystemExit("daily_stats disagree with the trades table")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Per-cycle latency and allocations of the analysis step, old vs new path
+
+The old path rebuilds a DataFrame of the last candles every cycle and
+recomputes every indicator with TechnicalAnalysis; the new path updates
+StreamingIndicators with the forming candle and reads CandleBuffer records.
+
+Run from the repository root:
+    python -m benchmarks.bench_candle_buffer --cycles 500
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from indicators.technical_analysis import TechnicalAnalysis
+from indicators.streaming_indicators import StreamingIndicators
+from indicators.signal_generator import SignalGenerator
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def _candles(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 1.5e9 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    return np.column_stack([
+        np.arange(n) * 300.0,
+        close * (1 + rng.normal(0, 0.001, n)),
+        close * (1 + rng.uniform(0, 0.004, n)),
+        close * (1 - rng.uniform(0, 0.004, n)),
+        close,
+        rng.uniform(0, 5, n),
+    ])
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def bench_dataframe(candles, window, cycles):
+    """Original behaviour: DataFrame + full indicator recompute per cycle"""
+    latencies = []
+    for i in range(cycles):
+        rows = candles[i:i + window]
+        t = time.perf_counter()
+        df = pd.DataFrame(rows, columns=COLUMNS)
+        df = TechnicalAnalysis(df).calculate_all_indicators()
+        SignalGenerator(df).generate_signals()
+        latencies.append(time.perf_counter() - t)
+    return latencies
+
+def bench_streaming(candles, window, cycles):
+    indicators = StreamingIndicators()
+    for row in candles[:window - 1]:
+        indicators.update(*row)
+    sg = SignalGenerator()
+    latencies = []
+    for row in candles[window - 1:window - 1 + cycles]:
+        t = time.perf_counter()
+        indicators.update(*row)
+        sg.generate_signals_from_rows(indicators.latest, indicators.previous)
+        latencies.append(time.perf_counter() - t)
+    return latencies
+
+def _measure(bench, *args):
+    tracemalloc.start()
+    latencies = bench(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Latencies without tracemalloc overhead
+    latencies = bench(*args)
+    return latencies, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=500)
+    parser.add_argument('--window', type=int, default=100)
+    args = parser.parse_args()
+
+    candles = _candles(args.window + args.cycles)
+    modes = [
+        ('DataFrame + TechnicalAnalysis', bench_dataframe),
+        ('StreamingIndicators + buffer', bench_streaming),
+    ]
+    print(f"{'mode':<32}{'p50 us':>10}{'p99 us':>10}{'peak KiB':>10}")
+    for name, bench in modes:
+        latencies, peak = _measure(bench, candles, args.window, args.cycles)
+        print(
+            f"{name:<32}{_percentile(latencies, 50) * 1e6:>10.1f}"
+            f"{_percentile(latencies, 99) * 1e6:>10.1f}"
+            f"{peak / 1024:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
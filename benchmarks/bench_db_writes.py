@@ -0,0 +1,70 @@
+"""Rows/sec for DatabaseHandler writes before and after the batch writer
+
+Run from the repository root:
+    python -m benchmarks.bench_db_writes --rows 5000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from database.db_handler import DatabaseHandler, INSERT_TRADE
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def bench_baseline(path, rows):
+    """Original behaviour: rollback journal, one INSERT + commit per row"""
+    db = DatabaseHandler(path, async_writes=False)
+    db.close()
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    latencies = []
+    start = time.perf_counter()
+    for i in range(rows):
+        t = time.perf_counter()
+        conn.execute(INSERT_TRADE, (datetime.now(), 'btc_idr', 'BUY', 1e9 + i, 0.001, 1e6, 'BUY', 0.0, None, 0.0, 1e6))
+        conn.commit()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, latencies
+
+def bench_handler(path, rows, async_writes):
+    db = DatabaseHandler(path, async_writes=async_writes)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(rows):
+        t = time.perf_counter()
+        db.log_trade('btc_idr', 'BUY', 1e9 + i, 0.001, 'BUY', 1e6)
+        latencies.append(time.perf_counter() - t)
+    # Include the time to get everything on disk
+    db.flush()
+    elapsed = time.perf_counter() - start
+    db.close()
+    return elapsed, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    modes = [
+        ('baseline (commit per row)', lambda p: bench_baseline(p, args.rows)),
+        ('sync WAL', lambda p: bench_handler(p, args.rows, False)),
+        ('async batch writer', lambda p: bench_handler(p, args.rows, True)),
+    ]
+    print(f"{'mode':<28}{'rows/sec':>12}{'p50 us':>10}{'p99 us':>10}")
+    for name, bench in modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, latencies = bench(os.path.join(tmp, 'bench.db'))
+        print(
+            f"{name:<28}{args.rows / elapsed:>12,.0f}"
+            f"{_percentile(latencies, 50) * 1e6:>10.1f}"
+            f"{_percentile(latencies, 99) * 1e6:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
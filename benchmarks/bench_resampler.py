@@ -0,0 +1,97 @@
+"""Parity and per-update cost of multi-timeframe resampling
+
+Streams 1m candles through a Resampler the way CandleCache does (each
+base candle sent several times while it forms, with gaps) and checks
+every timeframe against pandas resample() of the final base candles,
+then times one base update for all timeframes.
+
+Run from the repository root:
+    python -m benchmarks.bench_resampler --minutes 20000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from marketdata.resampler import Resampler, resample, timeframe_seconds
+
+TIMEFRAMES = ('5m', '15m', '1h', '4h')
+
+def _base_candles(n, seed=1):
+    rng = np.random.default_rng(seed)
+    # About 2% of the minutes have no trades and no candle
+    ts = np.flatnonzero(rng.uniform(size=int(n * 1.02)) > 0.02)[:n] * 60.0
+    close = 1.5e9 * np.exp(np.cumsum(rng.normal(0, 0.001, len(ts))))
+    return np.column_stack([
+        ts,
+        close * (1 + rng.normal(0, 0.0005, len(ts))),
+        close * (1 + rng.uniform(0, 0.002, len(ts))),
+        close * (1 - rng.uniform(0, 0.002, len(ts))),
+        close,
+        rng.uniform(0, 5, len(ts)),
+    ])
+
+def _forming_versions(row, parts=3):
+    """Successive versions of a base candle while it forms"""
+    for k in range(1, parts + 1):
+        yield [row[0], row[1], row[1] + (row[2] - row[1]) * k / parts,
+               row[1] - (row[1] - row[3]) * k / parts,
+               row[4] if k == parts else row[1], row[5] * k / parts]
+
+def _pandas(base, seconds):
+    df = pd.DataFrame(base, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df.index = pd.to_datetime(df['timestamp'], unit='s')
+    out = df.resample(f'{seconds}s').agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
+    }).dropna()
+    out.insert(0, 'timestamp', out.index.astype('int64') // 10**9)
+    return out.to_numpy(dtype='float64')
+
+def check_parity(base, capacity):
+    resampler = Resampler('1m', TIMEFRAMES, capacity)
+    # Seeded with the first half, the rest streamed in forming versions
+    half = len(base) // 2
+    resampler.seed(base[:half])
+    for row in base[half:]:
+        resampler.update(list(_forming_versions(row)))
+
+    mismatches = 0
+    for timeframe in TIMEFRAMES:
+        seconds = timeframe_seconds(timeframe)
+        expected = _pandas(base, seconds)[-capacity:]
+        got = resampler.candles(timeframe)
+        vectorized = resample(base, seconds)[-capacity:]
+        ok = (got.shape == expected.shape and np.allclose(got, expected, rtol=1e-12)
+              and np.allclose(vectorized, expected, rtol=1e-12))
+        mismatches += not ok
+        print(f"{timeframe:>4}: {len(got)} candles {'ok' if ok else 'MISMATCH'}")
+    return mismatches
+
+def bench_update(base, repeat):
+    resampler = Resampler('1m', TIMEFRAMES)
+    rows = [list(row) for row in base]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            resampler.update((row,))
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(rows))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=int, default=20000)
+    parser.add_argument('--capacity', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = _base_candles(args.minutes)
+    mismatches = check_parity(base, args.capacity)
+    per_update = bench_update(base, args.repeat)
+    print(
+        f"1 base candle -> 1m + {len(TIMEFRAMES)} timeframes: "
+        f"{per_update * 1e6:.2f} us per update"
+    )
+    if mismatches:
+        raise SystemExit(f"{mismatches} timeframes differ from pandas resample")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Latency of the risk engine's tick and pre-trade paths vs number of pairs
+
+mark() runs on every trade from the feed and max_buy() in front of every
+entry, so both must stay flat as pairs are added; on_fill() and
+update_correlations() are O(pairs) and run per fill / per candle.
+Also replays a losing day to check that max_daily_loss halts entries.
+
+Run from the repository root:
+    python -m benchmarks.bench_risk_engine --pairs 10 100 1000
+"""
+import argparse
+import time
+import numpy as np
+from risk.risk_engine import RiskEngine
+
+def _per_call(fn, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for a in args:
+            fn(*a)
+    return (time.perf_counter() - start) / (repeat * len(args))
+
+def bench(n_pairs, repeat, seed=1):
+    rng = np.random.default_rng(seed)
+    pairs = [f"c{i}_idr" for i in range(n_pairs)]
+    engine = RiskEngine(pairs, 1e9)
+    prices = rng.uniform(1e3, 1e9, n_pairs)
+    for pair, price in zip(pairs, prices):
+        engine.mark(pair, price)
+    for pair, price in list(zip(pairs, prices))[::2]:
+        engine.on_fill(pair, 'BUY', price, engine.max_buy(pair, price) * 0.1)
+
+    ticks = [(pairs[i], prices[i] * (1 + rng.normal(0, 1e-3)))
+             for i in rng.integers(0, n_pairs, 1000)]
+    mark = _per_call(engine.mark, ticks, repeat)
+    check = _per_call(engine.max_buy, ticks, repeat)
+    fill = _per_call(lambda pair, price: engine.on_fill(pair, 'BUY', price, 1e-9),
+                     ticks[:100], 1)
+
+    closes = {pair: 1e6 * np.exp(np.cumsum(rng.normal(0, 1e-3, 200))) for pair in pairs}
+    start = time.perf_counter()
+    engine.update_correlations(closes)
+    corr = time.perf_counter() - start
+    return mark, check, fill, corr
+
+def check_daily_halt():
+    now = [1_800_000_000.0]
+    engine = RiskEngine(['btc_idr'], 1e7, max_daily_loss=0.05, clock=lambda: now[0])
+    engine.mark('btc_idr', 1e9)
+    amount = engine.max_buy('btc_idr', 1e9)
+    engine.on_fill('btc_idr', 'BUY', 1e9, amount)
+    price = 1e9
+    while not engine.halted and price > 5e8:
+        price *= 0.99
+        engine.mark('btc_idr', price)
+    halted_at = engine.daily_loss()
+    blocked = engine.max_buy('btc_idr', price) == 0
+    now[0] += 86400
+    engine.mark('btc_idr', price)
+    reopened = not engine.halted and engine.max_buy('btc_idr', price) > 0
+    return engine.halted is False and blocked and reopened and halted_at >= 0.05, halted_at
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pairs', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'pairs':>6} {'mark':>9} {'max_buy':>9} {'on_fill':>9} {'corr':>9}")
+    for n in args.pairs:
+        mark, check, fill, corr = bench(n, args.repeat)
+        print(f"{n:>6} {mark * 1e6:>7.2f}us {check * 1e6:>7.2f}us "
+              f"{fill * 1e6:>7.1f}us {corr * 1e3:>7.2f}ms")
+
+    ok, loss = check_daily_halt()
+    print(f"daily loss halt at {loss:.2%} and reset next day: {'ok' if ok else 'FAILED'}")
+    if not ok:
+        raise SystemExit("max_daily_loss was not enforced")
+
+if __name__ == "__main__":
+    main()
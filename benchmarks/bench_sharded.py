@@ -0,0 +1,110 @@
+"""Throughput of indicator math vs worker processes reading shared memory
+
+Fills a SharedMarketState with synthetic candles and runs the full-frame
+TechnicalAnalysis + SignalGenerator over every pair `--rounds` times:
+first on threads in one process, where the GIL serializes the Python
+parts, then sharded over 1, 2, 4, ... processes that attach to the
+rings the way ShardedRunner workers do. Scaling stops at the number of
+cores (reported below).
+
+Run from the repository root:
+    python -m benchmarks.bench_sharded --pairs 32 --rounds 5
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from indicators.technical_analysis import TechnicalAnalysis
+from indicators.signal_generator import SignalGenerator
+from engine.sharded_runner import shard
+from marketdata.shared_state import SharedMarketState
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+TIMEFRAME = '5m'
+
+def fill(state, seed=1):
+    rng = np.random.default_rng(seed)
+    for pair in state.pairs:
+        n = state.capacity
+        close = 1e9 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+        open_ = np.r_[close[0], close[:-1]]
+        rows = np.column_stack([
+            1.7e9 + np.arange(n) * 300, open_, np.maximum(open_, close) * 1.001,
+            np.minimum(open_, close) * 0.999, close, rng.uniform(0, 5, n)
+        ])
+        state.publish(pair, TIMEFRAME, rows)
+
+def analyze(state, pair):
+    frame = pd.DataFrame(state.candles_since(pair, TIMEFRAME), columns=COLUMNS)
+    frame = TechnicalAnalysis(frame).calculate_all_indicators()
+    return SignalGenerator(frame).generate_signals()
+
+def _worker(state, shard_pairs, rounds, barrier, results):
+    analyze(state, shard_pairs[0])  # warm up imports and caches
+    barrier.wait()
+    for _ in range(rounds):
+        for pair in shard_pairs:
+            analyze(state, pair)
+    results.put(time.perf_counter())
+    state.close()
+
+def run_processes(state, processes, rounds):
+    context = multiprocessing.get_context('spawn')
+    shards = shard(state.pairs, processes)
+    barrier = context.Barrier(len(shards) + 1)
+    results = context.Queue()
+    workers = [
+        context.Process(target=_worker, args=(state, pairs, rounds, barrier, results))
+        for pairs in shards
+    ]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    end = max(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return len(state.pairs) * rounds / (end - start)
+
+def run_threads(state, threads, rounds):
+    analyze(state, state.pairs[0])
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            list(executor.map(lambda pair: analyze(state, pair), state.pairs))
+        elapsed = time.perf_counter() - start
+    return len(state.pairs) * rounds / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=32)
+    parser.add_argument('--candles', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--processes', type=int, nargs='+',
+                        help="process counts to try (default 1, 2, 4, ... up to the cores)")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = args.processes or sorted({1, cores} | {2 ** i for i in range(1, 8) if 2 ** i < cores})
+    pairs = [f"c{i}_idr" for i in range(args.pairs)]
+    state = SharedMarketState(pairs, [TIMEFRAME], args.candles, create=True)
+    try:
+        fill(state)
+        print(f"{args.pairs} pairs x {args.candles} candles, {cores} cores")
+        print(f"{'mode':<16}{'pairs/sec':>12}{'speedup':>10}")
+        base = None
+        for threads in counts:
+            rate = run_threads(state, threads, args.rounds)
+            base = base or rate
+            print(f"{f'{threads} threads':<16}{rate:>12.1f}{rate / base:>9.2f}x")
+        for processes in counts:
+            rate = run_processes(state, processes, args.rounds)
+            print(f"{f'{processes} processes':<16}{rate:>12.1f}{rate / base:>9.2f}x")
+    finally:
+        state.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Bars/sec of the signal kernel, NumPy and (if installed) numba paths
+
+Times signal_votes over a synthetic indicator frame. Parity with
+SignalGenerator.generate_signals is checked separately by
+benchmarks/check_signal_parity.py.
+
+Run from the repository root:
+    python -m benchmarks.bench_signal_kernel --bars 10000000
+"""
+import argparse
+import time
+import numpy as np
+from indicators.signal_kernel import signal_votes, NUMBA_AVAILABLE
+from benchmarks.check_signal_parity import synthetic_frame
+
+def bench(bars, jit, repeat=5):
+    df = synthetic_frame(bars)
+    columns = [df[c].to_numpy() for c in (
+        'close', 'RSI', 'MACD_cross', 'MA_9', 'MA_21',
+        'BB_lower', 'BB_upper', 'STOCH_K', 'STOCH_D'
+    )]
+    columns[2] = columns[2].astype(bool)
+    signal_votes(*columns, jit=jit)  # compile / warm up
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        signal_votes(*columns, jit=jit)
+        best = min(best, time.perf_counter() - start)
+    return bars / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    paths = [('numpy', False)] + ([('numba', True)] if NUMBA_AVAILABLE else [])
+    for name, jit in paths:
+        print(f"{name}: {bench(args.bars, jit) / 1e6:,.1f}M bars/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Cold start: import-time breakdown and time to the first market-data request
+
+Imports main in a fresh interpreter with -X importtime and lists the
+slowest top-level packages, then starts the bot in paper mode in a
+temporary directory and reports when imports finished, when
+TradingBot() returned and when the first get_ohlcv request was made.
+The request itself is intercepted, so no network access is needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, os, sys, threading, time
+sys.path.insert(0, {root!r})
+marks = {{}}
+lock = threading.Lock()
+from exchange.indodax_api import IndodaxAPI
+def first_request(self, *args, **kwargs):
+    with lock:
+        marks['request'] = time.time()
+        print(json.dumps(marks), flush=True)
+        os._exit(0)
+IndodaxAPI.get_ohlcv = first_request
+import main
+marks['imported'] = time.time()
+bot = main.TradingBot()
+marks['initialized'] = time.time()
+bot.run()
+'''
+
+def import_times():
+    """{module: (self_us, cumulative_us)} from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def by_package(times):
+    """Self time summed per top-level package"""
+    totals = defaultdict(int)
+    for name, (self_us, _) in times.items():
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+def first_request(workdir):
+    """Seconds from process launch to imports, TradingBot() and first request"""
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD.format(root=ROOT)],
+        cwd=workdir, capture_output=True, text=True, timeout=60
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        raise SystemExit(f"bot did not reach the first request:\n{result.stderr[-2000:]}")
+    marks = json.loads(lines[-1])
+    return {name: marks[name] - start for name in ('imported', 'initialized', 'request')}
+
+def _workdir(directory, pairs):
+    for name in ('config', 'database'):
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    names = [f'c{i}_idr' for i in range(pairs)]
+    with open(os.path.join(directory, 'config', 'api_config.json'), 'w') as f:
+        json.dump({
+            'api_key': 'stub', 'secret_key': 'stub', 'pair': names[0], 'pairs': names,
+            'test_mode': True, 'metrics_enabled': False, 'websocket_enabled': False,
+            'log_console': False
+        }, f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--pairs', type=int, default=4)
+    parser.add_argument('--top', type=int, default=12, help="packages to list")
+    args = parser.parse_args()
+
+    times = import_times()
+    total = times['main'][1]
+    print(f"import main: {total / 1e3:.1f} ms")
+    print(f"{'package':<28}{'self ms':>10}{'share':>8}")
+    for package, self_us in by_package(times)[:args.top]:
+        print(f"{package:<28}{self_us / 1e3:>10.1f}{self_us / total * 100:>7.1f}%")
+    for heavy in ('pandas', 'ta', 'numba', 'schedule'):
+        if heavy in times:
+            print(f"note: {heavy} is imported at startup")
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as directory:
+            # Fresh directory: no database, history or journal to load
+            _workdir(directory, args.pairs)
+            runs.append(first_request(directory))
+    print(f"\n{'median of ' + str(args.runs) + ' runs':<28}{'s since launch':>16}")
+    for name in ('imported', 'initialized', 'request'):
+        values = sorted(run[name] for run in runs)
+        print(f"{name:<28}{values[len(values) // 2]:>16.3f}")
+
+if __name__ == "__main__":
+    main()
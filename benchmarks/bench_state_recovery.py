@@ -0,0 +1,139 @@
+"""Kill-and-restart check and recovery time of the strategy state journal
+
+A child process opens/closes positions through ScalpingStrategy with a
+StateJournal and prints each sequence number once record() returned.
+The parent SIGKILLs it mid-run, restarts from the same directory and
+checks that the recovered state is the last acknowledged one (or one
+record newer, if the kill landed between the write and the ack).
+
+A SIGKILL rarely lands inside write(), so after each kill half of the
+next record is appended to the log as a torn tail and the following
+round restarts the child on top of it. Snapshots rewrite the log and can
+hide a bad restart, so a torn tail check without snapshots runs first:
+records written after restarting on a torn tail must survive the next
+restart.
+
+Run from the repository root:
+    python -m benchmarks.bench_state_recovery --rounds 5
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from database.state_journal import StateJournal
+from strategies.scalping_strategy import ScalpingStrategy
+
+CONFIG = types.SimpleNamespace(max_position_size=0.1, stop_loss=0.02, take_profit=0.015)
+
+def _expected_state(step):
+    """Deterministic strategy state after `step` journal records of the child"""
+    strategy = ScalpingStrategy(CONFIG)
+    for i in range(1, step + 1):
+        _apply(strategy, i)
+    return strategy.to_state()
+
+def _apply(strategy, i):
+    # Odd steps enter, even steps exit through take profit
+    price = 1e9 + i
+    if strategy.position is None:
+        strategy.execute_strategy('BUY', price, 1e6)
+    else:
+        strategy.check_exit(strategy.take_profit)
+
+def child(directory, snapshot_every):
+    journal = StateJournal(directory, snapshot_every=snapshot_every)
+    strategy = ScalpingStrategy(CONFIG, journal, 'btc_idr')
+    i = journal.seq
+    while True:
+        i += 1
+        _apply(strategy, i)
+        print(i, flush=True)
+
+def _tear(directory, seq):
+    """Append half a journal line, as left by a kill in the middle of write()"""
+    line = json.dumps({'seq': seq + 1, 'time': time.time(), 'key': 'btc_idr',
+                       'state': {'position': 'LONG'}}, separators=(',', ':'))
+    with open(os.path.join(directory, 'journal.log'), 'a', encoding='utf-8') as f:
+        f.write(line[:len(line) // 2])
+
+def check_torn_tail(directory):
+    journal = StateJournal(directory, snapshot_every=10 ** 9, sync=False)
+    for i in range(1, 3):
+        journal.record('btc_idr', {'step': i})
+    journal.log.close()
+    _tear(directory, journal.seq)
+    journal = StateJournal(directory, snapshot_every=10 ** 9, sync=False)
+    for i in range(3, 5):
+        journal.record('btc_idr', {'step': i})
+    journal.log.close()
+    recovered = StateJournal(directory, snapshot_every=10 ** 9, sync=False)
+    recovered.log.close()
+    return recovered.get('btc_idr') == {'step': 4} and recovered.seq == 4
+
+def run_round(directory, snapshot_every, kill_after, tear=True):
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.bench_state_recovery', '--child', directory,
+         '--snapshot-every', str(snapshot_every)],
+        stdout=subprocess.PIPE, text=True
+    )
+    acked = 0
+    deadline = time.monotonic() + kill_after
+    while time.monotonic() < deadline:
+        line = proc.stdout.readline()
+        if not line:
+            break
+        acked = int(line)
+    os.kill(proc.pid, signal.SIGKILL)
+    proc.wait()
+    for line in proc.stdout:
+        acked = int(line)
+    if tear:
+        _tear(directory, acked)
+
+    start = time.perf_counter()
+    journal = StateJournal(directory, snapshot_every=snapshot_every)
+    strategy = ScalpingStrategy(CONFIG, journal, 'btc_idr')
+    elapsed = time.perf_counter() - start
+    recovered = journal.seq
+    journal.log.close()
+
+    ok = recovered in (acked, acked + 1) and strategy.to_state() == _expected_state(recovered)
+    return ok, acked, recovered, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--snapshot-every', type=int, default=1000)
+    parser.add_argument('--kill-after', type=float, default=0.5)
+    parser.add_argument('--no-tear', action='store_true', help="don't append torn tails")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.snapshot_every)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        ok = check_torn_tail(directory)
+        print(f"restart on a torn tail: {'ok' if ok else 'MISMATCH'}")
+    failures = int(not ok)
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(args.rounds):
+            ok, acked, recovered, elapsed = run_round(
+                directory, args.snapshot_every, args.kill_after, tear=not args.no_tear
+            )
+            failures += not ok
+            print(
+                f"round {n + 1}: acked {acked} recovered {recovered} "
+                f"in {elapsed * 1e3:.2f} ms {'ok' if ok else 'MISMATCH'}"
+            )
+    if failures:
+        sys.exit(f"{failures} checks recovered the wrong state")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Per-trade cost of the incremental trade tape vs recomputing the window
+
+Feeds a synthetic trade stream through TradeTape the way the bot polls
+it: every poll returns the newest `--poll` trades, overlapping the last
+one, so most ids are duplicates. The window figures are checked against
+a brute-force recompute over the trades in the window, then the cost per
+new trade is timed for growing windows; it should stay flat.
+
+Run from the repository root:
+    python -m benchmarks.bench_trade_tape --trades 200000
+"""
+import argparse
+import math
+import time
+import numpy as np
+from marketdata.trade_tape import TradeTape
+
+PAIR = 'btc_idr'
+
+class FakeApi:
+    """get_trades over a synthetic stream, newest first like the endpoint"""
+
+    def __init__(self, trades, poll):
+        self.trades = trades
+        self.poll = poll
+        self.end = 0
+
+    def get_trades(self, pair, limit=1000):
+        return self.trades[max(0, self.end - self.poll):self.end][::-1][:limit]
+
+def stream(n, seed=1):
+    rng = np.random.default_rng(seed)
+    dates = (1.7e9 + np.cumsum(rng.exponential(0.5, n))).astype(int)
+    prices = 1e9 * np.exp(np.cumsum(rng.normal(0, 2e-4, n)))
+    amounts = rng.lognormal(-6, 1, n)
+    sides = np.where(rng.random(n) < 0.5, 'buy', 'sell')
+    return [
+        {'tid': str(1000 + i), 'date': str(dates[i]), 'type': sides[i],
+         'price': str(prices[i]), 'amount': str(amounts[i])}
+        for i in range(n)
+    ]
+
+def brute_force(trades, now, window):
+    rows = [t for t in trades if int(t['date']) > now - window]
+    volume = sum(float(t['amount']) for t in rows)
+    notional = sum(float(t['price']) * float(t['amount']) for t in rows)
+    buys = sum(float(t['amount']) for t in rows if t['type'] == 'buy')
+    return notional / volume, (2 * buys - volume) / volume, len(rows)
+
+def run(trades, window, poll, step):
+    api = FakeApi(trades, poll)
+    tape = TradeTape(api, [PAIR], window=window, max_seen=poll * 2)
+    added = 0
+    start = time.perf_counter()
+    for end in range(step, len(trades) + 1, step):
+        api.end = end
+        added += tape.poll(PAIR)
+    elapsed = time.perf_counter() - start
+    return tape, added, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trades', type=int, default=200000)
+    parser.add_argument('--poll', type=int, default=200, help="trades returned per poll")
+    parser.add_argument('--step', type=int, default=50, help="new trades between polls")
+    parser.add_argument('--windows', type=int, nargs='+', default=[60, 300, 1800, 7200])
+    args = parser.parse_args()
+
+    trades = stream(args.trades)
+    tape, added, _ = run(trades, args.windows[0], args.poll, args.step)
+    assert added == args.trades - args.trades % args.step, added
+    now = int(trades[added - 1]['date'])
+    stats = tape.stats(PAIR, now)
+    vwap, imbalance, count = brute_force(trades[:added], now, args.windows[0])
+    assert stats['trades'] == count, (stats['trades'], count)
+    assert math.isclose(stats['vwap'], vwap, rel_tol=1e-9), (stats['vwap'], vwap)
+    assert abs(stats['imbalance'] - imbalance) < 1e-6, (stats['imbalance'], imbalance)
+    print(f"{added} trades, {args.poll} per poll, each id added once; matches brute force")
+
+    print(f"{'window':>8}{'in window':>11}{'us/trade':>10}{'large':>7}")
+    for window in args.windows:
+        tape, added, elapsed = run(trades, window, args.poll, args.step)
+        stats = tape.stats(PAIR, now)
+        large = stats['large_buys'] + stats['large_sells']
+        print(f"{window:>7}s{stats['trades']:>11}{elapsed / added * 1e6:>10.2f}{large:>7}")
+
+if __name__ == "__main__":
+    main()
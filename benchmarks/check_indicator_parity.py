@@ -0,0 +1,86 @@
+"""Parity check of StreamingIndicators against TechnicalAnalysis
+
+Feeds a synthetic candle series through StreamingIndicators one candle at
+a time, each one first as a few forming updates (same timestamp, moving
+close/high/low) and then as its final values, and compares every column
+of the newest row with the `ta` based TechnicalAnalysis frame within a
+tolerance. Runs for the default windows and for custom ones, with a
+buffer smaller than the series so the ring wraps, over several series
+lengths and seeds: each puts its flat stretch (zero-width bands) at a
+different price level and offset into the running sums. Exits non-zero
+on the first mismatch.
+
+Run from the repository root:
+    python -m benchmarks.check_indicator_parity --candles 300 800 1000 2000 --seeds 1 2 3
+"""
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from indicators.technical_analysis import TechnicalAnalysis
+from indicators.streaming_indicators import StreamingIndicators, BOOL_COLUMNS
+
+PARAMS = [
+    {},
+    {'ma_fast': 5, 'ma_slow': 13, 'ma_trend': 34, 'rsi_period': 7, 'bb_period': 10},
+]
+
+def candles(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 1e9 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    # Flat stretches exercise the zero-range RSI/stochastic branches
+    close[n // 2:n // 2 + 20] = close[n // 2]
+    open_[n // 2 + 1:n // 2 + 20] = close[n // 2]
+    return pd.DataFrame({
+        'timestamp': 1.7e12 + np.arange(n) * 300_000,
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, n)),
+        'low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, n)),
+        'close': close,
+        'volume': rng.uniform(0, 5, n),
+    })
+
+def check(df, params, capacity, forming=3, rtol=1e-7, seed=2):
+    expected = TechnicalAnalysis(df, **params).calculate_all_indicators()
+    streaming = StreamingIndicators(capacity=capacity, **params)
+    rng = np.random.default_rng(seed)
+    for i, row in enumerate(df.itertuples(index=False)):
+        for _ in range(forming):
+            wobble = row.close * (1 + rng.normal(0, 0.002))
+            streaming.update(row.timestamp, row.open, max(row.high, wobble),
+                             min(row.low, wobble), wobble, row.volume)
+        latest = streaming.update(*row)
+        for column in streaming.columns:
+            want, got = expected[column].iloc[i], latest[column]
+            if column in BOOL_COLUMNS:
+                ok = bool(want) == bool(got)
+            elif pd.isna(want):
+                ok = got != got
+            else:
+                ok = np.isclose(got, want, rtol=rtol, atol=1e-9 * abs(row.close))
+            if not ok:
+                raise AssertionError(
+                    f"{params or 'defaults'}: {column} at candle {i}: streaming {got} != ta {want}"
+                )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, nargs='+', default=[300, 800, 1000, 2000])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--capacity', type=int, default=256, help="streaming buffer rows")
+    args = parser.parse_args()
+
+    for n in args.candles:
+        for seed in args.seeds:
+            df = candles(n, seed)
+            for params in PARAMS:
+                try:
+                    check(df, params, args.capacity, seed=seed + 1)
+                except AssertionError as e:
+                    print(f"FAIL {n} candles, seed {seed}: {e}")
+                    sys.exit(1)
+            print(f"{n} candles, seed {seed}: all columns match for {len(PARAMS)} parameter sets")
+
+if __name__ == "__main__":
+    main()
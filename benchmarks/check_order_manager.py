@@ -0,0 +1,129 @@
+"""Check of OrderManager against the local mock /tapi exchange
+
+Runs OrderManager over IndodaxAPI and HttpTransport against a
+MockTapiServer (execution/mock_tapi.py), the same wiring as the live
+bot, with a short stale_after so the timeouts play out in seconds.
+Covered: a partial fill that goes stale, is cancelled and repriced, and
+fills at the new price (one logical order, averaged fill price); an
+order cancelled on timeout once it is out of reprices; and on_done
+reconciling balances from getInfo the way TradingBot.on_order_done
+does, so the balances it sees already include the fill. Exits non-zero
+on the first failure.
+
+Run from the repository root:
+    python -m benchmarks.check_order_manager
+"""
+import argparse
+import math
+import sys
+import time
+from exchange.indodax_api import IndodaxAPI
+from exchange.transport import HttpTransport
+from execution.mock_tapi import MockExchange, MockTapiServer
+from execution.order_manager import OrderManager, OPEN, PARTIAL, FILLED, CANCELLED
+
+PAIR = 'btc_idr'
+PRICE = 1_000_000_000.0
+MARKET = 1_010_000_000.0  # above PRICE, so buys at PRICE rest on the book
+IDR = 100_000_000.0
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+class Harness:
+    def __init__(self, max_reprices):
+        self.exchange = MockExchange(balances={'idr': IDR, 'btc': 0.0}, prices={PAIR: MARKET})
+        self.server = MockTapiServer(self.exchange).start()
+        transport = HttpTransport(public_rate=100, private_rate=100, burst=100, backoff=0.05,
+                                  timeout=(1.0, 2.0), max_retries=1)
+        self.api = IndodaxAPI('key', 'secret', transport, self.server.base_url)
+        self.done = []
+        self.orders = OrderManager(
+            self.api, reprice=lambda order: MARKET, on_done=self.on_done,
+            poll_interval=0.1, stale_after=0.5, max_reprices=max_reprices
+        )
+        self.orders.start()
+
+    def on_done(self, order):
+        # As TradingBot.on_order_done: getInfo once the order is final
+        balances = self.orders.reconcile()
+        self.done.append((order.id, order.status, dict(balances or {}), dict(self.orders.held)))
+
+    def close(self):
+        self.orders.stop(cancel_open=True)
+        self.server.stop()
+
+def check_partial_reprice_fill():
+    harness = Harness(max_reprices=3)
+    try:
+        order = harness.orders.submit(PAIR, 'BUY', PRICE, 0.01, tag='check')
+        assert wait_for(lambda: order.status == OPEN), order
+        harness.exchange.fill(order.order_id, 0.004)
+        assert wait_for(lambda: order.status == PARTIAL or order.reprices), order
+        first_id = order.order_id
+        assert order.done.wait(10), f"not filled: {order}"
+        assert order.status == FILLED, order
+        assert order.reprices == 1 and order.order_id != first_id, order
+        assert math.isclose(order.filled, 0.01, rel_tol=1e-9), order.filled
+        avg = (0.004 * PRICE + 0.006 * MARKET) / 0.01
+        assert math.isclose(order.avg_price, avg, rel_tol=1e-9), (order.avg_price, avg)
+        calls = harness.exchange.calls
+        assert calls.count('trade') == 2 and calls.count('cancelOrder') == 1, calls
+        # One on_done for the logical order, not one per exchange order
+        assert wait_for(lambda: harness.done)
+        assert [status for _, status, _, _ in harness.done] == [FILLED], harness.done
+        assert math.isclose(harness.done[0][2]['btc'], 0.01, rel_tol=1e-9), harness.done
+        return (f"0.004 filled at {PRICE:,.0f}, rest repriced to {MARKET:,.0f} and filled, "
+                f"avg {order.avg_price:,.0f}")
+    finally:
+        harness.close()
+
+def check_cancel_on_timeout():
+    harness = Harness(max_reprices=0)
+    try:
+        order = harness.orders.submit(PAIR, 'BUY', PRICE, 0.01, tag='check')
+        assert order.done.wait(10), f"not cancelled: {order}"
+        waited = order.updated - order.placed
+        assert order.status == CANCELLED and order.filled == 0, order
+        assert waited >= 0.5, waited
+        assert harness.exchange.orders[order.order_id]['status'] == 'cancelled'
+        assert harness.exchange.balances['idr'] == IDR and harness.exchange.held['idr'] == 0
+        return f"unfilled order cancelled {waited:.2f}s after placing, IDR released"
+    finally:
+        harness.close()
+
+def check_on_done_reconcile():
+    harness = Harness(max_reprices=3)
+    try:
+        order = harness.orders.submit(PAIR, 'BUY', MARKET, 0.01, tag='check')
+        assert order.done.wait(10), f"not filled: {order}"
+        assert wait_for(lambda: harness.done), "on_done not called"
+        order_id, status, balances, held = harness.done[0]
+        assert len(harness.done) == 1 and order_id == order.id and status == FILLED
+        # The balances on_done sees already include this fill
+        assert math.isclose(balances['btc'], 0.01, rel_tol=1e-9), balances
+        assert math.isclose(balances['idr'], IDR - 0.01 * MARKET, rel_tol=1e-9), balances
+        assert held.get('idr', 0.0) == 0.0, held
+        assert harness.orders.balances == balances
+        return f"on_done called once, reconciled btc {balances['btc']} idr {balances['idr']:,.0f}"
+    finally:
+        harness.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    for check in (check_partial_reprice_fill, check_cancel_on_timeout, check_on_done_reconcile):
+        try:
+            print(f"{check.__name__}: {check()}")
+        except AssertionError as e:
+            print(f"FAIL {check.__name__}: {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
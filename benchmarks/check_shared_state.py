@@ -0,0 +1,138 @@
+"""Check of SharedMarketState under concurrent writers, readers and a crash
+
+A spawned writer process keeps merging candles into the rings (closing
+some, rewriting the forming one) while reader processes copy tails out
+with candles_since; every row it writes has o/h/l/c/v derived from its
+timestamp and a revision, so a torn read (a row or tail copied mid-write)
+shows up as a row that doesn't match itself or timestamps out of order.
+Then a process is SIGKILLed while holding a ring lock, and the next
+publish must take the lock over instead of hanging. Exits non-zero on
+the first failure.
+
+Run from the repository root:
+    python -m benchmarks.check_shared_state --seconds 3 --readers 2
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import numpy as np
+from marketdata.shared_state import SharedMarketState
+
+PAIRS = ['btc_idr', 'eth_idr']
+TIMEFRAME = '5m'
+
+def row(timestamp, revision):
+    price = timestamp * 10 + revision
+    return [timestamp, price, price + 1, price - 1, price + 0.5, revision]
+
+def consistent(rows):
+    """None when every row matches its timestamp/revision and order is strict"""
+    t, o, h, l, c, v = rows.T
+    price = t * 10 + v
+    if not (np.array_equal(o, price) and np.array_equal(h, price + 1)
+            and np.array_equal(l, price - 1) and np.array_equal(c, price + 0.5)):
+        return "row fields from different writes"
+    if len(t) > 1 and not np.all(np.diff(t) > 0):
+        return "timestamps out of order"
+    return None
+
+def _writer(state):
+    timestamp = 1
+    while not state.stopping():
+        for revision in range(3):
+            for pair in PAIRS:
+                # A closed candle and the forming one, like a CandleCache update
+                state.publish(pair, TIMEFRAME, [row(timestamp, 0), row(timestamp + 1, revision)])
+        timestamp += 1
+    state.close()
+
+def _reader(state, results):
+    reads, error = 0, None
+    since = {pair: None for pair in PAIRS}
+    while not state.stopping() and error is None:
+        for pair in PAIRS:
+            rows = state.candles_since(pair, TIMEFRAME, since[pair])
+            error = consistent(rows)
+            if error is not None:
+                error = f"{pair}: {error}"
+                break
+            if len(rows):
+                since[pair] = rows[-1, 0]
+            reads += 1
+    results.put((reads, error))
+    state.close()
+
+def _hold_lock(state, held):
+    with state._locked(0):
+        held.set()
+        time.sleep(60)
+
+def check_concurrent(seconds, readers, capacity):
+    context = multiprocessing.get_context('spawn')
+    state = SharedMarketState(PAIRS, [TIMEFRAME], capacity, create=True)
+    try:
+        results = context.Queue()
+        processes = [context.Process(target=_writer, args=(state,))]
+        processes += [context.Process(target=_reader, args=(state, results)) for _ in range(readers)]
+        for process in processes:
+            process.start()
+        time.sleep(seconds)
+        state.request_stop()
+        outcomes = [results.get(timeout=30) for _ in range(readers)]
+        for process in processes:
+            process.join(10)
+        errors = [error for _, error in outcomes if error]
+        assert not errors, errors[0]
+        assert all(reads > 0 for reads, _ in outcomes), outcomes
+        final = state.candles_since(PAIRS[0], TIMEFRAME)
+        assert consistent(final) is None and len(final) == capacity, len(final)
+        return (f"{sum(reads for reads, _ in outcomes)} reads by {readers} processes "
+                f"under a writer, no torn rows")
+    finally:
+        state.close()
+
+def check_takeover(lock_timeout=0.5):
+    context = multiprocessing.get_context('spawn')
+    state = SharedMarketState(PAIRS, [TIMEFRAME], 10, create=True, lock_timeout=lock_timeout)
+    try:
+        held = context.Event()
+        holder = context.Process(target=_hold_lock, args=(state, held))
+        holder.start()
+        assert held.wait(30), "holder never took the lock"
+        os.kill(holder.pid, signal.SIGKILL)
+        holder.join()
+        start = time.monotonic()
+        state.publish(PAIRS[0], TIMEFRAME, [row(1, 0)])
+        waited = time.monotonic() - start
+        assert waited < lock_timeout * 4, waited
+        # Released normally afterwards
+        assert len(state.candles_since(PAIRS[0], TIMEFRAME)) == 1
+        assert state.locks[0].acquire(timeout=0.1)
+        state.locks[0].release()
+        return f"lock of a SIGKILLed holder taken over after {waited:.2f}s"
+    finally:
+        state.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--capacity', type=int, default=50, help="ring rows, small so it wraps")
+    args = parser.parse_args()
+
+    checks = [
+        ('check_concurrent', lambda: check_concurrent(args.seconds, args.readers, args.capacity)),
+        ('check_takeover', check_takeover),
+    ]
+    for name, check in checks:
+        try:
+            print(f"{name}: {check()}")
+        except AssertionError as e:
+            print(f"FAIL {name}: {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
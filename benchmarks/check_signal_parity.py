@@ -0,0 +1,127 @@
+"""Parity check of the signal kernel against SignalGenerator.generate_signals
+
+Runs generate_signals on every prefix of an indicator frame and checks
+that the kernel's decision and generate_signal_series for the last bar of
+the prefix are the same. Two frames: a synthetic one with extreme values
+so every vote fires regularly, and a TechnicalAnalysis frame over a
+random walk with its real warm-up NaNs. Covers the NumPy and (if
+installed) the numba path. Then the trade tape votes: a tape that isn't
+ready leaves every decision as the kernel's, and a ready one scales the
+thresholds to 5 of 7 for and under 3 against. Exits non-zero on the
+first mismatch.
+
+Run from the repository root:
+    python -m benchmarks.check_signal_parity --bars 3000
+"""
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from indicators.signal_generator import SignalGenerator
+from indicators.signal_kernel import frame_signal_votes, DECISIONS, NUMBA_AVAILABLE
+from indicators.technical_analysis import TechnicalAnalysis
+
+def synthetic_frame(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, n)
+    df = pd.DataFrame({
+        'close': close,
+        'RSI': rng.uniform(0, 100, n),
+        'MACD_cross': rng.random(n) < 0.5,
+        'MA_9': close + rng.normal(0, 1, n),
+        'MA_21': close + rng.normal(0, 1, n),
+        'BB_lower': close + rng.normal(-1, 1, n),
+        'BB_upper': close + rng.normal(1, 1, n),
+        'STOCH_K': rng.uniform(0, 100, n),
+        'STOCH_D': rng.uniform(0, 100, n),
+    })
+    # Warm-up NaNs as produced by the indicators
+    df.loc[:20, ['RSI', 'MA_21', 'BB_lower', 'BB_upper', 'STOCH_D']] = np.nan
+    return df
+
+def indicator_frame(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 1e9 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return TechnicalAnalysis(pd.DataFrame({
+        'timestamp': 1.7e12 + np.arange(n) * 300_000,
+        'open': open_,
+        'high': np.maximum(open_, close) * 1.002,
+        'low': np.minimum(open_, close) * 0.998,
+        'close': close,
+        'volume': rng.uniform(0, 5, n),
+    })).calculate_all_indicators()
+
+def check(df, jit):
+    """Decision counts over the frame; raises AssertionError on a mismatch"""
+    _, _, decision = frame_signal_votes(df, 'MA_9', 'MA_21', jit=jit)
+    signals = DECISIONS[decision]
+    series = SignalGenerator(df).generate_signal_series(jit=jit)['signal'].to_numpy()
+    for end in range(2, len(df) + 1):
+        expected = SignalGenerator(df.iloc[:end]).generate_signals()
+        if signals[end - 1] != expected:
+            raise AssertionError(f"bar {end - 1}: kernel {signals[end - 1]} != {expected}")
+        if series[end - 1] != expected:
+            raise AssertionError(
+                f"bar {end - 1}: generate_signal_series {series[end - 1]} != {expected}"
+            )
+    return pd.Series(signals[1:]).value_counts().to_dict()
+
+def tape_stats(ready=True, imbalance=0.0, vwap=100.0, large_buys=0, large_sells=0):
+    return {'ready': ready, 'imbalance': imbalance, 'vwap': vwap,
+            'large_buys': large_buys, 'large_sells': large_sells}
+
+def check_tape(df):
+    """Tape votes against the kernel and the scaled thresholds"""
+    _, _, decision = frame_signal_votes(df, 'MA_9', 'MA_21', jit=False)
+    signals = DECISIONS[decision]
+    sg = SignalGenerator()
+    rows = df.to_dict('records')
+    not_ready = tape_stats(ready=False, imbalance=1.0, large_buys=3)
+    for i in range(1, len(rows)):
+        got = sg.generate_signals_from_rows(rows[i], rows[i - 1], not_ready)
+        if got != signals[i]:
+            raise AssertionError(f"bar {i}: not ready tape {got} != kernel {signals[i]}")
+
+    # Three indicator votes for a BUY, two neutral
+    latest = {'close': 100.0, 'RSI': 25.0, 'MACD_cross': True, 'MA_9': 101.0,
+              'MA_21': 100.0, 'BB_lower': 99.0, 'BB_upper': 101.0,
+              'STOCH_K': 50.0, 'STOCH_D': 50.0}
+    prev = dict(latest, RSI=35.0, MACD_cross=False, MA_9=99.0)
+    cases = [
+        (None, 'BUY'),                                             # 3 of 5
+        (tape_stats(), 'HOLD'),                                    # 3 of 7
+        (tape_stats(imbalance=0.5), 'HOLD'),                       # 4 of 7
+        (tape_stats(imbalance=0.5, large_buys=2), 'BUY'),          # 5 of 7
+        (tape_stats(imbalance=0.5, vwap=None, large_buys=2), 'BUY'),  # 4 of 6
+        (tape_stats(imbalance=-0.5, large_buys=2), 'HOLD'),        # 4 for, 1 against of 7
+    ]
+    for tape, want in cases:
+        got = sg.generate_signals_from_rows(latest, prev, tape)
+        if got != want:
+            raise AssertionError(f"3 indicator BUY votes with tape {tape}: {got} != {want}")
+    return f"not ready tape matches the kernel over {len(rows)} bars, {len(cases)} threshold cases"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bars', type=int, default=3000)
+    args = parser.parse_args()
+
+    frames = [('synthetic', synthetic_frame(args.bars)), ('indicators', indicator_frame(args.bars))]
+    paths = [('numpy', False)] + ([('numba', True)] if NUMBA_AVAILABLE else [])
+    for frame_name, df in frames:
+        for name, jit in paths:
+            try:
+                counts = check(df, jit)
+            except AssertionError as e:
+                print(f"FAIL {frame_name}/{name}: {e}")
+                sys.exit(1)
+            print(f"{frame_name}/{name}: parity ok over {args.bars} bars {counts}")
+    try:
+        print(f"tape: {check_tape(frames[0][1])}")
+    except AssertionError as e:
+        print(f"FAIL tape: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Check of HttpTransport and IndodaxAPI against a local stub HTTP server
+
+The stub (http.server, HTTP/1.1 keep-alive) plays scripted responses per
+path and records every hit with the client port it came from. Covered:
+429/5xx retried with backoff until success or max_retries, Retry-After
+honoured, one pooled connection reused across calls, the public token
+bucket pacing calls, and the order-placing `trade` call never retried
+after a 5xx or a read timeout (while read-only getInfo is). Exits
+non-zero on the first failure.
+
+Run from the repository root:
+    python -m benchmarks.check_transport
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+from exchange.indodax_api import IndodaxAPI
+from exchange.transport import HttpTransport
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def _serve(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode()) if length else {}
+        path = urlparse(self.path).path
+        method = form.get('method', [None])[0]
+        server = self.server
+        with server.lock:
+            server.hits.append((path, method, self.client_address[1], time.monotonic()))
+            script = server.scripts[(path, method)]
+            status, headers, delay = script.popleft() if script else (200, {}, 0)
+        if delay:
+            time.sleep(delay)
+        body = json.dumps({'success': int(status == 200), 'status': status}).encode()
+        try:
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first
+
+    do_GET = do_POST = _serve
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.reset()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self):
+        with self.lock:
+            self.hits = []
+            self.scripts = defaultdict(deque)
+
+    def script(self, path, responses, method=None):
+        """Queue (status, headers, delay) responses for a path (and tapi method)"""
+        self.scripts[(path, method)].extend(responses)
+
+    def calls(self, path, method=None):
+        return [hit for hit in self.hits if hit[0] == path and hit[1] == method]
+
+def make_api(server, **kwargs):
+    options = dict(public_rate=1000, private_rate=1000, burst=1000, backoff=0.05,
+                   max_backoff=2.0, timeout=(1.0, 0.3), max_retries=3)
+    options.update(kwargs)
+    transport = HttpTransport(**options)
+    return IndodaxAPI('key', 'secret', transport, server.url), transport
+
+TICKER = '/api/btc_idr/ticker'
+
+def check_retry_5xx(server):
+    api, transport = make_api(server)
+    server.script(TICKER, [(503, {}, 0), (502, {}, 0), (429, {}, 0), (200, {}, 0)])
+    assert api.get_ticker('btc_idr')['status'] == 200
+    hits = server.calls(TICKER)
+    assert len(hits) == 4 and transport.retries == 3, (len(hits), transport.retries)
+
+    server.reset()
+    server.script(TICKER, [(500, {}, 0)] * 10)
+    try:
+        api.get_ticker('btc_idr')
+        raise AssertionError("500 after max_retries did not raise")
+    except requests.HTTPError:
+        pass
+    assert len(server.calls(TICKER)) == 4, len(server.calls(TICKER))
+    return "429/5xx retried until success, raises after max_retries (4 attempts)"
+
+def check_retry_after(server):
+    api, _ = make_api(server)
+    server.script(TICKER, [(429, {'Retry-After': '0.5'}, 0), (200, {}, 0)])
+    api.get_ticker('btc_idr')
+    first, second = server.calls(TICKER)
+    gap = second[3] - first[3]
+    # Jittered backoff alone would be at most 0.05 s here
+    assert gap >= 0.45, gap
+    return f"Retry-After 0.5 s honoured (waited {gap:.2f} s)"
+
+def check_keep_alive(server):
+    api, _ = make_api(server)
+    for _ in range(20):
+        api.get_ticker('btc_idr')
+    ports = {hit[2] for hit in server.calls(TICKER)}
+    assert len(ports) == 1, f"{len(ports)} connections for 20 calls"
+    return "20 calls over 1 keep-alive connection"
+
+def check_rate_limit(server):
+    api, _ = make_api(server, public_rate=10, burst=1)
+    start = time.monotonic()
+    for _ in range(11):
+        api.get_ticker('btc_idr')
+    elapsed = time.monotonic() - start
+    # One token up front, then 10 refills at 10/s
+    assert elapsed >= 0.95, elapsed
+    return f"11 calls at 10/s, burst 1 took {elapsed:.2f} s"
+
+def check_trade_not_retried(server):
+    api, transport = make_api(server)
+    server.script('/tapi', [(500, {}, 0)], method='trade')
+    response = api.place_order('btc_idr', 'buy', 1e9, 0.001)
+    assert response['status'] == 500, response
+    assert len(server.calls('/tapi', 'trade')) == 1
+
+    server.script('/tapi', [(200, {}, 0.6)], method='trade')
+    try:
+        api.place_order('btc_idr', 'sell', 1e9, 0.001)
+        raise AssertionError("read timeout on trade did not raise")
+    except requests.exceptions.ReadTimeout:
+        pass
+    assert len(server.calls('/tapi', 'trade')) == 2, server.calls('/tapi', 'trade')
+
+    # The read-only getInfo is retried on the same error
+    server.script('/tapi', [(500, {}, 0), (200, {}, 0)], method='getInfo')
+    assert api.get_balance()['status'] == 200
+    assert len(server.calls('/tapi', 'getInfo')) == 2
+    assert transport.retries == 1, transport.retries
+    return "trade sent once on 500 and on read timeout; getInfo retried"
+
+CHECKS = [check_retry_5xx, check_retry_after, check_keep_alive, check_rate_limit,
+          check_trade_not_retried]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    server = StubServer()
+    try:
+        for check in CHECKS:
+            server.reset()
+            try:
+                print(f"{check.__name__}: {check(server)}")
+            except AssertionError as e:
+                print(f"FAIL {check.__name__}: {e}")
+                sys.exit(1)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Check of MarketDataFeed against a local replay websocket server
+
+The replay server speaks just enough RFC 6455 (handshake, text, ping and
+close frames) to play a scripted session to the feed: trades with a
+missing channel offset, a dropped connection, two refused reconnects and
+a resumed stream, while a fake REST trades endpoint holds every trade
+the "exchange" has printed so far. Covered: the gap is detected and
+backfilled, reconnects back off (doubling, capped) and reset after a
+good connect, every pair is backfilled on reconnect, each trade reaches
+the listeners exactly once and in order, server pings are answered, and
+last_price goes stale after max_price_age. Exits non-zero on the first
+failure.
+
+Run from the repository root:
+    python -m benchmarks.check_ws_feed
+"""
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+import types
+from marketdata import websocket_feed
+from marketdata.websocket_feed import MarketDataFeed, channel_pair
+
+PAIRS = ['btc_idr', 'eth_idr']
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+class FakeApi:
+    """REST get_trades over the trades printed so far, newest first"""
+
+    def __init__(self):
+        self.trades = {pair: [] for pair in PAIRS}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def print_trade(self, pair, tid, price):
+        with self.lock:
+            self.trades[pair].append({'tid': str(tid), 'date': str(1_700_000_000 + tid),
+                                      'type': 'buy', 'price': str(price), 'amount': '0.01'})
+
+    def get_trades(self, pair, limit=1000):
+        with self.lock:
+            self.calls.append(pair)
+            return self.trades[pair][::-1][:limit]
+
+def recv_exact(conn, n):
+    data = b''
+    while len(data) < n:
+        chunk = conn.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError('client closed')
+        data += chunk
+    return data
+
+def recv_frame(conn):
+    """(opcode, payload) of one client frame; client frames are masked"""
+    b0, b1 = recv_exact(conn, 2)
+    length = b1 & 0x7f
+    if length == 126:
+        length, = struct.unpack('>H', recv_exact(conn, 2))
+    elif length == 127:
+        length, = struct.unpack('>Q', recv_exact(conn, 8))
+    mask = recv_exact(conn, 4) if b1 & 0x80 else b'\0\0\0\0'
+    payload = recv_exact(conn, length)
+    return b0 & 0x0f, bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+def send_frame(conn, payload, opcode=0x1):
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 1 << 16:
+        header += bytes([126]) + struct.pack('>H', len(payload))
+    else:
+        header += bytes([127]) + struct.pack('>Q', len(payload))
+    conn.sendall(header + payload)
+
+def handshake(conn):
+    request = b''
+    while b'\r\n\r\n' not in request:
+        request += conn.recv(4096)
+    headers = dict(
+        line.split(': ', 1) for line in request.decode().split('\r\n')[1:] if ': ' in line
+    )
+    key = headers['Sec-WebSocket-Key'].strip()
+    accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+    conn.sendall((
+        "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n"
+    ).encode())
+
+class ReplayServer:
+    """Plays one scripted session per accepted connection, in order
+
+    A session is a list of steps: ('refuse',) closes the socket before
+    the handshake, ('trade', pair, offset, tid, price) prints the trade
+    on the fake exchange and sends it on the channel, ('print', pair,
+    tid, price) prints a trade without sending it (missed by the feed),
+    ('ping',) sends an empty message and waits for the '{}' reply and
+    ('drop',) closes the connection. Accept times are kept to measure the
+    reconnect backoff.
+    """
+
+    def __init__(self, api, sessions):
+        self.api = api
+        self.sessions = list(sessions)
+        self.accepts = []
+        self.drops = []
+        self.subscriptions = []
+        self.pongs = 0
+        self.errors = []
+        self.done = threading.Event()
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.sock.getsockname()[1]}/ws/"
+
+    def _serve(self):
+        try:
+            for session in self.sessions:
+                conn, _ = self.sock.accept()
+                self.accepts.append(time.monotonic())
+                with conn:
+                    self._play(conn, session)
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            self.done.set()
+
+    def _play(self, conn, session):
+        if session[0] == ('refuse',):
+            return
+        handshake(conn)
+        # Auth message then one subscribe per channel
+        messages = [json.loads(recv_frame(conn)[1]) for _ in range(1 + len(PAIRS))]
+        self.subscriptions.append(sorted(m['params'].get('channel', '') for m in messages[1:]))
+        for step in session:
+            kind = step[0]
+            if kind == 'print':
+                self.api.print_trade(*step[1:])
+            elif kind == 'trade':
+                pair, offset, tid, price = step[1:]
+                self.api.print_trade(pair, tid, price)
+                row = [pair, 1_700_000_000 + tid, tid, 'buy', price, price * 0.01, 0.01]
+                send_frame(conn, json.dumps({'result': {
+                    'channel': f"market:trade-activity-{channel_pair(pair)}",
+                    'data': {'data': [row], 'offset': offset},
+                }}).encode())
+            elif kind == 'ping':
+                send_frame(conn, b'{}')
+                opcode, payload = recv_frame(conn)
+                self.pongs += opcode == 0x1 and payload == b'{}'
+            elif kind == 'drop':
+                self.drops.append(time.monotonic())
+                return
+
+def check_session(reconnect_delay, max_reconnect_delay):
+    api = FakeApi()
+    server = ReplayServer(api, [
+        # tid 103 / offset 3 never arrives on the socket
+        [('trade', 'btc_idr', 1, 101, 100.0), ('trade', 'btc_idr', 2, 102, 101.0),
+         ('print', 'btc_idr', 103, 102.0), ('trade', 'btc_idr', 4, 104, 103.0),
+         ('print', 'btc_idr', 105, 104.0), ('print', 'eth_idr', 201, 50.0), ('drop',)],
+        [('refuse',)],
+        [('refuse',)],
+        [('refuse',)],
+        [('ping',), ('trade', 'btc_idr', 5, 106, 105.0), ('trade', 'eth_idr', 1, 202, 51.0),
+         ('ping',)],
+    ])
+    feed = MarketDataFeed(api, PAIRS, url=server.url, reconnect_delay=reconnect_delay,
+                          max_reconnect_delay=max_reconnect_delay, timeout=2)
+    received = []
+    feed.add_listener(lambda pair, price, trade: received.append((pair, trade['tid'])))
+    feed.start()
+    try:
+        server.done.wait(10)
+        # Let the feed apply what the last session sent
+        deadline = time.monotonic() + 2
+        while len(received) < 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        feed.stop()
+    assert not server.errors, server.errors
+    return api, server, feed, received
+
+def check_gap_and_reconnect(reconnect_delay=0.1, max_reconnect_delay=0.3):
+    api, server, feed, received = check_session(reconnect_delay, max_reconnect_delay)
+
+    expected = ([('btc_idr', tid) for tid in (101, 102, 103, 104, 105, 106)]
+                + [('eth_idr', 201), ('eth_idr', 202)])
+    assert sorted(received) == sorted(expected), received
+    for pair in PAIRS:
+        tids = [tid for p, tid in received if p == pair]
+        assert tids == sorted(set(tids)), f"{pair} out of order or repeated: {tids}"
+    assert feed.gaps == 1, feed.gaps
+    assert feed.reconnects == 1, feed.reconnects
+    # One backfill for the gap, then one per pair on the reconnect
+    assert api.calls == ['btc_idr'] + PAIRS, api.calls
+    channels = sorted(f"market:trade-activity-{channel_pair(p)}" for p in PAIRS)
+    assert server.subscriptions == [channels, channels], server.subscriptions
+    assert server.pongs == 2, server.pongs
+    assert feed.last_price('btc_idr') == 105.0 and feed.last_price('eth_idr') == 51.0
+
+    # Jitter pinned to its upper bound: delay resets to reconnect_delay
+    # after the good connect, doubles per failure and is capped
+    gaps = [server.accepts[1] - server.drops[0]]
+    gaps += [b - a for a, b in zip(server.accepts[1:], server.accepts[2:])]
+    want = [reconnect_delay, 2 * reconnect_delay, max_reconnect_delay, max_reconnect_delay]
+    for gap, delay in zip(gaps, want):
+        assert delay * 0.9 <= gap <= delay + 0.15, (
+            f"reconnect gaps {[round(g, 3) for g in gaps]}, want {want}"
+        )
+    return (f"gap backfilled, 8 trades applied once in order, reconnect gaps "
+            f"{' '.join(f'{g:.2f}' for g in gaps)}s, both pairs backfilled on reconnect")
+
+def check_stale_price(max_price_age=0.2):
+    feed = MarketDataFeed(FakeApi(), PAIRS, max_price_age=max_price_age)
+    assert feed.last_price('btc_idr') is None
+    feed.apply_trade('btc_idr', 1, 1_700_000_000, 'buy', 100.0, 0.01)
+    assert feed.last_price('btc_idr') == 100.0
+    time.sleep(max_price_age * 1.5)
+    assert feed.last_price('btc_idr') is None, "stale price still returned"
+    feed.apply_trade('btc_idr', 2, 1_700_000_001, 'buy', 101.0, 0.01)
+    assert feed.last_price('btc_idr') == 101.0
+    return f"last_price None after {max_price_age}s without trades, fresh again on the next"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    # Deterministic backoff: full jitter always sleeps its upper bound
+    websocket_feed.random = types.SimpleNamespace(uniform=lambda low, high: high)
+    for check in (check_gap_and_reconnect, check_stale_price):
+        try:
+            print(f"{check.__name__}: {check()}")
+        except AssertionError as e:
+            print(f"FAIL {check.__name__}: {e}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
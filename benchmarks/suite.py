@@ -0,0 +1,322 @@
+"""Offline benchmark suite for the trading cycle, compared with a baseline
+
+Times each stage of the bot on synthetic OHLCV and records latency
+percentiles and the peak memory allocated per call:
+
+- indicators: TechnicalAnalysis.calculate_all_indicators
+- signals:    SignalGenerator.generate_signals
+- strategy:   ScalpingStrategy.execute_strategy
+- db_async / db_sync: DatabaseHandler.log_trade with and without the
+  batch writer
+- cycle:      TradingBot cycle for all pairs (MultiPairEngine.run_cycle)
+  in paper mode against a stubbed IndodaxAPI, one new candle per cycle
+
+No network access is needed; every file the bot writes goes to a
+temporary directory. Results are compared with benchmarks/baseline.json
+and the run fails when p50/p95 or peak memory regress by more than the
+tolerance. Baselines are machine specific: record one on the deploy
+host (--save-baseline) and compare there.
+
+Run from the repository root:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --only cycle --pairs 8 --candles 2000
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+import numpy as np
+import pandas as pd
+from exchange.indodax_api import IndodaxAPI
+from indicators.technical_analysis import TechnicalAnalysis
+from indicators.signal_generator import SignalGenerator
+from strategies.scalping_strategy import ScalpingStrategy
+from database.db_handler import DatabaseHandler
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+PARAMS = ('candles', 'pairs', 'iterations')
+
+def synthetic_candles(n, seconds=300, start=1.7e9, seed=1):
+    """Random-walk [t, o, h, l, c, v] rows, the same for a given seed"""
+    rng = np.random.default_rng(seed)
+    close = 1.5e9 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return np.column_stack([
+        start + np.arange(n) * seconds,
+        open_,
+        np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, n)),
+        np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, n)),
+        close,
+        rng.uniform(0, 5, n),
+    ])
+
+class StubIndodaxAPI(IndodaxAPI):
+    """IndodaxAPI serving synthetic market data without network access
+
+    Each pair has a fixed base candle series; candles after the cursor
+    are hidden until advance() reveals the next trading candle.
+    """
+
+    def __init__(self, pairs, base_seconds, warm, future, per_candle):
+        super().__init__('stub', 'stub')
+        self.base_seconds = base_seconds
+        self.per_candle = per_candle
+        end = int(time.time()) // (base_seconds * per_candle) * base_seconds * per_candle
+        start = end - warm * base_seconds
+        self.series = {
+            pair: synthetic_candles(warm + future, base_seconds, start, seed=i + 1)
+            for i, pair in enumerate(pairs)
+        }
+        self.cursor = warm
+
+    def advance(self):
+        self.cursor += self.per_candle
+
+    def _visible(self, pair):
+        return self.series[pair][:self.cursor]
+
+    def get_ohlcv(self, pair, interval=300, limit=100, since=None):
+        rows = self._visible(pair)
+        if since is not None:
+            rows = rows[rows[:, 0] >= since]
+        return {'s': 'ok', **{k: rows[:, i].tolist() for i, k in enumerate('tohlcv')}}
+
+    def get_ticker(self, pair):
+        return {'ticker': {'last': str(self._visible(pair)[-1, 4])}}
+
+    def get_order_book(self, pair):
+        last = self._visible(pair)[-1, 4]
+        steps = np.arange(1, 21) * 0.0005
+        return {
+            'buy': [[last * (1 - s), 0.05] for s in steps],
+            'sell': [[last * (1 + s), 0.05] for s in steps],
+        }
+
+    def get_trades(self, pair, limit=1000):
+        return []
+
+def _frame(n):
+    return pd.DataFrame(synthetic_candles(n), columns=COLUMNS)
+
+def case_indicators(args, workdir):
+    df = _frame(args.candles)
+    return lambda: TechnicalAnalysis(df).calculate_all_indicators()
+
+def case_signals(args, workdir):
+    frame = TechnicalAnalysis(_frame(args.candles)).calculate_all_indicators()
+    return lambda: SignalGenerator(frame).generate_signals()
+
+def case_strategy(args, workdir):
+    config = types.SimpleNamespace(max_position_size=0.1, stop_loss=0.02, take_profit=0.015)
+    strategy = ScalpingStrategy(config)
+    rng = np.random.default_rng(2)
+    prices = synthetic_candles(4096)[:, 4]
+    signals = rng.choice(['BUY', 'SELL', 'HOLD'], 4096, p=[0.2, 0.2, 0.6])
+    state = {'i': 0}
+
+    def op():
+        i = state['i'] = (state['i'] + 1) % len(prices)
+        return strategy.execute_strategy(signals[i], prices[i], 1e7, None)
+    return op
+
+def _db_case(async_writes):
+    def case(args, workdir):
+        db = DatabaseHandler(os.path.join(workdir, f'db_{async_writes}.db'), async_writes=async_writes)
+        state = {'i': 0}
+
+        def op():
+            state['i'] += 1
+            action = 'BUY' if state['i'] % 2 else 'SELL'
+            db.log_trade('btc_idr', action, 1e9 + state['i'], 0.001, action, 1e7, fee=3e3)
+        op.close = db.close
+        return op
+    return case
+
+def case_cycle(args, workdir):
+    """TradingBot in paper mode inside workdir, API replaced by the stub"""
+    import main
+    for directory in ('config', 'database'):
+        os.makedirs(os.path.join(workdir, directory), exist_ok=True)
+    pairs = [f'c{i}_idr' for i in range(args.pairs)]
+    with open(os.path.join(workdir, 'config', 'api_config.json'), 'w') as f:
+        json.dump({
+            'api_key': 'stub', 'secret_key': 'stub', 'pair': pairs[0], 'pairs': pairs,
+            'test_mode': True, 'initial_balance': 1e8, 'metrics_enabled': False,
+            'websocket_enabled': False, 'order_book_max_age': 0
+        }, f)
+    # The bot's paths are relative, stay in workdir until close()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    bot = main.TradingBot()
+    for handler in bot.logger.writer.handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setStream(io.StringIO())
+
+    per_candle = bot.config.timeframe_seconds // bot.candles.base_seconds
+    total = args.iterations + args.warmup + 10
+    api = StubIndodaxAPI(
+        pairs, bot.candles.base_seconds, args.candles * per_candle, total * per_candle, per_candle
+    )
+    bot.api = bot.candles.api = api
+    if bot.books is not None:
+        bot.books.api = api
+
+    def op():
+        api.advance()
+        bot.engine.run_cycle()
+
+    def close():
+        bot.engine.shutdown()
+        bot.db.close()
+        bot.journal.close()
+        bot.logger.close()
+        os.chdir(cwd)
+    op.close = close
+    return op
+
+CASES = {
+    'indicators': case_indicators,
+    'signals': case_signals,
+    'strategy': case_strategy,
+    'db_async': _db_case(True),
+    'db_sync': _db_case(False),
+    'cycle': case_cycle,
+}
+
+def _percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def measure(op, iterations, warmup, alloc_iterations):
+    for _ in range(warmup):
+        op()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    # Separate pass: tracemalloc slows calls down too much to time them
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            op()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        'p50_ms': _percentile(latencies, 50) * 1e3,
+        'p95_ms': _percentile(latencies, 95) * 1e3,
+        'p99_ms': _percentile(latencies, 99) * 1e3,
+        'mean_ms': sum(latencies) / len(latencies) * 1e3,
+        'peak_kib': _percentile(peaks, 50) / 1024,
+    }
+
+# Differences below these are timer/allocator noise for microsecond cases
+MIN_DELTA = {'p50_ms': 0.02, 'p95_ms': 0.05, 'peak_kib': 4.0}
+
+def compare(results, baseline, tolerance, alloc_tolerance):
+    """Regressions as (case, metric, baseline, now) tuples"""
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        for metric, limit in (('p50_ms', tolerance), ('p95_ms', tolerance),
+                              ('peak_kib', alloc_tolerance)):
+            allowed = max(base[metric] * limit, MIN_DELTA[metric])
+            if result[metric] > base[metric] + allowed:
+                regressions.append((case, metric, base[metric], result[metric]))
+    return regressions
+
+def _environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--candles', type=int, default=500, help="candles per pair")
+    parser.add_argument('--pairs', type=int, default=4)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--alloc-iterations', type=int, default=10)
+    parser.add_argument('--only', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3, help="allowed latency regression")
+    parser.add_argument('--alloc-tolerance', type=float, default=0.2, help="allowed memory regression")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in args.only:
+            op = CASES[name](args, workdir)
+            try:
+                results[name] = measure(op, args.iterations, args.warmup, args.alloc_iterations)
+            finally:
+                if hasattr(op, 'close'):
+                    op.close()
+
+    params = {key: getattr(args, key) for key in PARAMS}
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get('params') == params:
+            baseline = stored['results']
+        else:
+            print(f"baseline was recorded with {stored.get('params')}, not comparing")
+
+    print(f"{'case':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KiB':>10}{'p50 vs base':>13}")
+    for name, r in results.items():
+        delta = ''
+        if name in baseline:
+            delta = f"{(r['p50_ms'] / baseline[name]['p50_ms'] - 1) * 100:+.1f}%"
+        print(f"{name:<12}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['peak_kib']:>10.1f}{delta:>13}")
+
+    report = {'params': params, 'environment': _environment(), 'results': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            # Keep cases that were not run this time
+            with open(args.baseline) as f:
+                stored = json.load(f)
+            if stored.get('params') == params:
+                report['results'] = {**stored['results'], **results}
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.alloc_tolerance)
+    for case, metric, base, now in regressions:
+        print(f"REGRESSION {case} {metric}: {base:.3f} -> {now:.3f}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
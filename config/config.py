@@ -1,5 +1,6 @@
 import json
 import os
+from marketdata.resampler import timeframe_seconds
 
 class Config:
     def __init__(self):
@@ -8,21 +9,124 @@ class Config:
         
         # Trading parameters
         self.pair = self.config.get('pair', 'btc_idr')
-        self.timeframe = '5m'  # 5 minutes for scalping
+        self.pairs = self.config.get('pairs', [self.pair])
+        self.timeframe = self.config.get('timeframe', '5m')  # 5 minutes for scalping
+        self.timeframe_seconds = timeframe_seconds(self.timeframe)
+        # Only the base timeframe is fetched, the others are resampled from it
+        self.base_timeframe = self.config.get('base_timeframe', '1m')
+        self.trend_timeframe = self.config.get('trend_timeframe')  # e.g. '1h', None disables the filter
+        self.timeframes = [
+            tf for tf in dict.fromkeys([self.timeframe, self.trend_timeframe]) if tf
+        ]
         self.test_mode = self.config.get('test_mode', True)
         
         # Risk Management
-        self.max_position_size = 0.1  # 10% of balance per trade
-        self.stop_loss = 0.02  # 2%
-        self.take_profit = 0.015  # 1.5%
-        self.max_daily_loss = 0.05  # 5%
+        self.max_position_size = self.config.get('max_position_size', 0.1)  # 10% of balance per trade
+        self.stop_loss = self.config.get('stop_loss', 0.02)  # 2%
+        self.take_profit = self.config.get('take_profit', 0.015)  # 1.5%
+        self.max_daily_loss = self.config.get('max_daily_loss', 0.05)  # 5%
+        self.max_pair_exposure = self.config.get('max_pair_exposure', 0.2)  # of equity, per pair
+        self.max_gross_exposure = self.config.get('max_gross_exposure', 0.6)  # of equity, all pairs
+        self.max_correlated_exposure = self.config.get('max_correlated_exposure', 0.4)
+        self.correlation_threshold = self.config.get('correlation_threshold', 0.7)
         
         # Scalping parameters
-        self.rsi_period = 14
-        self.bb_period = 20
-        self.ma_fast = 9
-        self.ma_slow = 21
+        self.rsi_period = self.config.get('rsi_period', 14)
+        self.bb_period = self.config.get('bb_period', 20)
+        self.ma_fast = self.config.get('ma_fast', 9)
+        self.ma_slow = self.config.get('ma_slow', 21)
+        self.ma_trend = self.config.get('ma_trend', 50)
         
+        # Multi-pair engine
+        self.max_workers = self.config.get('max_workers', 8)
+        # Processes trading shards of the pairs, 0 runs everything in one
+        # process and 'auto' starts one per core
+        self.worker_processes = self.config.get('worker_processes', 0)
+        self.shard_poll_interval = self.config.get('shard_poll_interval', 0.05)  # seconds
+        
+        # Scheduling
+        self.candle_settle_delay = self.config.get('candle_settle_delay', 2.0)  # seconds after candle close
+        self.cycle_overrun_policy = self.config.get('cycle_overrun_policy', 'coalesce')  # or 'skip'
+        self.exit_check_interval = self.config.get('exit_check_interval', 5)  # seconds, SL/TP between cycles
+        self.db_flush_interval = self.config.get('db_flush_interval', 10)
+        self.reconcile_interval = self.config.get('reconcile_interval', 60)
+        
+        # HTTP transport
+        self.base_url = self.config.get('base_url', 'https://indodax.com')
+        self.public_rate_limit = self.config.get('public_rate_limit', 3)  # requests per second
+        self.private_rate_limit = self.config.get('private_rate_limit', 3)
+        self.api_burst = self.config.get('api_burst', 6)
+        self.connect_timeout = self.config.get('connect_timeout', 3.05)
+        self.read_timeout = self.config.get('read_timeout', 10)
+        self.max_retries = self.config.get('max_retries', 3)
+        
+        # Database
+        self.db_async_writes = self.config.get('db_async_writes', True)
+        self.history_dir = self.config.get('history_dir', 'database/history')
+        self.candle_buffer_size = self.config.get('candle_buffer_size', 500)
+        self.state_dir = self.config.get('state_dir', 'database/state')
+        self.state_sync = self.config.get('state_sync', True)  # fsync journal records
+        self.state_sync_interval = self.config.get('state_sync_interval', 0.05)  # group fsync window, 0 = per record
+        
+        # Websocket market data
+        self.websocket_enabled = self.config.get('websocket_enabled', False)
+        self.ws_url = self.config.get('ws_url', 'wss://ws3.indodax.com/ws/')
+        self.ws_token = self.config.get('ws_token')
+        self.ws_max_price_age = self.config.get('ws_max_price_age', 10.0)  # seconds, older uses REST
+        
+        # Trade tape: order flow votes from recent trades, streamed from the
+        # websocket feed when enabled, else polled every cycle
+        self.trade_tape_enabled = self.config.get('trade_tape_enabled', False)
+        self.trade_tape_window = self.config.get('trade_tape_window', 300)  # seconds
+        self.trade_tape_min_trades = self.config.get('trade_tape_min_trades', 20)  # before it votes
+        self.trade_tape_imbalance = self.config.get('trade_tape_imbalance', 0.3)  # buy/sell volume skew
+        self.trade_tape_large_multiple = self.config.get('trade_tape_large_multiple', 5.0)  # x average size
+        self.trade_tape_max_seen = self.config.get('trade_tape_max_seen', 5000)  # trade ids kept per pair
+        if self.trade_tape_enabled and self.worker_processes:
+            # The sharded runner (engine/sharded_runner.py) has no trade tape
+            raise ValueError(
+                f"trade_tape_enabled needs worker_processes 0, got {self.worker_processes!r}"
+            )
+        
+        # Order book
+        self.order_book_enabled = self.config.get('order_book_enabled', True)
+        self.order_book_max_age = self.config.get('order_book_max_age', 2.0)  # seconds
+        self.max_slippage = self.config.get('max_slippage', 0.002)  # 0.2% of best price
+        
+        # Exchange fees (fraction of notional), set to your volume tier
+        self.maker_fee = self.config.get('maker_fee', 0.001)
+        self.taker_fee = self.config.get('taker_fee', 0.003)
+        
+        # Live order execution
+        self.order_poll_interval = self.config.get('order_poll_interval', 1.0)  # seconds, > 1/private_rate_limit
+        self.order_stale_after = self.config.get('order_stale_after', 10.0)  # seconds before reprice
+        self.max_reprices = self.config.get('max_reprices', 3)
+        
+        # Metrics endpoint (local only by default)
+        self.metrics_enabled = self.config.get('metrics_enabled', True)
+        self.metrics_host = self.config.get('metrics_host', '127.0.0.1')
+        self.metrics_port = self.config.get('metrics_port', 9108)
+        
+        # Logging, written as JSON lines by a background thread
+        self.log_file = self.config.get('log_file', 'trading_log.log')
+        self.log_max_bytes = self.config.get('log_max_bytes', 10 * 1024 * 1024)  # rotate at 10 MB
+        self.log_backup_count = self.config.get('log_backup_count', 5)
+        self.log_rotate_daily = self.config.get('log_rotate_daily', True)
+        self.log_console = self.config.get('log_console', True)
+        self.log_flush_interval = self.config.get('log_flush_interval', 0.5)  # seconds between writes
+        self.log_error_burst = self.config.get('log_error_burst', 5)  # same error, logged at once
+        self.log_error_rate = self.config.get('log_error_rate', 0.2)  # per second after the burst
+        
+    def indicator_params(self):
+        """Indicator windows shared by TechnicalAnalysis and StreamingIndicators"""
+        return {
+            'ma_fast': self.ma_fast,
+            'ma_slow': self.ma_slow,
+            'ma_trend': self.ma_trend,
+            'rsi_period': self.rsi_period,
+            'bb_period': self.bb_period
+        }
+    
     def get_api_keys(self):
         return {
             'api_key': self.config['api_key'],
@@ -0,0 +1,257 @@
+import sqlite3
+from database.batch_writer import apply_pragmas
+
+# Indexes and aggregate tables on top of the trades table; safe to re-run
+SCHEMA = (
+    'CREATE INDEX IF NOT EXISTS idx_trades_pair_id ON trades (pair, id)',
+    'CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades (timestamp)',
+    '''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        pair TEXT,
+        day TEXT,
+        trades INTEGER,
+        wins INTEGER,
+        losses INTEGER,
+        volume REAL,
+        fees REAL,
+        profit_loss REAL,
+        PRIMARY KEY (pair, day)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_daily_stats_day ON daily_stats (day)',
+    '''
+    CREATE TABLE IF NOT EXISTS pair_positions (
+        pair TEXT PRIMARY KEY,
+        amount REAL,
+        cost REAL
+    )
+    ''',
+)
+
+# Columns added to trades tables created before analytics existed
+TRADE_COLUMNS = {'fee': 'REAL DEFAULT 0', 'cum_pnl': 'REAL'}
+
+UPSERT_DAILY = '''
+    INSERT INTO daily_stats (pair, day, trades, wins, losses, volume, fees, profit_loss)
+    VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+    ON CONFLICT (pair, day) DO UPDATE SET
+        trades = trades + 1,
+        wins = wins + excluded.wins,
+        losses = losses + excluded.losses,
+        volume = volume + excluded.volume,
+        fees = fees + excluded.fees,
+        profit_loss = profit_loss + excluded.profit_loss
+'''
+
+UPSERT_POSITION = '''
+    INSERT INTO pair_positions (pair, amount, cost) VALUES (?, ?, ?)
+    ON CONFLICT (pair) DO UPDATE SET amount = excluded.amount, cost = excluded.cost
+'''
+
+def create_analytics(conn):
+    """Add the analytics columns, indexes and aggregate tables
+
+    Aggregates are rebuilt from the trades once, when an existing
+    database gets them for the first time.
+    """
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(trades)')}
+    for name, kind in TRADE_COLUMNS.items():
+        if name not in columns:
+            conn.execute(f'ALTER TABLE trades ADD COLUMN {name} {kind}')
+    fresh = not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_stats'"
+    ).fetchone()
+    for statement in SCHEMA:
+        conn.execute(statement)
+    if fresh and conn.execute('SELECT 1 FROM trades LIMIT 1').fetchone():
+        rebuild(conn)
+    conn.commit()
+
+def rebuild(conn):
+    """Recompute profit_loss, cum_pnl and the aggregates from all trades"""
+    tracker = PnLTracker()
+    conn.execute('DELETE FROM daily_stats')
+    conn.execute('DELETE FROM pair_positions')
+    rows = conn.execute(
+        'SELECT id, timestamp, pair, action, price, amount, COALESCE(fee, 0) '
+        'FROM trades ORDER BY id'
+    ).fetchall()
+    updates = []
+    for trade_id, timestamp, pair, action, price, amount, fee in rows:
+        profit_loss, cum_pnl, daily, position = tracker.record(
+            str(timestamp)[:10], pair, action, price, amount, fee
+        )
+        updates.append((profit_loss, cum_pnl, trade_id))
+        conn.execute(UPSERT_DAILY, daily)
+    conn.executemany('UPDATE trades SET profit_loss = ?, cum_pnl = ? WHERE id = ?', updates)
+    for pair in tracker.positions:
+        conn.execute(UPSERT_POSITION, tracker.position_row(pair))
+
+class PnLTracker:
+    """Average-cost PnL per pair, computed when a trade is written
+
+    Buys add to the position at cost (fees included); a sell realizes
+    proceeds minus the average cost of the amount sold. Only the part of
+    a sell covered by the tracked position books PnL: coins bought
+    outside the bot (or before the trades table) have no known cost, so
+    a sell of them books zero and is not counted as a win or a loss.
+    record() returns the values for the trade row and the
+    daily_stats/pair_positions upserts, so all three are written
+    together; save()/restore() undo a record whose write failed.
+    """
+
+    def __init__(self, positions=None, cum_pnl=0.0):
+        self.positions = positions or {}  # pair -> [amount, cost]
+        self.cum_pnl = cum_pnl
+
+    @classmethod
+    def load(cls, conn):
+        positions = {
+            pair: [amount, cost]
+            for pair, amount, cost in conn.execute('SELECT pair, amount, cost FROM pair_positions')
+        }
+        row = conn.execute(
+            'SELECT cum_pnl FROM trades WHERE cum_pnl IS NOT NULL ORDER BY id DESC LIMIT 1'
+        ).fetchone()
+        return cls(positions, row[0] if row else 0.0)
+
+    def held(self, pair):
+        """Tracked amount of the pair's coin"""
+        position = self.positions.get(pair)
+        return position[0] if position else 0.0
+
+    def save(self, pair):
+        position = self.positions.get(pair)
+        return (list(position) if position else None), self.cum_pnl
+
+    def restore(self, pair, saved):
+        position, self.cum_pnl = saved
+        if position is None:
+            self.positions.pop(pair, None)
+        else:
+            self.positions[pair] = position
+
+    def record(self, day, pair, action, price, amount, fee=0.0):
+        position = self.positions.setdefault(pair, [0.0, 0.0])
+        total = price * amount
+        profit_loss = None
+        wins = losses = 0
+        if action == 'BUY':
+            position[0] += amount
+            position[1] += total + fee
+        else:
+            sold = min(amount, position[0])
+            released = position[1] * sold / position[0] if position[0] else 0.0
+            # Proceeds of the tracked part only
+            profit_loss = (total - fee) * sold / amount - released if amount else 0.0
+            position[0] -= sold
+            position[1] -= released
+            if position[0] <= 1e-12:
+                position[0] = position[1] = 0.0
+            self.cum_pnl += profit_loss
+            if sold:
+                wins = int(profit_loss > 0)
+                losses = 1 - wins
+        daily = (pair, day, wins, losses, total, fee, profit_loss or 0.0)
+        return profit_loss, self.cum_pnl, daily, self.position_row(pair)
+
+    def position_row(self, pair):
+        amount, cost = self.positions[pair]
+        return (pair, amount, cost)
+
+class TradeAnalytics:
+    """Parameterized, paginated queries over trades and daily_stats
+
+    Per-pair and per-day figures come from the incrementally maintained
+    daily_stats table and curves page through trades by id on the
+    (pair, id) index, so every query touches only the rows it returns.
+    Opens its own read connection, which WAL lets run next to the writer.
+    """
+
+    def __init__(self, db_path='database/trades.db'):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        apply_pragmas(self.conn)
+
+    def _rows(self, sql, params):
+        cursor = self.conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _where(pair=None, start=None, end=None, column='day'):
+        clauses, params = [], []
+        if pair is not None:
+            clauses.append('pair = ?')
+            params.append(pair)
+        if start is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append(f'{column} < ?')
+            params.append(end)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def trades(self, pair=None, before_id=None, limit=100):
+        """Newest trades first; pass the last id as before_id for the next page"""
+        where, params = self._where(pair)
+        if before_id is not None:
+            where += (' AND ' if where else ' WHERE ') + 'id < ?'
+            params.append(before_id)
+        return self._rows(
+            f'SELECT * FROM trades{where} ORDER BY id DESC LIMIT ?', params + [limit]
+        )
+
+    def equity_curve(self, pair=None, after_id=None, limit=1000):
+        """(id, timestamp, balance, profit_loss, cum_pnl) oldest first, by page
+
+        Pass the last id as after_id for the next page. With a pair,
+        cum_pnl is still the account-wide running total.
+        """
+        where, params = self._where(pair)
+        if after_id is not None:
+            where += (' AND ' if where else ' WHERE ') + 'id > ?'
+            params.append(after_id)
+        return self._rows(
+            f'SELECT id, timestamp, pair, balance, profit_loss, cum_pnl FROM trades{where} '
+            'ORDER BY id LIMIT ?', params + [limit]
+        )
+
+    def daily(self, pair=None, start_day=None, end_day=None, limit=100, offset=0):
+        """Per-day totals across pairs (or for one pair), newest first"""
+        where, params = self._where(pair, start_day, end_day)
+        return self._rows(
+            'SELECT day, SUM(trades) AS trades, SUM(wins) AS wins, SUM(losses) AS losses, '
+            'SUM(volume) AS volume, SUM(fees) AS fees, SUM(profit_loss) AS profit_loss '
+            f'FROM daily_stats{where} GROUP BY day ORDER BY day DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+
+    def pair_pnl(self, start_day=None, end_day=None, limit=100, offset=0):
+        """Realized PnL, volume and fees per pair, best first"""
+        where, params = self._where(None, start_day, end_day)
+        return self._rows(
+            'SELECT pair, SUM(trades) AS trades, SUM(volume) AS volume, SUM(fees) AS fees, '
+            f'SUM(profit_loss) AS profit_loss FROM daily_stats{where} '
+            'GROUP BY pair ORDER BY profit_loss DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+
+    def win_rate(self, pair=None, start_day=None, end_day=None):
+        """Fraction of closing trades with a profit (None without any)"""
+        where, params = self._where(pair, start_day, end_day)
+        wins, losses = self.conn.execute(
+            f'SELECT SUM(wins), SUM(losses) FROM daily_stats{where}', params
+        ).fetchone()
+        closed = (wins or 0) + (losses or 0)
+        return wins / closed if closed else None
+
+    def fee_totals(self, pair=None, start_day=None, end_day=None):
+        """Fees paid and traded volume (IDR)"""
+        where, params = self._where(pair, start_day, end_day)
+        fees, volume = self.conn.execute(
+            f'SELECT SUM(fees), SUM(volume) FROM daily_stats{where}', params
+        ).fetchone()
+        return {'fees': fees or 0.0, 'volume': volume or 0.0}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,237 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from utils.metrics import REGISTRY
+
+DB_BATCH_SECONDS = REGISTRY.histogram(
+    'db_batch_write_seconds', 'Time to write and commit one batch'
+)
+DB_QUEUE_DEPTH = REGISTRY.gauge('db_write_queue_depth', 'Rows waiting for the writer')
+DB_ROWS = REGISTRY.counter('db_rows_written_total', 'Rows committed by the writer')
+DB_DROPPED = REGISTRY.counter('db_rows_dropped_total', 'Droppable rows discarded on a full queue')
+DB_ERRORS = REGISTRY.counter('db_write_errors_total', 'Batches that failed to commit')
+
+WAL_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA wal_autocheckpoint=1000',
+)
+
+def apply_pragmas(conn):
+    """WAL mode with tuned pragmas, shared by every connection to the db"""
+    for pragma in WAL_PRAGMAS:
+        conn.execute(pragma)
+
+# Queue entry whose params are several (sql, params) rows written together
+GROUP = object()
+
+def _is_transient(error):
+    """Lock contention, worth retrying the same batch"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.ok = False
+
+class BatchWriter:
+    """Write-behind SQLite writer running on a background thread
+
+    Rows are queued by the trading thread and written by the writer thread
+    with executemany inside one transaction, flushed when batch_size rows
+    are pending or flush_interval seconds have passed. The writer owns its
+    own connection, so callers never wait on disk I/O.
+
+    A batch that fails on lock contention is retried; any other error
+    falls back to one transaction per row (or group), so one bad row
+    doesn't take the rest with it. Rows that still fail are kept and
+    retried with later batches unless they were queued as droppable;
+    after max_attempts they are appended to `<db_path>.failed` as JSON
+    lines rather than lost, and on_failed(rows) is called with them from
+    the writer thread so the caller can resync state derived from them.
+    """
+
+    def __init__(self, db_path, batch_size=500, flush_interval=1.0, max_queue=10000,
+                 retries=3, max_attempts=5, on_failed=None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.max_attempts = max_attempts
+        self.on_failed = on_failed
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rows_written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.retained = []  # [rows, droppable, attempts] that failed to commit
+        self.closed = False
+        DB_QUEUE_DEPTH.set_function(self.pending)
+        self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, sql, params, droppable=False):
+        """Queue one row; droppable rows are discarded instead of waiting when full"""
+        if self.closed:
+            raise RuntimeError("BatchWriter is closed")
+        if droppable:
+            try:
+                self.queue.put_nowait((sql, params, True))
+            except queue.Full:
+                self.dropped += 1
+                DB_DROPPED.inc()
+        else:
+            self.queue.put((sql, params, False))
+
+    def submit_group(self, items):
+        """Queue (sql, params) rows that must be committed in the same batch"""
+        if self.closed:
+            raise RuntimeError("BatchWriter is closed")
+        self.queue.put((GROUP, list(items), False))
+
+    def pending(self):
+        return self.queue.qsize() + len(self.retained)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is written
+
+        False on timeout, when rows failed to commit, or once closed with
+        the writer still running.
+        """
+        if self.closed:
+            # Nobody reads the queue any more
+            return not self.thread.is_alive() and not self.retained
+        waiter = _Waiter()
+        self.queue.put((None, waiter, False))
+        return waiter.event.wait(timeout) and waiter.ok
+
+    def close(self, timeout=10):
+        """Flush remaining rows and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put((None, None, False))
+        self.thread.join(timeout)
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path)
+        apply_pragmas(conn)
+        batch = []  # [rows, droppable, attempts] units
+        size = 0
+        waiters = []
+        stop = False
+        deadline = time.monotonic() + self.flush_interval
+
+        def take(item):
+            nonlocal size, stop
+            sql, params, droppable = item
+            if sql is None:
+                if params is None:
+                    stop = True
+                else:
+                    waiters.append(params)
+                return False
+            rows = params if sql is GROUP else [(sql, params)]
+            batch.append([rows, droppable, 0])
+            size += len(rows)
+            return True
+
+        while not stop:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                take(self.queue.get(timeout=timeout))
+                # Drain whatever else is already queued without waiting
+                while size < self.batch_size and take(self.queue.get_nowait()):
+                    pass
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if (batch or self.retained) and (size >= self.batch_size or now >= deadline
+                                             or waiters or stop):
+                self.retained = self._write(conn, self.retained + batch, final=stop)
+                batch = []
+                size = 0
+            if now >= deadline or not batch:
+                deadline = now + self.flush_interval
+            for waiter in waiters:
+                waiter.ok = not self.retained
+                waiter.event.set()
+            waiters = []
+
+        conn.close()
+
+    def _commit(self, conn, rows):
+        # Group consecutive rows with the same statement for executemany
+        groups = []
+        for sql, params in rows:
+            if groups and groups[-1][0] == sql:
+                groups[-1][1].append(params)
+            else:
+                groups.append((sql, [params]))
+        with conn:
+            for sql, params in groups:
+                conn.executemany(sql, params)
+
+    def _write(self, conn, units, final=False):
+        """Commit units of rows, return the ones kept for another attempt"""
+        start = time.perf_counter()
+        rows = [row for unit in units for row in unit[0]]
+        for attempt in range(self.retries + 1):
+            try:
+                self._commit(conn, rows)
+                self.batches += 1
+                self._written(len(rows))
+                DB_BATCH_SECONDS.observe(time.perf_counter() - start)
+                return []
+            except sqlite3.Error as e:
+                self.last_error = e
+                if not _is_transient(e) or attempt == self.retries:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+        self.errors += 1
+        DB_ERRORS.inc()
+
+        # Row by row (groups stay together), so only the bad ones fail
+        kept = []
+        failed = []
+        for unit in units:
+            try:
+                self._commit(conn, unit[0])
+                self._written(len(unit[0]))
+            except sqlite3.Error as e:
+                self.last_error = e
+                unit[2] += 1
+                if unit[1]:
+                    self.dropped += len(unit[0])
+                    DB_DROPPED.inc(len(unit[0]))
+                elif final or unit[2] >= self.max_attempts:
+                    failed.append(unit)
+                else:
+                    kept.append(unit)
+        if failed:
+            self._dead_letter(failed)
+            if self.on_failed is not None:
+                try:
+                    self.on_failed([row for unit in failed for row in unit[0]])
+                except Exception as e:
+                    self.last_error = e
+        DB_BATCH_SECONDS.observe(time.perf_counter() - start)
+        return kept
+
+    def _written(self, count):
+        self.rows_written += count
+        DB_ROWS.inc(count)
+
+    def _dead_letter(self, units):
+        with open(f"{self.db_path}.failed", 'a') as f:
+            for rows, _, attempts in units:
+                f.write(json.dumps({
+                    'error': str(self.last_error), 'attempts': attempts, 'rows': rows
+                }, default=str) + '\n')
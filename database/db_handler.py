@@ -1,12 +1,55 @@
+import os
 import sqlite3
-import pandas as pd
+import threading
 from datetime import datetime
+from database.batch_writer import BatchWriter, apply_pragmas
+from database.analytics import (
+    PnLTracker, create_analytics, rebuild, UPSERT_DAILY, UPSERT_POSITION
+)
+
+INSERT_TRADE = '''
+    INSERT INTO trades 
+    (timestamp, pair, action, price, amount, total, signal, fee, profit_loss, cum_pnl, balance)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_MARKET_DATA = '''
+    INSERT OR REPLACE INTO market_data 
+    (timestamp, pair, open, high, low, close, volume, rsi, macd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
 class DatabaseHandler:
-    def __init__(self, db_path='database/trades.db'):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path='database/trades.db', async_writes=True,
+                 batch_size=500, flush_interval=1.0, logger=None):
+        # Shared by the multi-pair engine threads, access is serialized
+        self.db_path = db_path
+        self.logger = logger
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        apply_pragmas(self.conn)
         self.create_tables()
         
+        # Writes go through a background batch writer unless disabled
+        self.writer = None
+        if async_writes:
+            self.writer = BatchWriter(
+                db_path, batch_size=batch_size, flush_interval=flush_interval,
+                on_failed=self._on_write_failed
+            )
+        
+        # Realized PnL per trade, computed before the row is queued. A
+        # trade the writer gave up on leaves positions/cum_pnl ahead of
+        # the trades table; the marker file makes the next trade (or the
+        # next start, if there is none) rebuild them from the table.
+        self.resync_path = f"{db_path}.resync"
+        self.pnl_lock = threading.Lock()
+        self.pnl_stale = os.path.exists(self.resync_path)
+        if self.pnl_stale:
+            self._resync_pnl()
+        else:
+            self.pnl = PnLTracker.load(self.conn)
+        
     def create_tables(self):
         """Create necessary tables"""
         cursor = self.conn.cursor()
@@ -23,7 +66,9 @@ class DatabaseHandler:
                 total REAL,
                 signal TEXT,
                 profit_loss REAL,
-                balance REAL
+                balance REAL,
+                fee REAL DEFAULT 0,
+                cum_pnl REAL
             )
         ''')
         
@@ -45,28 +90,82 @@ class DatabaseHandler:
         
         self.conn.commit()
         
-    def log_trade(self, pair, action, price, amount, signal, balance):
-        """Log trade to database"""
-        cursor = self.conn.cursor()
+        # Indexes, daily/pair aggregates and positions for analytics
+        create_analytics(self.conn)
+        
+    def _write(self, sql, params, droppable=False):
+        if self.writer is not None:
+            self.writer.submit(sql, params, droppable)
+            return
+        with self.lock:
+            self.conn.execute(sql, params)
+            self.conn.commit()
+        
+    def _write_group(self, items):
+        if self.writer is not None:
+            self.writer.submit_group(items)
+            return
+        with self.lock:
+            with self.conn:
+                for sql, params in items:
+                    self.conn.execute(sql, params)
+        
+    def log_trade(self, pair, action, price, amount, signal, balance, fee=0.0):
+        """Log trade to database with its realized PnL (fee in IDR)"""
         total = price * amount
+        timestamp = datetime.now()
+        with self.pnl_lock:
+            if self.pnl_stale:
+                self._resync_pnl()
+            held = self.pnl.held(pair)
+            if action == 'SELL' and amount > held * (1 + 1e-9) and self.logger is not None:
+                self.logger.logger.warning(
+                    f"{pair}: SELL of {amount} with {held} tracked, PnL booked on {held} only",
+                    extra={'event': 'untracked_sell', 'pair': pair, 'amount': amount, 'held': held}
+                )
+            # Queued in PnL order, the aggregates commit with the trade
+            saved = self.pnl.save(pair)
+            profit_loss, cum_pnl, daily, position = self.pnl.record(
+                timestamp.strftime('%Y-%m-%d'), pair, action, price, amount, fee
+            )
+            try:
+                self._write_group([
+                    (INSERT_TRADE, (timestamp, pair, action, price, amount, total,
+                                    signal, fee, profit_loss, cum_pnl, balance)),
+                    (UPSERT_DAILY, daily),
+                    (UPSERT_POSITION, position)
+                ])
+            except Exception:
+                # Not written, so not counted either
+                self.pnl.restore(pair, saved)
+                raise
         
-        cursor.execute('''
-            INSERT INTO trades 
-            (timestamp, pair, action, price, amount, total, signal, balance)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (datetime.now(), pair, action, price, amount, total, signal, balance))
+    def _on_write_failed(self, rows):
+        """BatchWriter gave up on rows (writer thread)"""
+        if any(sql == INSERT_TRADE for sql, _ in rows):
+            open(self.resync_path, 'a').close()
+            self.pnl_stale = True
         
-        self.conn.commit()
+    def _resync_pnl(self):
+        """Rebuild PnL, positions and aggregates from the trades table"""
+        if self.writer is not None:
+            self.writer.flush()
+        with self.lock:
+            with self.conn:
+                rebuild(self.conn)
+            self.pnl = PnLTracker.load(self.conn)
+        if os.path.exists(self.resync_path):
+            os.remove(self.resync_path)
+        self.pnl_stale = False
+        if self.logger is not None:
+            self.logger.logger.warning(
+                "Rebuilt PnL from the trades table after a failed trade write",
+                extra={'event': 'pnl_resync'}
+            )
         
     def log_market_data(self, pair, ohlcv_data, indicators):
         """Log market data to database"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO market_data 
-            (timestamp, pair, open, high, low, close, volume, rsi, macd)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        self._write(INSERT_MARKET_DATA, (
             datetime.fromtimestamp(ohlcv_data['t']/1000),
             pair,
             ohlcv_data['o'],
@@ -76,11 +175,31 @@ class DatabaseHandler:
             ohlcv_data['v'],
             indicators.get('rsi', 0),
             indicators.get('macd', 0)
-        ))
+        ), droppable=True)
         
-        self.conn.commit()
+    def flush(self):
+        """Wait until queued writes are committed, False if some failed"""
+        if self.writer is not None:
+            return self.writer.flush()
+        return True
+        
+    def get_trade_history(self, limit=100, pair=None):
+        """Get the newest trades (see TradeAnalytics for paging and stats)"""
+        self.flush()
+        query = "SELECT * FROM trades"
+        params = []
+        if pair is not None:
+            query += " WHERE pair = ?"
+            params.append(pair)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(int(limit))
+        import pandas as pd
+        with self.lock:
+            return pd.read_sql_query(query, self.conn, params=params)
         
-    def get_trade_history(self, limit=100):
-        """Get trade history"""
-        query = f"SELECT * FROM trades ORDER BY timestamp DESC LIMIT {limit}"
-        return pd.read_sql_query(query, self.conn)
\ No newline at end of file
+    def close(self):
+        """Flush pending writes and close connections"""
+        if self.writer is not None:
+            self.writer.close()
+        with self.lock:
+            self.conn.close()
\ No newline at end of file
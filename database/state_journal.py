@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+class StateJournal:
+    """Append-only journal of strategy/position state with snapshots
+
+    Every record(key, state) appends one JSON line with an increasing
+    sequence number to journal.log and flushes it to the OS, so a crash
+    of the bot loses nothing. Every snapshot_every records the latest
+    state of all keys is written atomically to snapshot.json and the log
+    is started again. load() reads the snapshot and replays the newer log
+    lines; a line torn by a crash mid-write is cut off the log before
+    appending again, so a restart gets the last complete state of every
+    key.
+
+    With sync=True the log is also fsynced against power loss, as a
+    group commit: a background thread fsyncs at most every sync_interval
+    seconds, covering every record since the last one, and outside the
+    journal lock. record() is called under the bots' balance_lock
+    (strategy save(), RiskEngine.on_fill), where waiting on the disk for
+    every record would stall ticks and cycles; the price is that a power
+    cut can lose the last sync_interval of records. sync_interval=0
+    fsyncs inside every record() instead.
+    """
+
+    def __init__(self, directory='database/state', snapshot_every=1000, sync=True,
+                 sync_interval=0.05):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.log_path = os.path.join(directory, 'journal.log')
+        self.snapshot_path = os.path.join(directory, 'snapshot.json')
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.states = {}
+        self.seq = 0
+        self.since_snapshot = 0
+        self.log_end = 0
+        self.load()
+        self._truncate_torn_tail()
+        self.log = open(self.log_path, 'a', encoding='utf-8')
+        self.dirty = False  # records not fsynced yet
+        self.closed = False
+        self.wakeup = threading.Event()
+        self.syncer = None
+        if sync and sync_interval > 0:
+            self.syncer = threading.Thread(target=self._sync_loop, name='journal-sync', daemon=True)
+            self.syncer.start()
+
+    def load(self):
+        """Rebuild {key: state} from the snapshot and the log"""
+        states = {}
+        seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            states = snapshot['states']
+            seq = snapshot['seq']
+
+        replayed = 0
+        end = 0  # bytes up to the last complete line
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # torn write at the end
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    end += len(line)
+                    if entry['seq'] <= seq:
+                        continue  # already in the snapshot
+                    states[entry['key']] = entry['state']
+                    seq = entry['seq']
+                    replayed += 1
+
+        self.states = states
+        self.seq = seq
+        self.since_snapshot = replayed
+        self.log_end = end
+        return dict(states)
+
+    def _truncate_torn_tail(self):
+        # Appending after a torn fragment would glue the next record onto
+        # it and load() would stop there, losing everything after
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self.log_end:
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(self.log_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get(self, key, default=None):
+        return self.states.get(key, default)
+
+    def record(self, key, state):
+        """Append the new state of one key; fsynced within sync_interval"""
+        with self.lock:
+            self.seq += 1
+            line = json.dumps(
+                {'seq': self.seq, 'time': time.time(), 'key': key, 'state': state},
+                separators=(',', ':')
+            )
+            self.log.write(line + '\n')
+            self.log.flush()
+            if self.syncer is not None:
+                self.dirty = True
+                self.wakeup.set()
+            elif self.sync:
+                os.fsync(self.log.fileno())
+            self.states[key] = state
+            self.since_snapshot += 1
+            if self.since_snapshot >= self.snapshot_every:
+                self._snapshot()
+
+    def _sync_loop(self):
+        while not self.closed:
+            self.wakeup.wait()
+            # Let the records of the next few ms share this fsync
+            time.sleep(self.sync_interval)
+            with self.lock:
+                self.wakeup.clear()
+                if not self.dirty or self.closed:
+                    continue
+                self.dirty = False
+                fd = os.dup(self.log.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def snapshot(self):
+        with self.lock:
+            self._snapshot()
+
+    def _snapshot(self):
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'seq': self.seq, 'states': self.states}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Lines up to seq are covered by the snapshot; a crash before the
+        # truncate only leaves lines that load() skips
+        self.log.close()
+        self.log = open(self.log_path, 'w', encoding='utf-8')
+        self.since_snapshot = 0
+        self.dirty = False
+
+    def close(self):
+        if self.syncer is not None:
+            self.closed = True
+            self.wakeup.set()
+            self.syncer.join()
+        with self.lock:
+            self.closed = True
+            if self.since_snapshot:
+                self._snapshot()
+            self.log.close()
@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import REGISTRY
+
+PAIR_CYCLE_SECONDS = REGISTRY.histogram(
+    'pair_cycle_seconds', 'Duration of one trading cycle for one pair'
+)
+PAIR_CYCLE_ERRORS = REGISTRY.counter(
+    'pair_cycle_errors_total', 'Pair cycles that raised'
+)
+CYCLE_SECONDS = REGISTRY.histogram(
+    'cycle_seconds', 'Duration of one trading cycle across all pairs'
+)
+CYCLE_OVERRUNS = REGISTRY.counter(
+    'cycle_overruns_total', 'Cycles that took longer than the candle'
+)
+
+class MultiPairEngine:
+    """Run TradingBot cycles for all configured pairs concurrently
+
+    Network calls dominate a cycle, so pairs share one thread pool and the
+    IndodaxAPI rate limiter; each pair keeps its own strategy state inside
+    the bot.
+    """
+
+    def __init__(self, bot, pairs, max_workers=8):
+        self.bot = bot
+        self.pairs = list(pairs)
+        self.max_workers = max(1, min(max_workers, len(self.pairs)))
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='pair'
+        )
+        self.last_cycle_seconds = 0.0
+
+    def _run_pair(self, pair):
+        start = time.perf_counter()
+        try:
+            self.bot.execute_trading_cycle(pair)
+        except Exception as e:
+            PAIR_CYCLE_ERRORS.inc(pair=pair)
+            self.bot.logger.log_error(f"Error in {pair} cycle: {e}", pair=pair, stage='cycle')
+        PAIR_CYCLE_SECONDS.observe(time.perf_counter() - start, pair=pair)
+
+    def run_cycle(self, window_seconds=None):
+        """Execute one trading cycle for every pair and wait for all of them"""
+        start = time.perf_counter()
+        futures = [self.executor.submit(self._run_pair, pair) for pair in self.pairs]
+        for future in futures:
+            future.result()
+        self.last_cycle_seconds = time.perf_counter() - start
+        CYCLE_SECONDS.observe(self.last_cycle_seconds)
+
+        if window_seconds and self.last_cycle_seconds > window_seconds:
+            CYCLE_OVERRUNS.inc()
+            self.bot.logger.log_error(
+                f"Cycle for {len(self.pairs)} pairs took "
+                f"{self.last_cycle_seconds:.1f}s, longer than the {window_seconds}s candle",
+                stage='cycle', latency_ms=round(self.last_cycle_seconds * 1e3, 3)
+            )
+        return self.last_cycle_seconds
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
\ No newline at end of file
@@ -0,0 +1,595 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.config import Config
+from database.db_handler import DatabaseHandler
+from database.state_journal import StateJournal
+from exchange.indodax_api import IndodaxAPI
+from exchange.transport import HttpTransport
+from execution.order_manager import OrderManager
+from indicators.streaming_indicators import StreamingIndicators
+from indicators.signal_generator import SignalGenerator
+from strategies.scalping_strategy import ScalpingStrategy
+from marketdata.candle_cache import CandleCache
+from marketdata.history_store import HistoryStore
+from marketdata.order_book import OrderBooks, limit_price
+from marketdata.shared_state import SharedMarketState, CYCLE, TICKS
+from marketdata.websocket_feed import MarketDataFeed
+from risk.risk_engine import RiskEngine
+from utils.logger import TradingLogger
+from utils.metrics import REGISTRY, MetricsServer
+from utils.scheduler import Scheduler
+
+PROCESS_RESTARTS = REGISTRY.counter(
+    'process_restarts_total', 'Runner processes restarted after they died, by role'
+)
+
+def shard(pairs, shards):
+    """Split pairs round-robin over at most `shards` non-empty shards"""
+    return [pairs[i::shards] for i in range(min(shards, len(pairs)))]
+
+def worker_count(config):
+    """Worker processes to run: worker_processes, or one per core for 'auto'"""
+    processes = config.worker_processes
+    if processes == 'auto':
+        processes = os.cpu_count() or 1
+    return max(1, min(int(processes), len(config.pairs)))
+
+def _api(config):
+    api_keys = config.get_api_keys()
+    transport = HttpTransport(
+        public_rate=config.public_rate_limit,
+        private_rate=config.private_rate_limit,
+        burst=config.api_burst,
+        timeout=(config.connect_timeout, config.read_timeout),
+        max_retries=config.max_retries,
+        pool_size=max(10, config.max_workers * 2)
+    )
+    return IndodaxAPI(api_keys['api_key'], api_keys['secret_key'], transport, config.base_url)
+
+def _logger(config, role):
+    # One file per process, rotation isn't safe across processes
+    root, ext = os.path.splitext(config.log_file)
+    return TradingLogger.from_config(config, log_file=f"{root}.{role}{ext}")
+
+class MarketDataPublisher:
+    """Fetch candles and tickers for every pair into the shared state
+
+    Runs the CandleCache/HistoryStore of the single-process bot on the
+    candle grid, then bumps CYCLE so the workers analyze the new candles;
+    tickers (REST, or every trade from the websocket feed) bump TICKS
+    for the SL/TP checks in between.
+    """
+
+    def __init__(self, config, state, logger):
+        self.config = config
+        self.state = state
+        self.logger = logger
+        self.api = _api(config)
+        self.candles = CandleCache(
+            self.api,
+            HistoryStore(config.history_dir),
+            config.base_timeframe,
+            config.timeframes,
+            capacity=config.candle_buffer_size,
+            warmup=max(config.indicator_params().values())
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, min(config.max_workers, len(config.pairs))),
+            thread_name_prefix='fetch'
+        )
+        self.feed = None
+        if config.websocket_enabled:
+            self.feed = MarketDataFeed(
+                self.api, config.pairs, url=config.ws_url, token=config.ws_token,
+                max_price_age=config.ws_max_price_age, logger=self.logger
+            )
+            self.feed.add_listener(self.on_tick)
+
+    def _fetch(self, pair):
+        try:
+            updates = self.candles.refresh(pair)
+            for timeframe in self.config.timeframes:
+                if updates.get(timeframe):
+                    self.state.publish(pair, timeframe, updates[timeframe])
+            self._ticker(pair)
+        except Exception as e:
+            self.logger.log_error(f"Error fetching market data for {pair}: {e}", pair=pair, stage='fetch')
+
+    def _ticker(self, pair):
+        price = self.feed.last_price(pair) if self.feed else None
+        if price is None:
+            price = float(self.api.get_ticker(pair)['ticker']['last'])
+        self.state.set_ticker(pair, price)
+
+    def publish_cycle(self):
+        start = time.perf_counter()
+        list(self.executor.map(self._fetch, self.config.pairs))
+        self.state.bump(CYCLE)
+        self.logger.logger.info(
+            f"Published {len(self.config.pairs)} pairs in {time.perf_counter() - start:.2f}s",
+            extra={'stage': 'publish', 'latency_ms': round((time.perf_counter() - start) * 1e3, 3)}
+        )
+
+    def publish_tickers(self):
+        for pair in self.config.pairs:
+            try:
+                self._ticker(pair)
+            except Exception as e:
+                self.logger.log_error(f"Error fetching ticker for {pair}: {e}", pair=pair, stage='price')
+        self.state.bump(TICKS)
+
+    def on_tick(self, pair, price, trade):
+        self.state.set_ticker(pair, price)
+        self.state.bump(TICKS)
+
+    def run(self):
+        scheduler = Scheduler(logger=self.logger)
+        scheduler.every(
+            'publish', self.config.timeframe_seconds, self.publish_cycle,
+            offset=self.config.candle_settle_delay,
+            policy=self.config.cycle_overrun_policy
+        )
+        if self.feed is not None:
+            self.feed.start()
+        else:
+            scheduler.every('tickers', self.config.exit_check_interval, self.publish_tickers)
+        self.publish_cycle()
+        scheduler.start()
+        while not self.state.wait_stop(1.0):
+            pass
+        scheduler.stop()
+        if self.feed is not None:
+            self.feed.stop()
+        self.executor.shutdown()
+
+class GatewayJournal:
+    """StateJournal stand-in for workers: the gateway owns the real journal"""
+
+    def __init__(self, requests, states):
+        self.requests = requests
+        self.states = states
+
+    def get(self, key, default=None):
+        return self.states.get(key, default)
+
+    def record(self, key, state):
+        self.states[key] = state
+        self.requests.put(('state', key, state))
+
+class ShardWorker:
+    """Signals and strategy state for one shard of pairs
+
+    Reads candles and tickers from the shared state, keeps the same
+    StreamingIndicators/ScalpingStrategy per pair as TradingBot and sends
+    orders to the gateway. Position state lives in the gateway's journal:
+    a (re)started worker asks for it and rebuilds its indicators from the
+    full candle rings.
+    """
+
+    def __init__(self, config, index, pairs, state, requests, replies, logger):
+        self.config = config
+        self.index = index
+        self.pairs = pairs
+        self.state = state
+        self.requests = requests
+        self.replies = replies
+        self.logger = logger
+
+        # Positions come from the gateway's journal; anything older still
+        # queued for a previous run of this worker is superseded by it
+        requests.put(('hello', index, pairs))
+        kind = None
+        while kind != 'states':
+            kind, _, states = replies.get(timeout=60)
+        journal = GatewayJournal(requests, states)
+        self.strategies = {
+            pair: ScalpingStrategy(config, journal, pair) for pair in pairs
+        }
+        self.indicators = {
+            (pair, tf): StreamingIndicators(**config.indicator_params())
+            for pair in pairs for tf in config.timeframes
+        }
+        self.last_seen = dict.fromkeys(self.indicators)
+        self.trend_ready = {}
+        self.signals = SignalGenerator(
+            ma_fast=config.ma_fast, ma_slow=config.ma_slow, ma_trend=config.ma_trend
+        )
+
+    def _update(self, pair, timeframe):
+        key = (pair, timeframe)
+        rows = self.state.candles_since(pair, timeframe, self.last_seen[key])
+        indicators = self.indicators[key]
+        for row in rows:
+            indicators.update(*row)
+        if len(rows):
+            # The forming candle is read again next time
+            self.last_seen[key] = rows[-1, 0]
+        return indicators
+
+    def analyze(self, pair):
+        started = time.perf_counter()
+        indicators = self._update(pair, self.config.timeframe)
+        latest, previous = indicators.latest, indicators.previous
+        if previous is None:
+            return
+        signal = self.signals.generate_signals_from_rows(latest, previous)
+        if self.config.trend_timeframe:
+            trend = self._update(pair, self.config.trend_timeframe)
+            ready = self.signals.trend_ready(trend.latest)
+            if self.trend_ready.get(pair) != ready:
+                self.trend_ready[pair] = ready
+                self.logger.log_trend_filter(
+                    pair, self.config.trend_timeframe, ready,
+                    trend.buffer.size, self.config.ma_trend
+                )
+            signal = self.signals.apply_trend_filter(signal, trend.latest)
+
+        price = self.state.ticker(pair) or float(latest['close'])
+        action, amount = self.strategies[pair].execute_strategy(
+            signal, price, self.state.equity()
+        )
+        if action in ('BUY', 'SELL') and amount > 0:
+            self.requests.put(('order', pair, action, price, amount, signal))
+        self.logger.log_signal(signal, {'rsi': latest['RSI'], 'macd': latest['MACD']}, pair)
+        self.logger.log_cycle(
+            pair, price, signal, action, self.state.balance(),
+            (time.perf_counter() - started) * 1e3
+        )
+
+    def check_exits(self):
+        for pair, strategy in self.strategies.items():
+            price = self.state.ticker(pair)
+            if strategy.position is None or price is None:
+                continue
+            action, amount = strategy.check_exit(price)
+            if action == 'SELL' and amount > 0:
+                self.requests.put(('order', pair, action, price, amount, 'TICK'))
+
+    def apply_replies(self):
+        """Positions corrected by the gateway (partial, rejected or capped fills)"""
+        while True:
+            try:
+                kind, pair, state = self.replies.get_nowait()
+            except queue.Empty:
+                return
+            strategy = self.strategies.get(pair)
+            if kind == 'position' and strategy is not None:
+                strategy.journal.states[pair] = state
+                strategy.restore(state)
+
+    def run(self):
+        cycle = ticks = 0
+        while not self.state.stopping():
+            self.apply_replies()
+            if self.state.counter(CYCLE) != cycle:
+                cycle = self.state.counter(CYCLE)
+                ticks = self.state.counter(TICKS)
+                for pair in self.pairs:
+                    try:
+                        self.analyze(pair)
+                    except Exception as e:
+                        self.logger.log_error(
+                            f"Error in trading cycle for {pair}: {e}", pair=pair, stage='analyze'
+                        )
+            elif self.state.counter(TICKS) != ticks:
+                ticks = self.state.counter(TICKS)
+                self.check_exits()
+            self.state.wait_stop(self.config.shard_poll_interval)
+
+class Gateway:
+    """The only process placing orders and writing trades and state
+
+    Serializes every exchange write, DatabaseHandler access and journal
+    record behind one queue. Orders from the workers pass the RiskEngine
+    pre-trade check here and, with order_book_enabled, the same book
+    pricing and max_slippage cap as the single-process bot; when a fill
+    differs from what the worker's strategy assumed, the corrected
+    position is journaled and sent back.
+    """
+
+    def __init__(self, config, state, requests, replies, logger):
+        self.config = config
+        self.state = state
+        self.requests = requests
+        self.replies = replies
+        self.logger = logger
+        self.owners = {}  # pair -> index of the worker trading it
+        self.lock = threading.Lock()
+
+        self.db = DatabaseHandler(async_writes=config.db_async_writes, logger=logger)
+        self.journal = StateJournal(
+            config.state_dir, sync=config.state_sync, sync_interval=config.state_sync_interval
+        )
+        self.balance = config.config.get('initial_balance', 1000000)
+        if config.test_mode:
+            self.balance = self.journal.get('balance', {}).get('balance', self.balance)
+        self.risk = RiskEngine.from_config(config, self.balance, journal=self.journal)
+        for pair in config.pairs:
+            position = self.journal.get(pair) or {}
+            if position.get('position') == 'LONG':
+                self.risk.restore_position(pair, position['position_size'], position['entry_price'])
+
+        self.api = None
+        if not config.test_mode or config.order_book_enabled:
+            self.api = _api(config)
+        self.books = None
+        if config.order_book_enabled:
+            self.books = OrderBooks(self.api, config.pairs, config.order_book_max_age)
+        self.orders = None
+        if not config.test_mode:
+            self.orders = OrderManager(
+                self.api,
+                reprice=self.reprice_order,
+                on_done=self.on_order_done,
+                poll_interval=config.order_poll_interval,
+                stale_after=config.order_stale_after,
+                max_reprices=config.max_reprices
+            )
+
+    def _settle(self, pair, side, requested, filled):
+        """Journal the position the fill left and send it to the pair's worker"""
+        if filled >= requested:
+            return
+        state = dict(self.journal.get(pair) or {})
+        if side == 'BUY':
+            state['position_size'] = filled
+            if not filled:
+                state['position'] = None
+        else:
+            state['position'] = 'LONG'
+            state['position_size'] = requested - filled
+        self.journal.record(pair, state)
+        owner = self.owners.get(pair)
+        if owner is not None:
+            self.replies[owner].put(('position', pair, state))
+
+    def _log_fill(self, pair, side, price, amount, signal, fee, label=None):
+        self.risk.on_fill(pair, side, price, amount, fee=fee)
+        self.logger.log_trade(label or side, pair, price, amount)
+        self.db.log_trade(pair, side, price, amount, signal, self.balance, fee=fee)
+
+    def refresh_book(self, pair):
+        """Fetch the pair's book if stale, False when that failed
+
+        Called before taking the lock, so the REST round trip doesn't hold
+        up fills.
+        """
+        if self.books is None:
+            return True
+        try:
+            self.books.fresh(pair)
+            return True
+        except Exception as e:
+            self.logger.log_error(f"Error fetching order book for {pair}: {e}", pair=pair, stage='book')
+            return False
+
+    def reprice_order(self, order):
+        """New limit price for the remainder of a stale live order"""
+        book = self.books.fresh(order.pair) if self.books is not None else None
+        return limit_price(book, order.side, order.remaining, self.state.ticker(order.pair))
+
+    def order(self, pair, side, price, amount, signal, book_ok=True):
+        requested = amount
+        if not book_ok:
+            # No book, no price to trade at: like a failed cycle, the
+            # worker keeps its position and tries again
+            self._settle(pair, side, requested, 0.0)
+            return
+        book = self.books.get(pair) if self.books is not None else None
+        if side == 'BUY':
+            allowed = self.risk.max_buy(pair, price)
+            if not allowed:
+                self.logger.logger.info(f"{pair}: entry blocked by risk limits")
+            if book is not None and book.best_ask() is not None:
+                allowed = min(allowed, book.max_amount('BUY', self.config.max_slippage))
+            amount = min(amount, allowed)
+        price = limit_price(book, side, amount, price)
+        if self.orders is not None:
+            if amount > 0:
+                self.orders.submit(pair, side, price, amount, tag=signal)
+            if amount < requested:
+                self._settle(pair, side, requested, amount)
+            return
+
+        # Paper trading, as a marketable order paying the taker fee
+        fee = price * amount * self.config.taker_fee
+        if side == 'BUY' and price * amount + fee > self.balance:
+            amount = fee = 0.0
+        if amount > 0:
+            if side == 'BUY':
+                self.balance -= price * amount + fee
+            else:
+                self.balance += price * amount - fee
+            self._log_fill(pair, side, price, amount, signal, fee, f"[PAPER] {side}")
+            self.journal.record('balance', {'balance': self.balance})
+        self._settle(pair, side, requested, amount)
+
+    def on_order_done(self, order):
+        # getInfo round trip, before the lock so requests keep flowing
+        balances = self.orders.reconcile() if order.filled else None
+        with self.lock:
+            self._settle(order.pair, order.side, order.amount, order.filled)
+            if order.error:
+                self.logger.log_error(
+                    f"Order {order.id} {order.pair} {order.status}: {order.error}",
+                    pair=order.pair, stage='order'
+                )
+            if order.filled:
+                if balances is not None:
+                    self.balance = balances.get('idr', self.balance)
+                # Indodax doesn't report fees per order, estimate at the taker rate
+                fee = order.avg_price * order.filled * self.config.taker_fee
+                self._log_fill(order.pair, order.side, order.avg_price, order.filled, order.tag, fee)
+
+    def handle(self, message, book_ok=True):
+        kind = message[0]
+        if kind == 'state':
+            self.journal.record(message[1], message[2])
+        elif kind == 'order':
+            self.order(*message[1:], book_ok=book_ok)
+        elif kind == 'hello':
+            index, pairs = message[1], message[2]
+            for pair in pairs:
+                self.owners[pair] = index
+            self.replies[index].put(('states', None, {pair: self.journal.get(pair) for pair in pairs}))
+
+    def run(self):
+        if self.orders is not None:
+            balances = self.orders.reconcile()
+            if balances is not None:
+                self.balance = balances.get('idr', self.balance)
+                self.risk.sync(self.balance, balances)
+            self.orders.start()
+        self.risk.start_day()
+        last_flush = time.monotonic()
+        while not self.state.stopping():
+            try:
+                message = self.requests.get(timeout=0.5)
+            except queue.Empty:
+                message = None
+            book_ok = True
+            if message is not None and message[0] == 'order':
+                book_ok = self.refresh_book(message[1])
+            with self.lock:
+                if message is not None:
+                    try:
+                        self.handle(message, book_ok)
+                    except Exception as e:
+                        self.logger.log_error(f"Gateway failed on {message[0]}: {e}", stage='gateway')
+                for pair in self.config.pairs:
+                    price = self.state.ticker(pair)
+                    if price is not None:
+                        self.risk.mark(pair, price)
+                self.state.set_account(self.risk.equity(), self.balance)
+            if time.monotonic() - last_flush >= self.config.db_flush_interval:
+                self.db.flush()
+                last_flush = time.monotonic()
+        if self.orders is not None:
+            self.orders.stop(cancel_open=True)
+        self.db.close()
+        self.journal.close()
+
+def _market_data_main(state):
+    config = Config()
+    logger = _logger(config, 'market')
+    try:
+        MarketDataPublisher(config, state, logger).run()
+    finally:
+        logger.close()
+        state.close()
+
+def _gateway_main(state, requests, replies):
+    config = Config()
+    logger = _logger(config, 'gateway')
+    try:
+        Gateway(config, state, requests, replies, logger).run()
+    finally:
+        logger.close()
+        state.close()
+
+def _worker_main(index, pairs, state, requests, replies):
+    config = Config()
+    logger = _logger(config, f'worker{index}')
+    try:
+        ShardWorker(config, index, pairs, state, requests, replies, logger).run()
+    finally:
+        logger.close()
+        state.close()
+
+class ShardedRunner:
+    """Supervisor for the multi-process bot
+
+    One market-data process publishes candles and tickers into shared
+    memory, worker processes each trade a shard of the pairs (so
+    indicator math is not limited by one GIL) and one gateway process
+    serializes orders, the database and the journal. Processes that die
+    are restarted with exponential backoff.
+    """
+
+    def __init__(self, config, processes=None):
+        self.config = config
+        self.logger = TradingLogger.from_config(config)
+        self.shards = shard(config.pairs, processes or worker_count(config))
+        # spawn: no threads or locks are inherited half-way
+        self.context = multiprocessing.get_context('spawn')
+        self.state = SharedMarketState(
+            config.pairs, config.timeframes, config.candle_buffer_size, create=True
+        )
+        self.requests = self.context.Queue()
+        self.replies = [self.context.Queue() for _ in self.shards]
+        self.targets = {
+            'market': (_market_data_main, (self.state,)),
+            'gateway': (_gateway_main, (self.state, self.requests, self.replies)),
+        }
+        for index, pairs in enumerate(self.shards):
+            self.targets[f'worker{index}'] = (
+                _worker_main,
+                (index, pairs, self.state, self.requests, self.replies[index])
+            )
+        self.processes = {}
+        self.restarts = dict.fromkeys(self.targets, 0)
+        self.restart_at = {}
+        self.metrics_server = None
+        if config.metrics_enabled:
+            self.metrics_server = MetricsServer(config.metrics_host, config.metrics_port)
+
+    def _start(self, name):
+        target, args = self.targets[name]
+        process = self.context.Process(target=target, args=args, name=f"bot-{name}", daemon=True)
+        process.start()
+        self.processes[name] = process
+
+    def start(self):
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+        for name in self.targets:
+            self._start(name)
+        self.logger.logger.info(
+            f"Started {len(self.shards)} workers for {len(self.config.pairs)} pairs: "
+            + ' | '.join(','.join(pairs) for pairs in self.shards)
+        )
+
+    def supervise(self):
+        """Restart processes that died, waiting longer after each crash"""
+        now = time.monotonic()
+        for name, process in self.processes.items():
+            if process.is_alive() or self.state.stopping():
+                continue
+            if name not in self.restart_at:
+                self.restarts[name] += 1
+                delay = min(60.0, 2.0 ** (self.restarts[name] - 1))
+                self.restart_at[name] = now + delay
+                PROCESS_RESTARTS.inc(role=name.rstrip('0123456789'))
+                self.logger.log_error(
+                    f"{process.name} exited with {process.exitcode}, restarting in {delay:.0f}s",
+                    stage='supervisor'
+                )
+            elif now >= self.restart_at[name]:
+                del self.restart_at[name]
+                self._start(name)
+
+    def run(self):
+        self.start()
+        try:
+            while not self.state.stopping():
+                self.supervise()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.logger.logger.info("Bot stopped by user")
+        self.stop()
+
+    def stop(self, timeout=10):
+        self.state.request_stop()
+        deadline = time.monotonic() + timeout
+        for process in self.processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.state.close()
+        self.logger.close()
@@ -1,15 +1,21 @@
 import hmac
 import hashlib
-import requests
 import time
-import json
+import threading
 from urllib.parse import urlencode
+from exchange.transport import HttpTransport
+
+# Private methods that only read state and are safe to retry
+READ_ONLY_METHODS = {'getInfo', 'openOrders', 'orderHistory', 'getOrder', 'tradeHistory'}
 
 class IndodaxAPI:
-    def __init__(self, api_key, secret_key):
+    def __init__(self, api_key, secret_key, transport=None, base_url="https://indodax.com"):
         self.api_key = api_key
         self.secret_key = secret_key
-        self.base_url = "https://indodax.com"
+        self.transport = transport or HttpTransport()
+        self.base_url = base_url.rstrip('/')
+        self._nonce_lock = threading.Lock()
+        self._last_nonce = 0
         self.public_url = f"{self.base_url}/api"
         
     def _sign(self, data):
@@ -19,30 +25,43 @@ class IndodaxAPI:
             hashlib.sha512
         ).hexdigest()
     
+    def _nonce(self):
+        """Strictly increasing nonce, safe across concurrent pair threads"""
+        with self._nonce_lock:
+            self._last_nonce = max(self._last_nonce + 1, int(time.time() * 1000))
+            return self._last_nonce
+    
     def get_ticker(self, pair):
         """Get current ticker information"""
         url = f"{self.public_url}/{pair}/ticker"
-        response = requests.get(url)
+        response = self.transport.get(url, name='ticker')
         return response.json()
     
     def get_order_book(self, pair):
         """Get order book"""
         url = f"{self.public_url}/{pair}/depth"
-        response = requests.get(url)
+        response = self.transport.get(url, name='depth')
         return response.json()
     
     def get_trades(self, pair, limit=1000):
         """Get recent trades"""
         url = f"{self.public_url}/{pair}/trades"
-        response = requests.get(url)
+        response = self.transport.get(url, name='trades')
         return response.json()[:limit]
     
-    def get_ohlcv(self, pair, interval=300, limit=100):
-        """Get OHLCV data"""
+    def get_ohlcv(self, pair, interval=300, limit=100, since=None):
+        """Get OHLCV data, only candles from `since` (seconds) when given"""
         # Convert to minutes for Indodax API
         minutes = interval // 60
-        url = f"{self.base_url}/tradingview/history?symbol={pair}&resolution={minutes}&from={int(time.time()-interval*limit)}&to={int(time.time())}"
-        response = requests.get(url)
+        now = int(time.time())
+        start = int(since) if since is not None else now - interval * limit
+        url = f"{self.base_url}/tradingview/history"
+        response = self.transport.get(url, name='ohlcv', params={
+            'symbol': pair,
+            'resolution': minutes,
+            'from': start,
+            'to': now
+        })
         return response.json()
     
     def private_request(self, method, params=None):
@@ -50,18 +69,23 @@ class IndodaxAPI:
         if params is None:
             params = {}
         
-        params['method'] = method
-        params['nonce'] = int(time.time() * 1000)
+        def build():
+            # Re-signed on every attempt so retries carry a fresh nonce
+            data = dict(params)
+            data['method'] = method
+            data['nonce'] = self._nonce()
+            
+            headers = {
+                'Key': self.api_key,
+                'Sign': self._sign(data)
+            }
+            return {'data': data, 'headers': headers}
         
-        headers = {
-            'Key': self.api_key,
-            'Sign': self._sign(params)
-        }
-        
-        response = requests.post(
+        response = self.transport.post(
             f"{self.base_url}/tapi",
-            data=params,
-            headers=headers
+            build=build,
+            idempotent=method in READ_ONLY_METHODS,
+            name=method
         )
         
         return response.json()
@@ -70,25 +94,43 @@ class IndodaxAPI:
         """Get account balance"""
         return self.private_request('getInfo')
     
-    def place_order(self, pair, type, price, amount):
-        """Place buy/sell order"""
+    def place_order(self, pair, type, price, amount, client_order_id=None):
+        """Place buy/sell limit order for `amount` coins
+        
+        Indodax takes the size of a buy in IDR and of a sell in the coin.
+        """
         params = {
             'pair': pair,
             'type': type,  # 'buy' or 'sell'
-            'price': price,
-            'amount': amount
+            'price': price
         }
+        if type == 'buy':
+            params['idr'] = int(price * amount)
+        else:
+            params[pair.split('_')[0]] = f"{amount:.8f}"
+        if client_order_id is not None:
+            params['client_order_id'] = client_order_id
         return self.private_request('trade', params)
     
-    def cancel_order(self, pair, order_id):
+    def cancel_order(self, pair, order_id, type=None):
         """Cancel order"""
         params = {
             'pair': pair,
             'order_id': order_id
         }
+        if type is not None:
+            params['type'] = type
         return self.private_request('cancelOrder', params)
     
-    def get_open_orders(self, pair):
-        """Get open orders"""
-        params = {'pair': pair}
-        return self.private_request('openOrders', params)
\ No newline at end of file
+    def get_open_orders(self, pair=None):
+        """Get open orders, for every pair in one call when pair is None"""
+        params = {'pair': pair} if pair else {}
+        return self.private_request('openOrders', params)
+    
+    def get_order(self, pair, order_id):
+        """Get one order's status"""
+        params = {
+            'pair': pair,
+            'order_id': order_id
+        }
+        return self.private_request('getOrder', params)
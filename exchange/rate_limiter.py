@@ -0,0 +1,40 @@
+import threading
+import time
+
+class RateLimiter:
+    """Thread-safe token bucket shared by everything calling the exchange"""
+    
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)  # tokens per second
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+    
+    def try_acquire(self, tokens=1):
+        """Take tokens without waiting, return False if not available"""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+    
+    def acquire(self, tokens=1):
+        """Block until tokens are available, return seconds waited"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
@@ -0,0 +1,137 @@
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from exchange.rate_limiter import RateLimiter
+from utils.metrics import REGISTRY
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+API_LATENCY = REGISTRY.histogram(
+    'api_request_seconds', 'Latency of one HTTP attempt per API call'
+)
+API_RATE_WAIT = REGISTRY.histogram(
+    'api_rate_limit_wait_seconds', 'Time spent waiting for a rate limiter token'
+)
+API_RETRIES = REGISTRY.counter('api_retries_total', 'Retried API attempts')
+API_ERRORS = REGISTRY.counter('api_errors_total', 'API calls that failed after retries')
+
+class HttpTransport:
+    """Pooled, rate-limited HTTP transport used by IndodaxAPI
+
+    One keep-alive requests.Session is shared by every call so TCP/TLS
+    handshakes are reused. Each endpoint class ('public' for /api and
+    /tradingview, 'private' for /tapi) has its own token bucket, and
+    429/5xx responses are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, public_rate=3, private_rate=3, burst=6,
+                 timeout=(3.05, 10), max_retries=3, backoff=0.5,
+                 max_backoff=8.0, pool_size=32):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.limiters = {
+            'public': RateLimiter(public_rate, burst),
+            'private': RateLimiter(private_rate, burst)
+        }
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self.errors = 0
+
+    def _delay(self, attempt, response=None):
+        """Backoff delay for a retry, honouring Retry-After when given"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    pass
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        # Full jitter so concurrent pairs don't retry in lockstep
+        return random.uniform(0, delay)
+
+    def request(self, method, url, endpoint='public', build=None,
+                idempotent=True, name=None, **kwargs):
+        """Send a request and return the final Response
+
+        `build` is called before every attempt and returns extra request
+        kwargs, so signed private calls get a fresh nonce on retry. Calls
+        that are not idempotent (placing/cancelling orders) are only
+        retried when the server has certainly not processed them: a 429
+        or a failure to connect. `name` labels the call in the metrics.
+        """
+        limiter = self.limiters[endpoint]
+        name = name or endpoint
+        attempt = 0
+        while True:
+            waited = time.perf_counter()
+            limiter.acquire()
+            started = time.perf_counter()
+            API_RATE_WAIT.observe(started - waited, endpoint=endpoint)
+            request_kwargs = dict(kwargs)
+            if build is not None:
+                request_kwargs.update(build())
+            request_kwargs.setdefault('timeout', self.timeout)
+
+            try:
+                response = self.session.request(method, url, **request_kwargs)
+            except requests.exceptions.ConnectionError as e:
+                API_LATENCY.observe(time.perf_counter() - started, call=name)
+                safe = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not safe or attempt >= self.max_retries:
+                    self.errors += 1
+                    API_ERRORS.inc(call=name)
+                    raise
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                self.retries += 1
+                API_RETRIES.inc(call=name)
+                continue
+            except requests.exceptions.Timeout:
+                API_LATENCY.observe(time.perf_counter() - started, call=name)
+                if not idempotent or attempt >= self.max_retries:
+                    self.errors += 1
+                    API_ERRORS.inc(call=name)
+                    raise
+                time.sleep(self._delay(attempt))
+                attempt += 1
+                self.retries += 1
+                API_RETRIES.inc(call=name)
+                continue
+
+            API_LATENCY.observe(time.perf_counter() - started, call=name)
+
+            retryable = response.status_code == 429 or (
+                idempotent and response.status_code in RETRY_STATUS
+            )
+            if not retryable:
+                return response
+            if attempt >= self.max_retries:
+                self.errors += 1
+                API_ERRORS.inc(call=name)
+                response.raise_for_status()
+                return response
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+            self.retries += 1
+            API_RETRIES.inc(call=name)
+
+    def get(self, url, endpoint='public', **kwargs):
+        return self.request('GET', url, endpoint=endpoint, **kwargs)
+
+    def post(self, url, endpoint='private', **kwargs):
+        return self.request('POST', url, endpoint=endpoint, **kwargs)
+
+    def close(self):
+        self.session.close()
\ No newline at end of file
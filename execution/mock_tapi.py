@@ -0,0 +1,222 @@
+"""Local in-memory stand-in for the Indodax private API (/tapi)
+
+Point IndodaxAPI at it (base_url) to exercise the OrderManager without
+touching a real account:
+    python -m execution.mock_tapi --port 8765 --price 1000000000
+
+Orders rest until the market price crosses them (set with set_price() or
+POST /mock/price?pair=btc_idr&price=...), then fill completely, or
+partially with fill(). Signatures are not checked.
+"""
+import argparse
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class MockExchange:
+    def __init__(self, balances=None, prices=None):
+        self.lock = threading.Lock()
+        self.balances = dict(balances or {'idr': 10_000_000.0, 'btc': 0.0})
+        self.held = {asset: 0.0 for asset in self.balances}
+        self.prices = dict(prices or {})
+        self.orders = {}
+        self.ids = itertools.count(1000)
+        self.calls = []
+
+    def set_price(self, pair, price):
+        with self.lock:
+            self.prices[pair] = price
+            for order in list(self.orders.values()):
+                if order['pair'] == pair and order['status'] == 'open':
+                    crossed = (price <= order['price'] if order['type'] == 'buy'
+                               else price >= order['price'])
+                    if crossed:
+                        self._fill(order, order['remain'])
+
+    def fill(self, order_id, amount=None):
+        """Fill (part of) an open order at its price"""
+        with self.lock:
+            order = self.orders[str(order_id)]
+            self._fill(order, order['remain'] if amount is None else amount)
+
+    def _fill(self, order, amount):
+        amount = min(amount, order['remain'])
+        coin = order['pair'].split('_')[0]
+        cost = amount * order['price']
+        if order['type'] == 'buy':
+            self.held['idr'] -= cost
+            self.balances[coin] = self.balances.get(coin, 0.0) + amount
+        else:
+            self.held[coin] -= amount
+            self.balances['idr'] += cost
+        order['remain'] -= amount
+        if order['remain'] <= 1e-12:
+            order['remain'] = 0.0
+            order['status'] = 'filled'
+
+    def _entry(self, order):
+        coin = order['pair'].split('_')[0]
+        entry = {
+            'order_id': order['order_id'],
+            'price': str(order['price']),
+            'type': order['type'],
+            'status': order['status'],
+        }
+        if order['type'] == 'buy':
+            entry['order_idr'] = str(order['amount'] * order['price'])
+            entry['remain_idr'] = str(order['remain'] * order['price'])
+        else:
+            entry[f'order_{coin}'] = f"{order['amount']:.8f}"
+            entry[f'remain_{coin}'] = f"{order['remain']:.8f}"
+        return entry
+
+    def handle(self, params):
+        method = params.get('method')
+        self.calls.append(method)
+        with self.lock:
+            handler = getattr(self, f'_tapi_{method}', None)
+            if handler is None:
+                return {'success': 0, 'error': f'Invalid method {method}'}
+            return handler(params)
+
+    def _tapi_getInfo(self, params):
+        return {'success': 1, 'return': {
+            'balance': {k: str(v) for k, v in self.balances.items()},
+            'balance_hold': {k: str(v) for k, v in self.held.items()},
+        }}
+
+    def _tapi_trade(self, params):
+        pair = params['pair']
+        coin = pair.split('_')[0]
+        price = float(params['price'])
+        if params['type'] == 'buy':
+            amount = float(params['idr']) / price
+            if amount * price > self.balances['idr']:
+                return {'success': 0, 'error': 'Insufficient balance.'}
+            self.balances['idr'] -= amount * price
+            self.held['idr'] += amount * price
+        else:
+            amount = float(params[coin])
+            if amount > self.balances.get(coin, 0.0) + 1e-12:
+                return {'success': 0, 'error': 'Insufficient balance.'}
+            self.balances[coin] -= amount
+            self.held[coin] = self.held.get(coin, 0.0) + amount
+        order_id = str(next(self.ids))
+        order = self.orders[order_id] = {
+            'order_id': order_id, 'pair': pair, 'type': params['type'],
+            'price': price, 'amount': amount, 'remain': amount, 'status': 'open'
+        }
+        market = self.prices.get(pair)
+        if market is not None and (price >= market if order['type'] == 'buy' else price <= market):
+            self._fill(order, amount)
+        result = {'order_id': int(order_id)}
+        if order['type'] == 'buy':
+            result['remain_rp'] = str(order['remain'] * price)
+        else:
+            result[f'remain_{coin}'] = f"{order['remain']:.8f}"
+        return {'success': 1, 'return': result}
+
+    def _tapi_openOrders(self, params):
+        pair = params.get('pair')
+        open_orders = [o for o in self.orders.values() if o['status'] == 'open']
+        if pair:
+            return {'success': 1, 'return': {'orders': [
+                self._entry(o) for o in open_orders if o['pair'] == pair
+            ]}}
+        grouped = {}
+        for order in open_orders:
+            grouped.setdefault(order['pair'], []).append(self._entry(order))
+        return {'success': 1, 'return': {'orders': grouped}}
+
+    def _tapi_getOrder(self, params):
+        order = self.orders.get(str(params['order_id']))
+        if order is None:
+            return {'success': 0, 'error': 'Invalid order.'}
+        return {'success': 1, 'return': {'order': self._entry(order)}}
+
+    def _tapi_cancelOrder(self, params):
+        order = self.orders.get(str(params['order_id']))
+        if order is None or order['status'] != 'open':
+            return {'success': 0, 'error': 'Invalid order or already closed.'}
+        coin = order['pair'].split('_')[0]
+        if order['type'] == 'buy':
+            refund = order['remain'] * order['price']
+            self.held['idr'] -= refund
+            self.balances['idr'] += refund
+        else:
+            self.held[coin] -= order['remain']
+            self.balances[coin] += order['remain']
+        order['status'] = 'cancelled'
+        return {'success': 1, 'return': {'order_id': int(order['order_id'])}}
+
+class _Handler(BaseHTTPRequestHandler):
+    exchange = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        url = urlparse(self.path)
+        if url.path == '/tapi':
+            body = self.exchange.handle(params)
+        elif url.path == '/mock/price':
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self.exchange.set_price(query['pair'], float(query['price']))
+            body = {'success': 1}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class MockTapiServer:
+    """Serve a MockExchange on localhost in a background thread"""
+
+    def __init__(self, exchange=None, host='127.0.0.1', port=0):
+        self.exchange = exchange or MockExchange()
+        handler = type('MockTapiHandler', (_Handler,), {'exchange': self.exchange})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name='mock-tapi', daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pair', default='btc_idr')
+    parser.add_argument('--price', type=float, default=None)
+    args = parser.parse_args()
+
+    prices = {args.pair: args.price} if args.price else {}
+    server = MockTapiServer(MockExchange(prices=prices), port=args.port)
+    print(f"Mock /tapi on {server.base_url}/tapi")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
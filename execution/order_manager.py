@@ -0,0 +1,338 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import REGISTRY
+
+ORDERS_SUBMITTED = REGISTRY.counter('orders_submitted_total', 'Orders sent to the exchange')
+ORDERS_DONE = REGISTRY.counter('orders_done_total', 'Orders finished, by final status')
+ORDER_REPRICES = REGISTRY.counter('order_reprices_total', 'Stale orders cancelled and resubmitted')
+ORDER_SUBMIT_SECONDS = REGISTRY.histogram(
+    'order_submit_seconds', 'Time from submit() to the exchange acknowledging the order'
+)
+ORDER_FILL_SECONDS = REGISTRY.histogram(
+    'order_fill_seconds', 'Time from submit() to the order being filled'
+)
+OPEN_ORDERS = REGISTRY.gauge('open_orders', 'Orders currently tracked as open')
+
+PENDING = 'pending'
+OPEN = 'open'
+PARTIAL = 'partial'
+FILLED = 'filled'
+CANCELLED = 'cancelled'
+REJECTED = 'rejected'
+DONE_STATES = (FILLED, CANCELLED, REJECTED)
+
+def _remaining(order_data, price):
+    """Remaining coin amount from an openOrders/getOrder entry
+
+    Buy orders report what is left in IDR (remain_idr / remain_rp),
+    sell orders in the coin (remain_btc, remain_eth, ...).
+    """
+    for key, value in order_data.items():
+        if key.startswith('remain_'):
+            remaining = float(value)
+            if key in ('remain_idr', 'remain_rp'):
+                remaining = remaining / price if price else 0.0
+            return remaining
+    return None
+
+class Order:
+    """One logical order; reprices keep the same Order with a new order_id"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, pair, side, price, amount, tag=None):
+        self.id = next(Order._ids)
+        self.pair = pair
+        self.side = side.upper()
+        self.price = price
+        self.amount = amount
+        self.tag = tag
+        self.order_id = None
+        self.status = PENDING
+        # Fills of earlier (repriced) exchange orders plus the current one
+        self.filled_before = 0.0
+        self.cost_before = 0.0
+        self.filled_current = 0.0
+        self.reprices = 0
+        self.error = None
+        self.created = time.time()
+        self.placed = None
+        self.updated = self.created
+        self.done = threading.Event()
+
+    @property
+    def filled(self):
+        return self.filled_before + self.filled_current
+
+    @property
+    def remaining(self):
+        return max(0.0, self.amount - self.filled)
+
+    @property
+    def avg_price(self):
+        filled = self.filled
+        if not filled:
+            return None
+        return (self.cost_before + self.filled_current * self.price) / filled
+
+    def __repr__(self):
+        return (f"Order({self.id} {self.side} {self.amount} {self.pair} @ {self.price} "
+                f"{self.status} filled={self.filled})")
+
+class OrderManager:
+    """Submit, track, reprice and reconcile live orders off the trading loop
+
+    submit() returns immediately; the order is placed on a worker thread.
+    A poller thread lists open orders for every pair with one openOrders
+    call, looks up only the orders that disappeared from it (getOrder),
+    cancels orders left open longer than stale_after and resubmits the
+    remainder at the price from `reprice(order)` up to max_reprices
+    times. Balances are reconciled from getInfo whenever a poll saw
+    fills. on_done(order) is called once per order when it finishes.
+
+    Every poll spends an openOrders call (plus getOrder/getInfo when
+    something changed) from the same private rate limit as trade and
+    cancelOrder, so poll_interval must stay well above 1 /
+    private_rate_limit: at 0.1 s against 3 req/s the polls alone drain
+    the bucket and cancels and reprices queue behind them.
+    """
+
+    def __init__(self, api, reprice=None, on_done=None, poll_interval=1.0,
+                 stale_after=10.0, max_reprices=3, max_workers=4):
+        self.api = api
+        self.reprice = reprice
+        self.on_done = on_done
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_reprices = max_reprices
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='orders'
+        )
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.balances = {}
+        self.held = {}
+        self.balance_updated = 0.0
+        self.errors = 0
+        self.last_error = None
+        self.thread = None
+        self.running = False
+        self.wakeup = threading.Event()
+        OPEN_ORDERS.set_function(lambda: len(self.active()))
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='order-poller', daemon=True)
+        self.thread.start()
+
+    def stop(self, cancel_open=False):
+        """Stop polling; optionally cancel every order still open"""
+        if cancel_open:
+            for order in self.active():
+                self.cancel(order).result()
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.executor.shutdown(wait=True)
+
+    def active(self):
+        with self.lock:
+            return [o for o in self.orders.values() if o.status not in DONE_STATES]
+
+    def submit(self, pair, side, price, amount, tag=None):
+        """Queue a limit order and return its Order without waiting"""
+        order = Order(pair, side, price, amount, tag)
+        with self.lock:
+            self.orders[order.id] = order
+        self.executor.submit(self._place, order)
+        return order
+
+    def cancel(self, order):
+        """Cancel an order asynchronously; returns a Future"""
+        return self.executor.submit(self._cancel, order, False)
+
+    def _error(self, order, error):
+        self.errors += 1
+        self.last_error = error
+        if order is not None:
+            order.error = error
+
+    def _place(self, order):
+        try:
+            response = self.api.place_order(
+                order.pair, order.side.lower(), order.price, order.remaining
+            )
+        except Exception as e:
+            # Orders are never retried blindly; if it did reach the
+            # exchange the next reconcile() shows it in the balances
+            self._error(order, str(e))
+            self._finish(order, REJECTED)
+            return
+        if response.get('success') != 1:
+            self._error(order, response.get('error', 'order rejected'))
+            self._finish(order, REJECTED)
+            return
+
+        result = response.get('return', {})
+        order.order_id = str(result.get('order_id'))
+        order.placed = time.time()
+        order.updated = order.placed
+        order.status = OPEN
+        ORDERS_SUBMITTED.inc(pair=order.pair, side=order.side)
+        ORDER_SUBMIT_SECONDS.observe(order.placed - order.created)
+
+        # Part of the order may have matched immediately
+        remaining = _remaining(result, order.price)
+        if remaining is not None:
+            self._set_filled(order, (order.amount - order.filled_before) - remaining)
+        self.wakeup.set()
+
+    def _set_filled(self, order, filled_current):
+        order.filled_current = max(0.0, min(filled_current, order.amount - order.filled_before))
+        order.updated = time.time()
+        if order.remaining <= order.amount * 1e-9:
+            self._finish(order, FILLED)
+        elif order.filled:
+            order.status = PARTIAL
+
+    def _finish(self, order, status):
+        if order.status in DONE_STATES:
+            return
+        order.status = status
+        order.updated = time.time()
+        ORDERS_DONE.inc(status=status)
+        if status == FILLED:
+            ORDER_FILL_SECONDS.observe(order.updated - order.created)
+        order.done.set()
+        if self.on_done is not None:
+            try:
+                self.on_done(order)
+            except Exception as e:
+                self._error(None, str(e))
+
+    def _cancel(self, order, reprice):
+        """Cancel on the exchange; resubmit the remainder when repricing"""
+        if order.order_id is None or order.status in DONE_STATES:
+            return False
+        try:
+            response = self.api.cancel_order(order.pair, order.order_id, order.side.lower())
+        except Exception as e:
+            self._error(order, str(e))
+            return False
+        if response.get('success') != 1:
+            # Most likely filled in the meantime, the next poll will tell
+            self._error(order, response.get('error', 'cancel failed'))
+            return False
+
+        # Anything filled before the cancel went through
+        self._refresh_order(order, final=True)
+        if order.status in DONE_STATES:
+            return True
+
+        new_price = self.reprice(order) if reprice and self.reprice else None
+        if new_price is None or order.remaining <= 0:
+            self._finish(order, CANCELLED)
+            return True
+
+        # Same logical order continues with a new exchange order
+        order.cost_before += order.filled_current * order.price
+        order.filled_before += order.filled_current
+        order.filled_current = 0.0
+        order.price = new_price
+        order.order_id = None
+        order.status = PENDING
+        order.reprices += 1
+        ORDER_REPRICES.inc(pair=order.pair)
+        self._place(order)
+        return True
+
+    def _refresh_order(self, order, final=False):
+        """Look up one order that is no longer listed as open"""
+        try:
+            response = self.api.get_order(order.pair, order.order_id)
+        except Exception as e:
+            self._error(order, str(e))
+            return
+        data = (response.get('return') or {}).get('order') or {}
+        status = data.get('status')
+        remaining = _remaining(data, order.price)
+        current_amount = order.amount - order.filled_before
+        if remaining is not None:
+            self._set_filled(order, current_amount - remaining)
+        if status == FILLED:
+            self._set_filled(order, current_amount)
+        elif status == CANCELLED and not final:
+            self._finish(order, CANCELLED)
+
+    def poll(self):
+        """One polling round: update states, reprice stale orders, reconcile"""
+        active = [o for o in self.active() if o.order_id is not None]
+        if not active:
+            return
+        try:
+            response = self.api.get_open_orders()
+        except Exception as e:
+            self._error(None, str(e))
+            return
+        listed = (response.get('return') or {}).get('orders') or {}
+        if isinstance(listed, list):
+            listed = {active[0].pair: listed}
+        open_by_id = {}
+        for entries in listed.values():
+            for entry in entries or []:
+                open_by_id[str(entry.get('order_id'))] = entry
+
+        filled_before = sum(o.filled for o in active)
+        now = time.time()
+        for order in active:
+            entry = open_by_id.get(order.order_id)
+            if entry is None:
+                # Gone from the book: filled or cancelled elsewhere
+                self._refresh_order(order)
+                continue
+            remaining = _remaining(entry, order.price)
+            if remaining is not None:
+                self._set_filled(order, (order.amount - order.filled_before) - remaining)
+            if (order.status not in DONE_STATES
+                    and now - order.placed > self.stale_after):
+                reprice = order.reprices < self.max_reprices
+                self._cancel(order, reprice)
+
+        if sum(o.filled for o in active) != filled_before:
+            self.reconcile()
+
+        # Forget finished orders after a while
+        with self.lock:
+            for order_id in [i for i, o in self.orders.items()
+                             if o.status in DONE_STATES and now - o.updated > 3600]:
+                del self.orders[order_id]
+
+    def reconcile(self):
+        """Refresh balances from getInfo; returns {asset: free balance}"""
+        try:
+            response = self.api.get_balance()
+        except Exception as e:
+            self._error(None, str(e))
+            return None
+        if response.get('success') != 1:
+            self._error(None, response.get('error', 'getInfo failed'))
+            return None
+        info = response.get('return', {})
+        self.balances = {k: float(v) for k, v in (info.get('balance') or {}).items()}
+        self.held = {k: float(v) for k, v in (info.get('balance_hold') or {}).items()}
+        self.balance_updated = time.time()
+        return self.balances
+
+    def _run(self):
+        while self.running:
+            try:
+                self.poll()
+            except Exception as e:
+                self._error(None, str(e))
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
@@ -0,0 +1,55 @@
+import numpy as np
+
+class CandleBuffer:
+    """Preallocated NumPy structured array of candles and indicator values
+
+    One row per candle, one named field per column, so the newest values
+    are read as scalars (buffer.row(-1)['RSI']) and whole indicators as
+    contiguous views (buffer.view('RSI')) without building pandas objects.
+    When full, the newest half slides to the front; nothing is allocated
+    per candle.
+    """
+
+    __slots__ = ('columns', 'dtype', 'data', 'size', 'capacity', 'keep')
+
+    def __init__(self, columns, bool_columns=(), capacity=512):
+        self.columns = tuple(columns)
+        self.dtype = np.dtype([
+            (name, '?' if name in bool_columns else 'f8') for name in self.columns
+        ])
+        self.data = np.zeros(capacity, dtype=self.dtype)
+        self.size = 0
+        self.capacity = capacity
+        self.keep = max(2, capacity // 2)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, values):
+        """Add a row from a tuple in column order"""
+        if self.size == self.capacity:
+            # Slide the newest rows to the front so views stay contiguous
+            self.data[:self.keep] = self.data[self.size - self.keep:self.size]
+            self.size = self.keep
+        self.data[self.size] = values
+        self.size += 1
+
+    def set_last(self, values):
+        """Overwrite the newest row (the forming candle)"""
+        self.data[self.size - 1] = values
+
+    def row(self, index=-1):
+        """Record for a row; fields read as scalars, e.g. row['close']"""
+        if index < 0:
+            index += self.size
+        if index < 0 or index >= self.size:
+            raise IndexError("CandleBuffer row out of range")
+        return self.data[index]
+
+    def view(self, name):
+        """Contiguous view of one column for the filled rows (no copy)"""
+        return self.data[name][:self.size]
+
+    def to_dict(self, index=-1):
+        record = self.row(index)
+        return {name: record[name].item() for name in self.columns}
\ No newline at end of file
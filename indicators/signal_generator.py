@@ -1,17 +1,32 @@
 import numpy as np
+from indicators.signal_kernel import frame_signal_votes, DECISIONS
 
 class SignalGenerator:
-    def __init__(self, df):
+    def __init__(self, df=None, ma_fast=9, ma_slow=21, ma_trend=50, tape_imbalance=0.3):
         self.df = df
+        self.tape_imbalance = tape_imbalance
+        self.fast_col = f'MA_{ma_fast}'
+        self.slow_col = f'MA_{ma_slow}'
+        self.trend_col = f'MA_{ma_trend}'
         
     def generate_signals(self):
         """Generate trading signals based on multiple indicators"""
-        signals = []
-        
         # Get the latest data point
         latest = self.df.iloc[-1]
         prev = self.df.iloc[-2]
         
+        return self.generate_signals_from_rows(latest, prev)
+    
+    def generate_signals_from_rows(self, latest, prev, tape=None):
+        """Generate trading signals from the latest and previous indicator rows
+        
+        Rows can be anything indexable by column name (Series, dict, record).
+        tape is an optional TradeTape.stats() snapshot that adds the order
+        flow and large print votes. The thresholds are those of the five
+        indicator votes (3 for, under 2 against) scaled to the number of
+        voters, so a ready tape raises them to 5 for, under 3 against
+        instead of making a BUY easier; a tape that isn't ready abstains.
+        """
         # 1. RSI Signal
         rsi_signal = self._check_rsi_signal(latest, prev)
         
@@ -27,31 +42,62 @@ class SignalGenerator:
         # 5. Stochastic Signal
         stoch_signal = self._check_stoch_signal(latest)
         
-        # Combine signals
-        buy_signals = sum([
-            rsi_signal == 'BUY',
-            macd_signal == 'BUY',
-            ma_signal == 'BUY',
-            bb_signal == 'BUY',
-            stoch_signal == 'BUY'
-        ])
+        # 6-7. Trade tape: order flow against VWAP, large prints
+        flow_signal = self._check_flow_signal(latest, tape)
+        large_signal = self._check_large_print_signal(tape)
         
-        sell_signals = sum([
-            rsi_signal == 'SELL',
-            macd_signal == 'SELL',
-            ma_signal == 'SELL',
-            bb_signal == 'SELL',
-            stoch_signal == 'SELL'
-        ])
+        # Combine signals
+        signals = [rsi_signal, macd_signal, ma_signal, bb_signal, stoch_signal,
+                   flow_signal, large_signal]
+        voters = len(signals) - signals.count(None)
+        buy_signals = signals.count('BUY')
+        sell_signals = signals.count('SELL')
         
-        # Decision logic
-        if buy_signals >= 3 and sell_signals < 2:
+        # Decision logic: 3/5 of the voters for, under 2/5 against
+        if buy_signals * 5 >= 3 * voters and sell_signals * 5 < 2 * voters:
             return 'BUY'
-        elif sell_signals >= 3 and buy_signals < 2:
+        elif sell_signals * 5 >= 3 * voters and buy_signals * 5 < 2 * voters:
             return 'SELL'
         else:
             return 'HOLD'
     
+    def apply_trend_filter(self, signal, trend):
+        """Drop BUY signals against the trend of a higher timeframe
+        
+        trend is the latest indicator row of the trend timeframe (e.g. 1h
+        while signals come from 5m); a BUY only passes while its close is
+        above the trend MA. Exits are never filtered, and nothing is while
+        the trend MA is still warming up.
+        """
+        if signal != 'BUY' or not self.trend_ready(trend):
+            return signal
+        if trend['close'] < trend[self.trend_col]:
+            return 'HOLD'
+        return signal
+    
+    def trend_ready(self, trend):
+        """True once the trend row's MA has warmed up, i.e. the filter applies"""
+        if trend is None:
+            return False
+        trend_ma = trend[self.trend_col]
+        return trend_ma == trend_ma
+    
+    def generate_signal_series(self, jit=None):
+        """Vectorized generate_signals for every row of the DataFrame
+        
+        Returns a DataFrame with buy_votes, sell_votes and signal columns;
+        the last row matches generate_signals(). See signal_kernel.
+        """
+        buy_votes, sell_votes, decision = frame_signal_votes(
+            self.df, self.fast_col, self.slow_col, jit=jit
+        )
+        import pandas as pd
+        return pd.DataFrame({
+            'buy_votes': buy_votes,
+            'sell_votes': sell_votes,
+            'signal': DECISIONS[decision]
+        }, index=self.df.index)
+    
     def _check_rsi_signal(self, latest, prev):
         if latest['RSI'] < 30 and prev['RSI'] >= 30:
             return 'BUY'
@@ -67,11 +113,12 @@ class SignalGenerator:
         return 'HOLD'
     
     def _check_ma_signal(self, latest, prev):
-        if (latest['MA_9'] > latest['MA_21'] and 
-            prev['MA_9'] <= prev['MA_21']):
+        fast, slow = self.fast_col, self.slow_col
+        if (latest[fast] > latest[slow] and 
+            prev[fast] <= prev[slow]):
             return 'BUY'
-        elif (latest['MA_9'] < latest['MA_21'] and 
-              prev['MA_9'] >= prev['MA_21']):
+        elif (latest[fast] < latest[slow] and 
+              prev[fast] >= prev[slow]):
             return 'SELL'
         return 'HOLD'
     
@@ -87,4 +134,22 @@ class SignalGenerator:
             return 'BUY'
         elif latest['STOCH_K'] > 80 and latest['STOCH_D'] > 80:
             return 'SELL'
-        return 'HOLD'
\ No newline at end of file
+        return 'HOLD'
+    
+    def _check_flow_signal(self, latest, tape):
+        if tape is None or not tape['ready'] or tape['vwap'] is None:
+            return None  # abstains
+        if tape['imbalance'] >= self.tape_imbalance and latest['close'] >= tape['vwap']:
+            return 'BUY'
+        elif tape['imbalance'] <= -self.tape_imbalance and latest['close'] <= tape['vwap']:
+            return 'SELL'
+        return 'HOLD'
+    
+    def _check_large_print_signal(self, tape):
+        if tape is None or not tape['ready']:
+            return None
+        if tape['large_buys'] > tape['large_sells']:
+            return 'BUY'
+        elif tape['large_sells'] > tape['large_buys']:
+            return 'SELL'
+        return 'HOLD'
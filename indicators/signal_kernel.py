@@ -0,0 +1,135 @@
+import importlib.util
+import numpy as np
+
+# numba is optional (the NumPy path gives the same results) and takes a
+# few hundred ms to import, so it is only loaded when the kernel runs
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+
+HOLD, BUY, SELL = 0, 1, -1
+
+# Indexed by decision code: DECISIONS[1] == 'BUY', DECISIONS[-1] == 'SELL'
+DECISIONS = np.array(['HOLD', 'BUY', 'SELL'])
+
+def _votes_numpy(close, rsi, cross, fast, slow, bb_lower, bb_upper, stoch_k, stoch_d):
+    n = len(close)
+    buy_votes = np.zeros(n, dtype=np.int8)
+    sell_votes = np.zeros(n, dtype=np.int8)
+    if n < 2:
+        return buy_votes, sell_votes
+
+    # Bar 0 has no previous bar and gets no votes, like generate_signals
+    buy = buy_votes[1:]
+    sell = sell_votes[1:]
+    rsi_now, rsi_prev = rsi[1:], rsi[:-1]
+    cross_now, cross_prev = cross[1:], cross[:-1]
+    fast_now, fast_prev = fast[1:], fast[:-1]
+    slow_now, slow_prev = slow[1:], slow[:-1]
+
+    buy += (rsi_now < 30) & (rsi_prev >= 30)
+    sell += (rsi_now > 70) & (rsi_prev <= 70)
+    buy += cross_now & ~cross_prev
+    sell += ~cross_now & cross_prev
+    buy += (fast_now > slow_now) & (fast_prev <= slow_prev)
+    sell += (fast_now < slow_now) & (fast_prev >= slow_prev)
+    below = close[1:] < bb_lower[1:]
+    buy += below
+    # elif in generate_signals: only one Bollinger vote even if the bands cross
+    sell += (close[1:] > bb_upper[1:]) & ~below
+    buy += (stoch_k[1:] < 20) & (stoch_d[1:] < 20)
+    sell += (stoch_k[1:] > 80) & (stoch_d[1:] > 80)
+    return buy_votes, sell_votes
+
+def _decide_numpy(buy_votes, sell_votes):
+    decision = ((buy_votes >= 3) & (sell_votes < 2)).view(np.int8).copy()
+    decision -= ((sell_votes >= 3) & (buy_votes < 2)).view(np.int8)
+    return decision
+
+def _kernel_python(close, rsi, cross, fast, slow, bb_lower, bb_upper, stoch_k, stoch_d,
+                   buy_votes, sell_votes, decision):
+    """Single pass over all bars; compiled with numba when it is installed"""
+    for i in range(1, len(close)):
+        buy = 0
+        sell = 0
+        if rsi[i] < 30 and rsi[i - 1] >= 30:
+            buy += 1
+        elif rsi[i] > 70 and rsi[i - 1] <= 70:
+            sell += 1
+        if cross[i] and not cross[i - 1]:
+            buy += 1
+        elif not cross[i] and cross[i - 1]:
+            sell += 1
+        if fast[i] > slow[i] and fast[i - 1] <= slow[i - 1]:
+            buy += 1
+        elif fast[i] < slow[i] and fast[i - 1] >= slow[i - 1]:
+            sell += 1
+        if close[i] < bb_lower[i]:
+            buy += 1
+        elif close[i] > bb_upper[i]:
+            sell += 1
+        if stoch_k[i] < 20 and stoch_d[i] < 20:
+            buy += 1
+        elif stoch_k[i] > 80 and stoch_d[i] > 80:
+            sell += 1
+        buy_votes[i] = buy
+        sell_votes[i] = sell
+        if buy >= 3 and sell < 2:
+            decision[i] = 1
+        elif sell >= 3 and buy < 2:
+            decision[i] = -1
+        else:
+            decision[i] = 0
+
+_kernel_jit = None
+
+def _jit_kernel():
+    global _kernel_jit
+    if _kernel_jit is None:
+        import numba
+        _kernel_jit = numba.njit(cache=True, nogil=True)(_kernel_python)
+    return _kernel_jit
+
+def signal_votes(close, rsi, macd_cross, ma_fast, ma_slow, bb_lower, bb_upper,
+                 stoch_k, stoch_d, jit=None):
+    """BUY/SELL votes and decision for every bar
+
+    Same rules as SignalGenerator.generate_signals applied to each bar and
+    the bar before it. Returns int8 arrays (buy_votes, sell_votes,
+    decision) with decision 1 = BUY, -1 = SELL, 0 = HOLD; bar 0 is HOLD.
+    jit=None uses the numba kernel when numba is installed.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    arrays = [
+        np.ascontiguousarray(a, dtype=np.float64)
+        for a in (rsi, ma_fast, ma_slow, bb_lower, bb_upper, stoch_k, stoch_d)
+    ]
+    rsi, ma_fast, ma_slow, bb_lower, bb_upper, stoch_k, stoch_d = arrays
+    cross = np.ascontiguousarray(macd_cross, dtype=np.bool_)
+
+    if jit is None:
+        jit = NUMBA_AVAILABLE
+    if jit:
+        if not NUMBA_AVAILABLE:
+            raise ImportError("numba is required for jit=True")
+        kernel = _jit_kernel()
+        n = len(close)
+        buy_votes = np.zeros(n, dtype=np.int8)
+        sell_votes = np.zeros(n, dtype=np.int8)
+        decision = np.zeros(n, dtype=np.int8)
+        kernel(close, rsi, cross, ma_fast, ma_slow, bb_lower, bb_upper,
+               stoch_k, stoch_d, buy_votes, sell_votes, decision)
+        return buy_votes, sell_votes, decision
+
+    buy_votes, sell_votes = _votes_numpy(
+        close, rsi, cross, ma_fast, ma_slow, bb_lower, bb_upper, stoch_k, stoch_d
+    )
+    return buy_votes, sell_votes, _decide_numpy(buy_votes, sell_votes)
+
+def frame_signal_votes(df, fast_col, slow_col, jit=None):
+    """signal_votes() over the indicator columns of a DataFrame"""
+    return signal_votes(
+        df['close'].to_numpy(), df['RSI'].to_numpy(),
+        df['MACD_cross'].to_numpy(dtype=bool), df[fast_col].to_numpy(),
+        df[slow_col].to_numpy(), df['BB_lower'].to_numpy(),
+        df['BB_upper'].to_numpy(), df['STOCH_K'].to_numpy(),
+        df['STOCH_D'].to_numpy(), jit=jit
+    )
@@ -0,0 +1,317 @@
+import math
+from collections import deque
+from indicators.candle_buffer import CandleBuffer
+
+NAN = float('nan')
+
+BOOL_COLUMNS = ('RSI_oversold', 'RSI_overbought', 'MACD_cross')
+
+
+class _RollingWindow:
+    """Rolling mean / population std over a fixed window in O(1) per update
+
+    Sums are kept relative to an offset that is re-centred on the window
+    mean whenever they are recomputed, so squares stay small at IDR price
+    levels. A window of one repeated value has a variance of exactly 0,
+    the same run-length check pandas' rolling var uses; the sums alone
+    would leave float noise there and a band width that isn't zero.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.offset = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nans = 0
+        self.commits = 0
+        self.last = None
+        self.run = 0  # trailing committed values equal to `last`
+
+    def update(self, x, commit=False):
+        """Return (mean, std) of the window ending at x; commit to keep x"""
+        offset = self.offset
+        if offset is None:
+            offset = x if x == x else 0.0
+
+        total, total_sq, nans = self.total, self.total_sq, self.nans
+        if x == x:
+            d = x - offset
+            total += d
+            total_sq += d * d
+        else:
+            nans += 1
+
+        count = len(self.values) + 1
+        old = None
+        if count > self.window:
+            old = self.values[0]
+            count = self.window
+            if old == old:
+                d = old - offset
+                total -= d
+                total_sq -= d * d
+            else:
+                nans -= 1
+
+        run = self.run + 1 if x == self.last else 1
+
+        if commit:
+            if old is not None:
+                self.values.popleft()
+            self.values.append(x)
+            self.offset = offset
+            self.total, self.total_sq, self.nans = total, total_sq, nans
+            self.last, self.run = x, run
+            self.commits += 1
+            if self.commits % self.window == 0:
+                self._resum()
+
+        if count < self.window or nans:
+            return NAN, NAN
+        mean = total / count
+        if run >= count:
+            return x, 0.0
+        var = max(total_sq / count - mean * mean, 0.0)
+        return mean + offset, math.sqrt(var)
+
+    def _resum(self):
+        """Recompute running sums exactly to stop floating point drift"""
+        present = [v for v in self.values if v == v]
+        if present:
+            self.offset = sum(present) / len(present)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nans = 0
+        for v in self.values:
+            if v == v:
+                d = v - self.offset
+                self.total += d
+                self.total_sq += d * d
+            else:
+                self.nans += 1
+
+
+class _Ema:
+    """Exponential moving average matching pandas ewm(adjust=False)"""
+
+    def __init__(self, alpha, min_periods):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def update(self, x, commit=False):
+        if x != x:
+            # Leading NaNs (e.g. MACD warm-up) are skipped like pandas does
+            return NAN
+        if self.value is None:
+            value = x
+        else:
+            value = self.value + self.alpha * (x - self.value)
+        count = self.count + 1
+        if commit:
+            self.value = value
+            self.count = count
+        return value if count >= self.min_periods else NAN
+
+
+class _RollingExtreme:
+    """Rolling min or max using a monotonic deque of committed values"""
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.is_max = mode == 'max'
+        self.candidates = deque()  # (index, value) for the last window-1 commits
+        self.index = -1
+
+    def _better(self, a, b):
+        return a >= b if self.is_max else a <= b
+
+    def update(self, x, commit=False):
+        index = self.index + 1
+        result = x
+        if self.candidates and not self._better(x, self.candidates[0][1]):
+            result = self.candidates[0][1]
+
+        if commit:
+            while self.candidates and self._better(x, self.candidates[-1][1]):
+                self.candidates.pop()
+            self.candidates.append((index, x))
+            while self.candidates and self.candidates[0][0] <= index - (self.window - 1):
+                self.candidates.popleft()
+            self.index = index
+
+        return result if index + 1 >= self.window else NAN
+
+
+class StreamingIndicators:
+    """Incremental version of TechnicalAnalysis.calculate_all_indicators
+
+    Keeps O(1) rolling state per indicator and produces the same columns
+    as the `ta` based batch calculation for the newest candle. The last
+    candle is treated as still forming: updating it again with the same
+    timestamp replaces it, a newer timestamp commits it. Rows are written
+    into a preallocated CandleBuffer; latest/previous are records of it.
+    """
+
+    def __init__(self, ma_fast=9, ma_slow=21, ma_trend=50, rsi_period=14,
+                 bb_period=20, bb_dev=2, macd_fast=12, macd_slow=26,
+                 macd_signal=9, stoch_period=14, stoch_smooth=3, atr_period=14,
+                 capacity=512):
+        self.columns = (
+            'timestamp', 'open', 'high', 'low', 'close', 'volume',
+            f'MA_{ma_fast}', f'MA_{ma_slow}', f'MA_{ma_trend}',
+            f'EMA_{macd_fast}', f'EMA_{macd_slow}',
+            'RSI', 'RSI_oversold', 'RSI_overbought',
+            'BB_upper', 'BB_middle', 'BB_lower', 'BB_width', 'BB_pct',
+            'MACD', 'MACD_signal', 'MACD_diff', 'MACD_cross',
+            'STOCH_K', 'STOCH_D', 'ATR'
+        )
+        self.buffer = CandleBuffer(self.columns, BOOL_COLUMNS, capacity)
+        self.ma_fast = _RollingWindow(ma_fast)
+        self.ma_slow = _RollingWindow(ma_slow)
+        self.ma_trend = _RollingWindow(ma_trend)
+        self.ema_fast = _Ema(2 / (macd_fast + 1), macd_fast)
+        self.ema_slow = _Ema(2 / (macd_slow + 1), macd_slow)
+        self.macd_signal = _Ema(2 / (macd_signal + 1), macd_signal)
+        self.rsi_period = rsi_period
+        self.rsi_up = _Ema(1 / rsi_period, rsi_period)
+        self.rsi_down = _Ema(1 / rsi_period, rsi_period)
+        self.bb = _RollingWindow(bb_period)
+        self.bb_dev = bb_dev
+        self.stoch_low = _RollingExtreme(stoch_period, 'min')
+        self.stoch_high = _RollingExtreme(stoch_period, 'max')
+        self.stoch_d = _RollingWindow(stoch_smooth)
+        self.atr_period = atr_period
+        self.atr = 0.0
+        self.tr_sum = 0.0
+        self.atr_count = 0
+
+        self.prev_close = None
+        self.pending = None
+        self.last_timestamp = None
+
+    @property
+    def latest(self):
+        """Record for the newest (forming) candle, None before the first
+
+        Records are views into the buffer; use buffer.to_dict() to keep one.
+        """
+        return self.buffer.row(-1) if self.buffer.size else None
+
+    @property
+    def previous(self):
+        """Record for the last completed candle"""
+        return self.buffer.row(-2) if self.buffer.size > 1 else None
+
+    def update(self, timestamp, open_, high, low, close, volume):
+        """Feed a candle and return the indicator row for it
+
+        A candle with the same timestamp as the previous call replaces the
+        forming candle; an older timestamp is ignored.
+        """
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return self.latest
+        candle = (timestamp, open_, high, low, close, volume)
+        if self.last_timestamp is None or timestamp > self.last_timestamp:
+            if self.pending is not None:
+                # Its buffered row already holds the values, only state moves
+                self._compute(self.pending, commit=True)
+            self.last_timestamp = timestamp
+            self.pending = candle
+            self.buffer.append(self._compute(candle, commit=False))
+        else:
+            self.pending = candle
+            self.buffer.set_last(self._compute(candle, commit=False))
+        return self.latest
+
+    def update_frame(self, df):
+        """Feed the rows of an OHLCV DataFrame that are not yet processed"""
+        if self.last_timestamp is not None:
+            df = df[df['timestamp'] >= self.last_timestamp]
+        for row in df[['timestamp', 'open', 'high', 'low', 'close', 'volume']].itertuples(index=False):
+            self.update(*row)
+        return self.latest
+
+    def _compute(self, candle, commit):
+        timestamp, open_, high, low, close, volume = candle
+
+        # Moving averages
+        ma_fast = self.ma_fast.update(close, commit)[0]
+        ma_slow = self.ma_slow.update(close, commit)[0]
+        ma_trend = self.ma_trend.update(close, commit)[0]
+        ema_fast = self.ema_fast.update(close, commit)
+        ema_slow = self.ema_slow.update(close, commit)
+
+        # RSI (Wilder smoothing, first diff counts as zero like `ta`)
+        if self.prev_close is None:
+            up = down = 0.0
+        else:
+            diff = close - self.prev_close
+            up = diff if diff > 0 else 0.0
+            down = -diff if diff < 0 else 0.0
+        ema_up = self.rsi_up.update(up, commit)
+        ema_down = self.rsi_down.update(down, commit)
+        if ema_down != ema_down:
+            rsi = NAN
+        elif ema_down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + ema_up / ema_down))
+
+        # Bollinger Bands
+        mavg, mstd = self.bb.update(close, commit)
+        upper = mavg + self.bb_dev * mstd
+        lower = mavg - self.bb_dev * mstd
+        bb_width = (upper - lower) / mavg * 100 if mavg == mavg else NAN
+        band = upper - lower
+        if band == band and band != 0:
+            bb_pct = (close - lower) / band
+        else:
+            bb_pct = NAN
+
+        # MACD
+        macd = ema_fast - ema_slow
+        signal = self.macd_signal.update(macd, commit)
+
+        # Stochastic Oscillator
+        smin = self.stoch_low.update(low, commit)
+        smax = self.stoch_high.update(high, commit)
+        if smin != smin or smax == smin:
+            stoch_k = NAN
+        else:
+            stoch_k = 100 * (close - smin) / (smax - smin)
+        stoch_d = self.stoch_d.update(stoch_k, commit)[0]
+
+        # ATR (same seeding as ta: zeros, then mean, then Wilder)
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close),
+                             abs(low - self.prev_close))
+        count = self.atr_count + 1
+        tr_sum = self.tr_sum
+        if count < self.atr_period:
+            tr_sum += true_range
+            atr = 0.0
+        elif count == self.atr_period:
+            tr_sum += true_range
+            atr = tr_sum / self.atr_period
+        else:
+            atr = (self.atr * (self.atr_period - 1) + true_range) / self.atr_period
+
+        if commit:
+            self.prev_close = close
+            self.atr_count = count
+            self.tr_sum = tr_sum
+            self.atr = atr
+
+        return (
+            timestamp, open_, high, low, close, volume,
+            ma_fast, ma_slow, ma_trend, ema_fast, ema_slow,
+            rsi, rsi < 30, rsi > 70,
+            upper, mavg, lower, bb_width, bb_pct,
+            macd, signal, macd - signal, macd > signal,
+            stoch_k, stoch_d, atr
+        )
\ No newline at end of file
@@ -3,8 +3,22 @@ import numpy as np
 import ta
 
 class TechnicalAnalysis:
-    def __init__(self, df):
+    def __init__(self, df, ma_fast=9, ma_slow=21, ma_trend=50, rsi_period=14,
+                 bb_period=20, bb_dev=2, macd_fast=12, macd_slow=26,
+                 macd_signal=9, stoch_period=14, stoch_smooth=3, atr_period=14):
         self.df = df.copy()
+        self.ma_fast = ma_fast
+        self.ma_slow = ma_slow
+        self.ma_trend = ma_trend
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.bb_dev = bb_dev
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.stoch_period = stoch_period
+        self.stoch_smooth = stoch_smooth
+        self.atr_period = atr_period
         
     def calculate_all_indicators(self):
         """Calculate all technical indicators"""
@@ -19,22 +33,21 @@ class TechnicalAnalysis:
     
     def _calculate_moving_averages(self):
         """Calculate moving averages"""
-        self.df['MA_9'] = ta.trend.sma_indicator(self.df['close'], window=9)
-        self.df['MA_21'] = ta.trend.sma_indicator(self.df['close'], window=21)
-        self.df['MA_50'] = ta.trend.sma_indicator(self.df['close'], window=50)
-        self.df['EMA_12'] = ta.trend.ema_indicator(self.df['close'], window=12)
-        self.df['EMA_26'] = ta.trend.ema_indicator(self.df['close'], window=26)
+        for window in (self.ma_fast, self.ma_slow, self.ma_trend):
+            self.df[f'MA_{window}'] = ta.trend.sma_indicator(self.df['close'], window=window)
+        for window in (self.macd_fast, self.macd_slow):
+            self.df[f'EMA_{window}'] = ta.trend.ema_indicator(self.df['close'], window=window)
         
     def _calculate_rsi(self):
         """Calculate RSI"""
-        self.df['RSI'] = ta.momentum.rsi(self.df['close'], window=14)
+        self.df['RSI'] = ta.momentum.rsi(self.df['close'], window=self.rsi_period)
         self.df['RSI_oversold'] = self.df['RSI'] < 30
         self.df['RSI_overbought'] = self.df['RSI'] > 70
         
     def _calculate_bollinger_bands(self):
         """Calculate Bollinger Bands"""
         bb = ta.volatility.BollingerBands(
-            self.df['close'], window=20, window_dev=2
+            self.df['close'], window=self.bb_period, window_dev=self.bb_dev
         )
         self.df['BB_upper'] = bb.bollinger_hband()
         self.df['BB_middle'] = bb.bollinger_mavg()
@@ -46,7 +59,12 @@ class TechnicalAnalysis:
         
     def _calculate_macd(self):
         """Calculate MACD"""
-        macd = ta.trend.MACD(self.df['close'])
+        macd = ta.trend.MACD(
+            self.df['close'],
+            window_slow=self.macd_slow,
+            window_fast=self.macd_fast,
+            window_sign=self.macd_signal
+        )
         self.df['MACD'] = macd.macd()
         self.df['MACD_signal'] = macd.macd_signal()
         self.df['MACD_diff'] = macd.macd_diff()
@@ -58,14 +76,32 @@ class TechnicalAnalysis:
             high=self.df['high'],
             low=self.df['low'],
             close=self.df['close'],
-            window=14,
-            smooth_window=3
+            window=self.stoch_period,
+            smooth_window=self.stoch_smooth
         )
         self.df['STOCH_K'] = stoch.stoch()
         self.df['STOCH_D'] = stoch.stoch_signal()
         
     def _calculate_atr(self):
-        """Calculate Average True Range"""
-        self.df['ATR'] = ta.volatility.average_true_range(
-            self.df['high'], self.df['low'], self.df['close'], window=14
-        )
\ No newline at end of file
+        """Calculate Average True Range
+        
+        Same values as ta.volatility.average_true_range (zeros, then the
+        mean true range, then Wilder smoothing) but computed with ewm
+        instead of ta's per-row Python loop, which dominates long backtests.
+        """
+        window = self.atr_period
+        prev_close = self.df['close'].shift(1)
+        true_range = pd.concat([
+            self.df['high'] - self.df['low'],
+            (self.df['high'] - prev_close).abs(),
+            (self.df['low'] - prev_close).abs()
+        ], axis=1).max(axis=1)
+        
+        atr = np.zeros(len(self.df))
+        if len(self.df) >= window:
+            seeded = true_range.iloc[window - 1:].copy()
+            seeded.iloc[0] = true_range.iloc[:window].mean()
+            atr[window - 1:] = seeded.ewm(
+                alpha=1 / window, adjust=False
+            ).mean().to_numpy()
+        self.df['ATR'] = atr
\ No newline at end of file
@@ -1,207 +1,576 @@
 import time
-import schedule
-import pandas as pd
-from datetime import datetime
+import threading
 from config.config import Config
 from exchange.indodax_api import IndodaxAPI
-from indicators.technical_analysis import TechnicalAnalysis
+from indicators.streaming_indicators import StreamingIndicators
 from indicators.signal_generator import SignalGenerator
 from strategies.scalping_strategy import ScalpingStrategy
 from database.db_handler import DatabaseHandler
+from database.state_journal import StateJournal
+from engine.multi_pair_engine import MultiPairEngine
+from exchange.transport import HttpTransport
+from marketdata.websocket_feed import MarketDataFeed
+from marketdata.trade_tape import TradeTape
+from marketdata.history_store import HistoryStore
+from marketdata.candle_cache import CandleCache
+from marketdata.order_book import OrderBooks, limit_price
+from execution.order_manager import OrderManager
+from risk.risk_engine import RiskEngine
 from utils.logger import TradingLogger
-from utils.helpers import sleep_until_next_candle
+from utils.metrics import REGISTRY, MetricsServer
+from utils.scheduler import Scheduler
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'cycle_stage_seconds', 'Duration of each trading cycle stage'
+)
+STAGE_ERRORS = REGISTRY.counter(
+    'cycle_stage_errors_total', 'Trading cycles aborted by an error, by stage'
+)
+SIGNALS = REGISTRY.counter('signals_total', 'Generated signals')
+TRADES = REGISTRY.counter('trades_total', 'Executed trades')
 
 class TradingBot:
     def __init__(self):
         self.config = Config()
         api_keys = self.config.get_api_keys()
-        self.api = IndodaxAPI(api_keys['api_key'], api_keys['secret_key'])
-        self.db = DatabaseHandler()
-        self.logger = TradingLogger()
-        self.strategy = ScalpingStrategy(self.config)
+        self.transport = HttpTransport(
+            public_rate=self.config.public_rate_limit,
+            private_rate=self.config.private_rate_limit,
+            burst=self.config.api_burst,
+            timeout=(self.config.connect_timeout, self.config.read_timeout),
+            max_retries=self.config.max_retries,
+            pool_size=max(10, self.config.max_workers * 2)
+        )
+        self.api = IndodaxAPI(
+            api_keys['api_key'], api_keys['secret_key'],
+            self.transport, self.config.base_url
+        )
+        self.logger = TradingLogger.from_config(self.config)
+        self.db = DatabaseHandler(async_writes=self.config.db_async_writes, logger=self.logger)
+        self.history = HistoryStore(self.config.history_dir)
+        self.candles = CandleCache(
+            self.api,
+            self.history,
+            self.config.base_timeframe,
+            self.config.timeframes,
+            capacity=self.config.candle_buffer_size,
+            warmup=max(self.config.indicator_params().values())
+        )
+        
+        # Per-pair strategy and indicator state; open positions survive
+        # restarts through the journal
+        self.journal = StateJournal(
+            self.config.state_dir, sync=self.config.state_sync,
+            sync_interval=self.config.state_sync_interval
+        )
+        self.strategies = {
+            pair: ScalpingStrategy(self.config, self.journal, pair)
+            for pair in self.config.pairs
+        }
+        self.indicators = {
+            pair: StreamingIndicators(**self.config.indicator_params())
+            for pair in self.config.pairs
+        }
+        # Higher timeframe trend, resampled from the same base candles
+        self.trend_indicators = {}
+        self.trend_ready = {}
+        if self.config.trend_timeframe:
+            self.trend_indicators = {
+                pair: StreamingIndicators(**self.config.indicator_params())
+                for pair in self.config.pairs
+            }
+        self.strategy = self.strategies[self.config.pairs[0]]
+        self.engine = MultiPairEngine(
+            self, self.config.pairs, self.config.max_workers
+        )
+        self.scheduler = Scheduler(logger=self.logger)
         self.running = True
         
-        # Initial balance
+        # L2 order books, used to size and price orders against liquidity
+        self.books = None
+        if self.config.order_book_enabled:
+            self.books = OrderBooks(
+                self.api, self.config.pairs, self.config.order_book_max_age
+            )
+        
+        # Live market data, lets SL/TP react to every trade
+        self.feed = None
+        if self.config.websocket_enabled:
+            self.feed = MarketDataFeed(
+                self.api,
+                self.config.pairs,
+                url=self.config.ws_url,
+                token=self.config.ws_token,
+                order_books=self.books,
+                max_price_age=self.config.ws_max_price_age,
+                logger=self.logger
+            )
+            self.feed.add_listener(self.on_tick)
+        
+        # Trade tape, streamed from the feed or polled in the fetch stage
+        self.tape = None
+        if self.config.trade_tape_enabled:
+            self.tape = TradeTape(
+                self.api,
+                self.config.pairs,
+                window=self.config.trade_tape_window,
+                large_multiple=self.config.trade_tape_large_multiple,
+                min_trades=self.config.trade_tape_min_trades,
+                max_seen=self.config.trade_tape_max_seen
+            )
+            if self.feed is not None:
+                self.feed.add_listener(self.tape.on_trade)
+        
+        # Local /metrics endpoint and on-demand sampling profiler
+        self.metrics_server = None
+        if self.config.metrics_enabled:
+            self.metrics_server = MetricsServer(
+                self.config.metrics_host, self.config.metrics_port
+            )
+        
+        # Initial balance (shared IDR balance across all pairs)
         self.balance = self.config.config.get('initial_balance', 1000000)
+        if self.config.test_mode:
+            self.balance = self.journal.get('balance', {}).get('balance', self.balance)
+        self.balance_lock = threading.Lock()
         
-    def fetch_market_data(self):
-        """Fetch OHLCV data from Indodax"""
-        try:
-            # Convert timeframe to seconds
-            timeframe_seconds = int(self.config.timeframe[:-1]) * 60
-            
-            # Get OHLCV data
-            ohlcv_data = self.api.get_ohlcv(
-                self.config.pair,
-                interval=timeframe_seconds,
-                limit=100
+        # Portfolio exposure/PnL and the pre-trade limits
+        self.risk = RiskEngine.from_config(self.config, self.balance, journal=self.journal)
+        for pair, strategy in self.strategies.items():
+            if strategy.position == 'LONG':
+                self.risk.restore_position(pair, strategy.position_size, strategy.entry_price)
+        
+        # Live orders: async placement, fill tracking, repricing
+        self.orders = None
+        if not self.config.test_mode:
+            self.orders = OrderManager(
+                self.api,
+                reprice=self.reprice_order,
+                on_done=self.on_order_done,
+                poll_interval=self.config.order_poll_interval,
+                stale_after=self.config.order_stale_after,
+                max_reprices=self.config.max_reprices
             )
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(ohlcv_data)
-            df.columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
-            
-            return df
+        
+    def fetch_market_data(self, pair=None):
+        """Fetch new OHLCV candles from Indodax
+        
+        Returns {timeframe: [timestamp, open, high, low, close, volume] rows}
+        for every configured timeframe: the whole warm-started buffers on
+        the first call, then only the new and the updated forming candles.
+        """
+        pair = pair or self.config.pair
+        try:
+            return self.candles.refresh(pair)
             
         except Exception as e:
-            self.logger.log_error(f"Error fetching market data: {e}")
+            self.logger.log_error(f"Error fetching market data for {pair}: {e}", pair=pair, stage='fetch')
             return None
     
-    def analyze_market(self, df):
+    def poll_trade_tape(self, pair):
+        """Add the trades since the last poll to the tape (REST, no feed)"""
+        if self.tape is None or self.feed is not None:
+            return
+        try:
+            self.tape.poll(pair)
+        except Exception as e:
+            self.logger.log_error(f"Error polling trades for {pair}: {e}", pair=pair, stage='tape')
+    
+    def analyze_market(self, candles, pair=None, trend_candles=None):
         """Perform technical analysis"""
+        pair = pair or self.config.pair
         try:
-            # Calculate indicators
-            ta = TechnicalAnalysis(df)
-            df_with_indicators = ta.calculate_all_indicators()
+            # Update indicators incrementally with the new/forming candles only
+            indicators = self.indicators[pair]
+            for candle in candles:
+                indicators.update(*candle)
+            latest = indicators.latest
+            previous = indicators.previous
             
             # Generate signals
-            sg = SignalGenerator(df_with_indicators)
-            signal = sg.generate_signals()
+            signal = 'HOLD'
+            if previous is not None:
+                sg = SignalGenerator(
+                    ma_fast=self.config.ma_fast, ma_slow=self.config.ma_slow,
+                    ma_trend=self.config.ma_trend,
+                    tape_imbalance=self.config.trade_tape_imbalance
+                )
+                tape = self.tape.stats(pair) if self.tape is not None else None
+                signal = sg.generate_signals_from_rows(latest, previous, tape)
+                
+                # Higher timeframe trend filter
+                trend = self.trend_indicators.get(pair)
+                if trend is not None:
+                    for candle in trend_candles or ():
+                        trend.update(*candle)
+                    ready = sg.trend_ready(trend.latest)
+                    if self.trend_ready.get(pair) != ready:
+                        self.trend_ready[pair] = ready
+                        self.logger.log_trend_filter(
+                            pair, self.config.trend_timeframe, ready,
+                            trend.buffer.size, self.config.ma_trend
+                        )
+                    signal = sg.apply_trend_filter(signal, trend.latest)
             
             # Get latest indicators for logging
             latest_indicators = {
-                'rsi': df_with_indicators['RSI'].iloc[-1],
-                'macd': df_with_indicators['MACD'].iloc[-1],
-                'ma_9': df_with_indicators['MA_9'].iloc[-1],
-                'ma_21': df_with_indicators['MA_21'].iloc[-1]
+                'rsi': latest['RSI'],
+                'macd': latest['MACD'],
+                'ma_fast': latest[f'MA_{self.config.ma_fast}'],
+                'ma_slow': latest[f'MA_{self.config.ma_slow}']
             }
             
-            return signal, latest_indicators, df_with_indicators
+            return signal, latest_indicators, latest
             
         except Exception as e:
-            self.logger.log_error(f"Error in market analysis: {e}")
-            return 'HOLD', {}, df
+            self.logger.log_error(f"Error in market analysis for {pair}: {e}", pair=pair, stage='analyze')
+            # No new candles this cycle: nothing to fall back to, skip the pair
+            latest_candle = dict(zip(CANDLE_COLUMNS, candles[-1])) if candles else None
+            return 'HOLD', {}, latest_candle
+    
+    def order_price(self, book, action, amount, current_price):
+        """Limit price that fills `amount` against the book, else current_price"""
+        return limit_price(book, action, amount, current_price)
     
-    def execute_trading_cycle(self):
+    def execute_trade(self, pair, action, current_price, amount, signal):
+        """Execute a trade in paper or live mode and log it
+        
+        Returns False when a paper BUY can't be paid for; the strategy's
+        entry is undone so it doesn't hold a position that was never bought.
+        """
+        if self.config.test_mode:
+            # Paper trading, as a marketable order paying the taker fee
+            fee = current_price * amount * self.config.taker_fee
+            if action == 'BUY':
+                cost = current_price * amount + fee
+                if cost > self.balance:
+                    strategy = self.strategies.get(pair)
+                    if strategy is not None:
+                        strategy.position = None
+                        strategy.position_size = 0
+                        strategy.save()
+                    self.logger.logger.info(
+                        f"{pair}: paper BUY skipped, cost {cost:,.0f} IDR over balance"
+                    )
+                    return False
+                self.balance -= cost
+                self.risk.on_fill(pair, action, current_price, amount, fee=fee)
+                self.logger.log_trade(
+                    f"[PAPER] {action}",
+                    pair,
+                    current_price,
+                    amount
+                )
+            elif action == 'SELL':
+                revenue = current_price * amount - fee
+                self.balance += revenue
+                self.risk.on_fill(pair, action, current_price, amount, fee=fee)
+                self.logger.log_trade(
+                    f"[PAPER] {action}",
+                    pair,
+                    current_price,
+                    amount
+                )
+            self.journal.record('balance', {'balance': self.balance})
+        else:
+            # Real trading: placed and tracked off the cycle thread,
+            # logged from on_order_done with the actual fill
+            self.orders.submit(pair, action, current_price, amount, tag=signal)
+            return True
+                
+        TRADES.inc(pair=pair, action=action)
+        
+        # Log to database
+        self.db.log_trade(
+            pair,
+            action,
+            current_price,
+            amount,
+            signal,
+            self.balance,
+            fee=fee
+        )
+        return True
+    
+    def reprice_order(self, order):
+        """New limit price for the remainder of a stale live order"""
+        book = self.books.fresh(order.pair) if self.books is not None else None
+        price = self.order_price(book, order.side, order.remaining, None)
+        if price is None:
+            ticker = self.api.get_ticker(order.pair)
+            price = float(ticker['ticker']['last'])
+        return price
+    
+    def on_order_done(self, order):
+        """Sync strategy, balance and trade log with a finished live order"""
+        strategy = self.strategies.get(order.pair)
+        with self.balance_lock:
+            if strategy is not None:
+                if order.side == 'BUY' and order.filled < order.amount:
+                    # Only what was bought is held
+                    strategy.position_size = order.filled
+                    if not order.filled:
+                        strategy.position = None
+                elif order.side == 'SELL' and order.remaining > 0:
+                    # Still holding the unsold part, exit again next cycle
+                    strategy.position = 'LONG'
+                    strategy.position_size = order.remaining
+                strategy.save()
+            
+            fee = 0.0
+            if order.filled:
+                # Indodax doesn't report fees per order, estimate at the taker rate
+                fee = order.avg_price * order.filled * self.config.taker_fee
+                self.risk.on_fill(order.pair, order.side, order.avg_price, order.filled, fee=fee)
+        
+        # getInfo round trip, outside the lock so cycles and exits keep going
+        self.reconcile_balance()
+        
+        if order.error:
+            self.logger.log_error(
+                f"Order {order.id} {order.pair} {order.status}: {order.error}",
+                pair=order.pair, stage='order'
+            )
+        if not order.filled:
+            return
+        self.logger.log_trade(order.side, order.pair, order.avg_price, order.filled)
+        TRADES.inc(pair=order.pair, action=order.side)
+        self.db.log_trade(
+            order.pair,
+            order.side,
+            order.avg_price,
+            order.filled,
+            order.tag,
+            self.balance,
+            fee=fee
+        )
+    
+    def execute_trading_cycle(self, pair=None):
         """Execute one complete trading cycle"""
+        pair = pair or self.config.pair
+        stage = 'fetch'
+        started = time.perf_counter()
         try:
             # 1. Fetch market data
-            df = self.fetch_market_data()
-            if df is None or df.empty:
+            with STAGE_SECONDS.time(stage=stage, pair=pair):
+                updates = self.fetch_market_data(pair) or {}
+                self.poll_trade_tape(pair)
+            candles = updates.get(self.config.timeframe)
+            if not candles and self.indicators[pair].latest is None:
                 return
                 
             # 2. Analyze market
-            signal, indicators, df_analyzed = self.analyze_market(df)
+            stage = 'analyze'
+            with STAGE_SECONDS.time(stage=stage, pair=pair):
+                signal, indicators, latest_candle = self.analyze_market(
+                    candles or [], pair, updates.get(self.config.trend_timeframe)
+                )
+            if latest_candle is None:
+                return
+            SIGNALS.inc(pair=pair, signal=signal)
             
-            # 3. Get current price
-            ticker = self.api.get_ticker(self.config.pair)
-            current_price = float(ticker['ticker']['last'])
+            # 3. Get current price (from the live feed when available)
+            stage = 'price'
+            with STAGE_SECONDS.time(stage=stage, pair=pair):
+                current_price = self.feed.last_price(pair) if self.feed else None
+                if current_price is None:
+                    ticker = self.api.get_ticker(pair)
+                    current_price = float(ticker['ticker']['last'])
+            self.risk.mark(pair, current_price)
             
-            # 4. Execute strategy
-            action, amount = self.strategy.execute_strategy(
-                signal, current_price, self.balance
-            )
+            # Order book, only needed when this cycle may trade
+            strategy = self.strategies[pair]
+            book = None
+            if self.books is not None and (signal in ('BUY', 'SELL') or strategy.position):
+                stage = 'book'
+                with STAGE_SECONDS.time(stage=stage, pair=pair):
+                    book = self.books.fresh(pair)
             
-            # 5. Execute trade if needed
-            if action in ['BUY', 'SELL'] and amount > 0:
-                if self.config.test_mode:
-                    # Paper trading
-                    if action == 'BUY':
-                        cost = current_price * amount
-                        if cost <= self.balance:
-                            self.balance -= cost
-                            self.logger.log_trade(
-                                f"[PAPER] {action}",
-                                self.config.pair,
-                                current_price,
-                                amount
-                            )
-                    elif action == 'SELL':
-                        revenue = current_price * amount
-                        self.balance += revenue
-                        self.logger.log_trade(
-                            f"[PAPER] {action}",
-                            self.config.pair,
-                            current_price,
-                            amount
-                        )
-                else:
-                    # Real trading
-                    response = self.api.place_order(
-                        self.config.pair,
-                        action.lower(),
-                        current_price,
-                        amount
+            # 4. Execute strategy
+            stage = 'execute'
+            with STAGE_SECONDS.time(stage=stage, pair=pair):
+                max_amount = None
+                if book is not None and book.best_ask() is not None:
+                    max_amount = book.max_amount('BUY', self.config.max_slippage)
+                with self.balance_lock:
+                    # Pre-trade risk check, entries are sized against equity
+                    if signal == 'BUY' and not strategy.position:
+                        allowed = self.risk.max_buy(pair, current_price)
+                        max_amount = allowed if max_amount is None else min(max_amount, allowed)
+                        if not allowed:
+                            self.logger.logger.info(f"{pair}: entry blocked by risk limits")
+                    action, amount = strategy.execute_strategy(
+                        signal, current_price, self.risk.equity(), max_amount
                     )
-                    if response.get('success') == 1:
-                        self.logger.log_trade(
-                            action, self.config.pair, current_price, amount
-                        )
-                        
-                        # Update balance
-                        balance_info = self.api.get_balance()
-                        # Parse balance info based on Indodax response
-                        
-                # Log to database
-                self.db.log_trade(
-                    self.config.pair,
-                    action,
-                    current_price,
-                    amount,
-                    signal,
-                    self.balance
-                )
+                    
+                    # 5. Execute trade if needed
+                    if action in ['BUY', 'SELL'] and amount > 0:
+                        price = self.order_price(book, action, amount, current_price)
+                        self.execute_trade(pair, action, price, amount, signal)
             
             # 6. Log market data
-            latest_candle = df_analyzed.iloc[-1].to_dict()
-            self.db.log_market_data(
-                self.config.pair,
-                {
-                    't': int(time.time() * 1000),
-                    'o': latest_candle['open'],
-                    'h': latest_candle['high'],
-                    'l': latest_candle['low'],
-                    'c': latest_candle['close'],
-                    'v': latest_candle['volume']
-                },
-                indicators
-            )
+            stage = 'db'
+            with STAGE_SECONDS.time(stage=stage, pair=pair):
+                self.db.log_market_data(
+                    pair,
+                    {
+                        't': int(time.time() * 1000),
+                        'o': latest_candle['open'],
+                        'h': latest_candle['high'],
+                        'l': latest_candle['low'],
+                        'c': latest_candle['close'],
+                        'v': latest_candle['volume']
+                    },
+                    indicators
+                )
             
             # 7. Log signal
-            self.logger.log_signal(signal, indicators)
+            stage = 'log'
+            self.logger.log_signal(signal, indicators, pair)
             
-            # 8. Log current status
-            print(f"\n{'='*50}")
-            print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"Pair: {self.config.pair}")
-            print(f"Price: {current_price:,.0f} IDR")
-            print(f"Signal: {signal}")
-            print(f"Action: {action}")
-            print(f"Balance: {self.balance:,.0f} IDR")
-            print(f"RSI: {indicators.get('rsi', 0):.2f}")
-            print(f"MACD: {indicators.get('macd', 0):.6f}")
-            print(f"{'='*50}\n")
+            # 8. Log current status, one structured record off the trading thread
+            self.logger.log_cycle(
+                pair, current_price, signal, action, self.balance,
+                (time.perf_counter() - started) * 1e3
+            )
             
         except Exception as e:
-            self.logger.log_error(f"Error in trading cycle: {e}")
+            STAGE_ERRORS.inc(stage=stage, pair=pair)
+            self.logger.log_error(
+                f"Error in trading cycle for {pair} ({stage}): {e}", pair=pair, stage=stage
+            )
+    
+    def on_tick(self, pair, price, trade):
+        """Check stop loss / take profit on every trade from the live feed"""
+        self.risk.mark(pair, price)
+        strategy = self.strategies.get(pair)
+        if strategy is None or strategy.position is None:
+            return
+        try:
+            with self.balance_lock:
+                action, amount = strategy.check_exit(price)
+                if action == 'SELL' and amount > 0:
+                    self.execute_trade(pair, action, price, amount, 'TICK')
+        except Exception as e:
+            self.logger.log_error(f"Error handling tick for {pair}: {e}", pair=pair, stage='tick')
+    
+    def check_restored_positions(self, balances):
+        """Clamp journaled positions to the coins actually held"""
+        for pair, strategy in self.strategies.items():
+            if strategy.position != 'LONG':
+                continue
+            held = balances.get(pair.split('_')[0], 0.0)
+            if held < strategy.position_size:
+                self.logger.log_error(
+                    f"{pair}: journal has {strategy.position_size}, account holds {held}"
+                )
+                strategy.position_size = held
+                if held <= 0:
+                    strategy.position = None
+                strategy.save()
+            else:
+                self.logger.logger.info(
+                    f"Resuming {pair} position {strategy.position_size} @ {strategy.entry_price} "
+                    f"(SL {strategy.stop_loss}, TP {strategy.take_profit})"
+                )
     
     def run(self):
         """Main bot loop"""
         self.logger.logger.info("Starting Trading Bot...")
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            self.logger.logger.info(
+                f"Metrics on http://{self.config.metrics_host}:{self.metrics_server.port}/metrics"
+            )
+        if self.feed is not None:
+            self.feed.start()
+        if self.orders is not None:
+            balances = self.orders.reconcile()
+            if balances is not None:
+                self.balance = balances.get('idr', self.balance)
+                self.check_restored_positions(balances)
+                self.risk.sync(self.balance, balances)
+            self.orders.start()
+        self.risk.start_day()
         
-        # Calculate timeframe in minutes
-        timeframe_minutes = int(self.config.timeframe[:-1])
+        # Candle-aligned cycle plus intra-candle jobs at their own cadence
+        self.scheduler.every(
+            'cycle', self.config.timeframe_seconds, self.trading_cycle,
+            offset=self.config.candle_settle_delay,
+            policy=self.config.cycle_overrun_policy
+        )
+        self.scheduler.every('exits', self.config.exit_check_interval, self.check_exits)
+        self.scheduler.every('db_flush', self.config.db_flush_interval, self.db.flush)
+        if self.orders is not None:
+            self.scheduler.every(
+                'reconcile', self.config.reconcile_interval, self.reconcile_balance
+            )
         
-        while self.running:
-            try:
-                # Execute trading cycle
-                self.execute_trading_cycle()
-                
-                # Sleep until next candle
-                sleep_until_next_candle(timeframe_minutes)
-                
-            except KeyboardInterrupt:
-                self.logger.logger.info("Bot stopped by user")
-                self.running = False
-                break
-            except Exception as e:
-                self.logger.log_error(f"Unexpected error: {e}")
-                time.sleep(60)  # Wait 1 minute before retrying
+        # First cycle right away, then on the candle grid
+        self.trading_cycle()
+        self.scheduler.start()
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.logger.logger.info("Bot stopped by user")
+            self.stop()
+    
+    def trading_cycle(self):
+        """Execute trading cycle for all pairs concurrently"""
+        elapsed = self.engine.run_cycle(self.config.timeframe_seconds)
+        self.logger.logger.info(
+            f"Cycle for {len(self.config.pairs)} pairs took {elapsed:.2f}s"
+        )
+        # Which pairs move together, once per candle and off the order path
+        self.risk.update_correlations({
+            pair: self.candles.candles(pair, self.config.timeframe)[:, 4]
+            for pair in self.config.pairs
+        })
+    
+    def check_exits(self):
+        """Stop loss / take profit between cycles for open positions"""
+        for pair, strategy in self.strategies.items():
+            if strategy.position is None:
+                continue
+            price = self.feed.last_price(pair) if self.feed else None
+            if price is None:
+                ticker = self.api.get_ticker(pair)
+                price = float(ticker['ticker']['last'])
+            self.on_tick(pair, price, None)
+    
+    def reconcile_balance(self):
+        """Refresh the IDR balance from the exchange, locking only to apply it"""
+        balances = self.orders.reconcile()
+        if balances is not None:
+            with self.balance_lock:
+                self.balance = balances.get('idr', self.balance)
+                self.risk.sync(self.balance, balances)
     
     def stop(self):
         """Stop the bot"""
         self.running = False
+        self.scheduler.stop()
+        if self.feed is not None:
+            self.feed.stop()
+        self.engine.shutdown()
+        if self.orders is not None:
+            self.orders.stop(cancel_open=True)
+        self.transport.close()
+        self.db.close()
+        self.journal.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.logger.close()
 
 if __name__ == "__main__":
-    bot = TradingBot()
-    bot.run()
\ No newline at end of file
+    config = Config()
+    if config.worker_processes:
+        # Pairs sharded over worker processes, see engine/sharded_runner.py
+        from engine.sharded_runner import ShardedRunner
+        ShardedRunner(config).run()
+    else:
+        bot = TradingBot()
+        bot.run()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import threading
+import time
+import numpy as np
+from marketdata.candles import CandleRing
+from marketdata.resampler import Resampler, timeframe_seconds
+
+def parse_ohlcv(data):
+    """Normalize a /tradingview/history response to [t, o, h, l, c, v] rows
+
+    Accepts TradingView UDF dicts ({'t': [...], 'o': [...], ...}), lists of
+    dicts with Time/Open/... keys, or lists of 6-value rows.
+    """
+    if isinstance(data, dict):
+        if data.get('s') not in (None, 'ok'):
+            return []
+        keys = ('t', 'o', 'h', 'l', 'c', 'v')
+        return [list(row) for row in zip(*(data.get(k, []) for k in keys))]
+    rows = []
+    for item in data or []:
+        if isinstance(item, dict):
+            rows.append([
+                item.get('Time', item.get('time')),
+                item.get('Open', item.get('open')),
+                item.get('High', item.get('high')),
+                item.get('Low', item.get('low')),
+                item.get('Close', item.get('close')),
+                item.get('Volume', item.get('volume'))
+            ])
+        else:
+            rows.append(list(item[:6]))
+    return [[float(v) for v in row] for row in rows]
+
+class CandleCache:
+    """Warm-started, delta-fetched candles per pair for several timeframes
+
+    Only the base timeframe is fetched and stored; every other timeframe
+    is resampled from it in memory, so a 1h trend filter next to 5m
+    signals costs no extra requests. Each pair is seeded from the
+    HistoryStore at startup; afterwards only base candles since the last
+    stored timestamp are requested.
+
+    A resampled timeframe needs `warmup` candles before its indicators
+    are valid, e.g. 50 hourly bars for an MA_50 trend filter: that is
+    3000 1m candles, more than a fresh history or the cold-start fetch
+    may hold. Such a timeframe is fetched directly once, on the pair's
+    first refresh, and its older candles filled in from that.
+    """
+
+    def __init__(self, api, history, base_timeframe='1m', timeframes=('5m',),
+                 capacity=500, limit=100, warmup=0):
+        self.api = api
+        self.history = history
+        self.base_timeframe = base_timeframe
+        self.base_seconds = timeframe_seconds(base_timeframe)
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self.limit = limit
+        self.warmup = min(warmup, capacity)
+        # Base candles needed to fill every timeframe's buffer
+        largest = max([self.base_seconds] + [timeframe_seconds(tf) for tf in self.timeframes])
+        self.span = largest // self.base_seconds
+        self.resamplers = {}
+        self.seeded = set()
+        self.lock = threading.Lock()
+
+    def _resampler(self, pair):
+        with self.lock:
+            if pair not in self.resamplers:
+                self.resamplers[pair] = Resampler(
+                    self.base_timeframe, self.timeframes, self.capacity
+                )
+            return self.resamplers[pair]
+
+    def seed(self, pair):
+        """Load the most recent stored base candles and resample them"""
+        resampler = self._resampler(pair)
+        if self.history is not None:
+            stored = self.history.tail(pair, self.base_timeframe, self.capacity * self.span)
+            if len(stored['timestamp']):
+                resampler.seed(np.column_stack([
+                    stored[col] for col in ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+                ]).astype('float64'))
+        self.seeded.add(pair)
+        return resampler
+
+    def refresh(self, pair):
+        """Fetch the base delta, return {timeframe: rows to process}
+
+        The first call for a pair returns the whole warm-started buffers so
+        indicators can be seeded; later calls return only the new and the
+        updated forming candles of each timeframe.
+        """
+        first = pair not in self.seeded
+        resampler = self.seed(pair) if first else self._resampler(pair)
+
+        ring = resampler.aggregators[self.base_timeframe].ring
+        last = ring.last_timestamp()
+        now = time.time()
+        if last is None:
+            # Cold start: `limit` candles of the largest timeframe in one request
+            since = now - self.base_seconds * self.span * self.limit
+        else:
+            # Refetch from the forming candle, but never more than fits
+            since = max(last, now - self.base_seconds * self.span * self.capacity)
+
+        data = self.api.get_ohlcv(
+            pair, interval=self.base_seconds, limit=self.limit, since=since
+        )
+        rows = parse_ohlcv(data)
+        changed = resampler.update(rows)
+
+        if changed[self.base_timeframe] and self.history is not None:
+            self.history.append(pair, self.base_timeframe, changed[self.base_timeframe])
+
+        if first:
+            self._backfill(pair, resampler, now)
+            return {
+                timeframe: [list(row) for row in resampler.candles(timeframe)]
+                for timeframe in resampler.timeframes
+            }
+        return changed
+
+    def _backfill(self, pair, resampler, now):
+        """Fetch timeframes still short of `warmup` candles at their own resolution"""
+        for timeframe, aggregator in resampler.aggregators.items():
+            if timeframe == self.base_timeframe or aggregator.ring.count >= self.warmup:
+                continue
+            seconds = aggregator.seconds
+            data = self.api.get_ohlcv(
+                pair, interval=seconds, limit=self.warmup + 1,
+                since=now - seconds * (self.warmup + 1)
+            )
+            aggregator.backfill(parse_ohlcv(data))
+
+    def candles(self, pair, timeframe=None):
+        """Buffered candles for a pair and timeframe, oldest first"""
+        return self._resampler(pair).candles(timeframe or self.base_timeframe)
+
+    def frame(self, pair, timeframe=None):
+        """Buffered candles as an OHLCV DataFrame for TechnicalAnalysis"""
+        return self._resampler(pair).frame(timeframe or self.base_timeframe)
@@ -0,0 +1,47 @@
+import numpy as np
+
+class CandleRing:
+    """Fixed-capacity ring buffer of [t, o, h, l, c, v] candles"""
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 6), dtype='float64')
+        self.head = 0  # index of the oldest candle
+        self.count = 0
+
+    def last_timestamp(self):
+        if not self.count:
+            return None
+        return self.data[(self.head + self.count - 1) % self.capacity, 0]
+
+    def push(self, row):
+        if self.count < self.capacity:
+            self.data[(self.head + self.count) % self.capacity] = row
+            self.count += 1
+        else:
+            self.data[self.head] = row
+            self.head = (self.head + 1) % self.capacity
+
+    def replace_last(self, row):
+        self.data[(self.head + self.count - 1) % self.capacity] = row
+
+    def merge(self, rows):
+        """Append newer candles and replace the forming one; return changed rows"""
+        changed = []
+        for row in rows:
+            last = self.last_timestamp()
+            if last is None or row[0] > last:
+                self.push(row)
+            elif row[0] == last:
+                self.replace_last(row)
+            else:
+                continue
+            changed.append(row)
+        return changed
+
+    def to_array(self):
+        """Candles oldest first (a copy)"""
+        end = self.head + self.count
+        if end <= self.capacity:
+            return self.data[self.head:end].copy()
+        return np.concatenate([self.data[self.head:], self.data[:end - self.capacity]])
@@ -0,0 +1,187 @@
+import os
+import threading
+import numpy as np
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = {
+    'timestamp': np.dtype('<i8'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<f8'),
+}
+
+def _to_columns(rows):
+    """Rows ([ts, o, h, l, c, v] lists, 2D array, DataFrame or column dict)
+    to sorted columns that are unique by timestamp"""
+    if isinstance(rows, dict):
+        data = {col: rows[col] for col in COLUMNS}
+    elif hasattr(rows, 'columns'):
+        data = {col: rows[col].to_numpy() for col in COLUMNS}
+    else:
+        array = np.asarray(rows, dtype='float64').reshape(-1, len(COLUMNS))
+        data = {col: array[:, i] for i, col in enumerate(COLUMNS)}
+    data = {col: np.asarray(values, dtype=DTYPES[col]) for col, values in data.items()}
+
+    # Sort by timestamp and keep the last occurrence of duplicates
+    ts = data['timestamp']
+    order = np.argsort(ts, kind='stable')
+    ts = ts[order]
+    keep = np.ones(len(ts), dtype=bool)
+    keep[:-1] = ts[1:] != ts[:-1]
+    return {col: values[order][keep] for col, values in data.items()}
+
+class _Series:
+    """One pair/timeframe: a directory with one raw binary file per column"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.maps = None
+        os.makedirs(path, exist_ok=True)
+        self._repair()
+
+    def _file(self, col):
+        return os.path.join(self.path, f"{col}.bin")
+
+    def _repair(self):
+        """Truncate columns to a common length after an interrupted append"""
+        lengths = []
+        for col in COLUMNS:
+            path = self._file(col)
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            lengths.append(os.path.getsize(path) // DTYPES[col].itemsize)
+        rows = min(lengths)
+        for col, length in zip(COLUMNS, lengths):
+            if length != rows:
+                with open(self._file(col), 'r+b') as f:
+                    f.truncate(rows * DTYPES[col].itemsize)
+
+    def __len__(self):
+        return os.path.getsize(self._file('timestamp')) // DTYPES['timestamp'].itemsize
+
+    def arrays(self):
+        """Read-only memory maps of every column (cached until the next write)"""
+        if self.maps is None:
+            n = len(self)
+            if n == 0:
+                self.maps = {col: np.empty(0, dtype=DTYPES[col]) for col in COLUMNS}
+            else:
+                self.maps = {
+                    col: np.memmap(self._file(col), dtype=DTYPES[col], mode='r', shape=(n,))
+                    for col in COLUMNS
+                }
+        return self.maps
+
+    def last_timestamp(self):
+        n = len(self)
+        if n == 0:
+            return None
+        with open(self._file('timestamp'), 'rb') as f:
+            f.seek((n - 1) * DTYPES['timestamp'].itemsize)
+            return int(np.frombuffer(f.read(8), dtype=DTYPES['timestamp'])[0])
+
+    def write(self, data):
+        """Append new candles, replace the last one, merge older ones"""
+        if not len(data['timestamp']):
+            return 0
+        last = self.last_timestamp()
+        if last is not None and data['timestamp'][0] < last:
+            # Closed candles we already have are final, only keep missing ones
+            ts = self.arrays()['timestamp']
+            old = data['timestamp'] < last
+            pos = np.searchsorted(ts, data['timestamp'][old])
+            known = np.zeros(len(data['timestamp']), dtype=bool)
+            known[np.flatnonzero(old)] = (pos < len(ts)) & (ts[np.minimum(pos, len(ts) - 1)] == data['timestamp'][old])
+            data = {col: values[~known] for col, values in data.items()}
+            if not len(data['timestamp']):
+                return 0
+        self.maps = None
+
+        if last is None or data['timestamp'][0] >= last:
+            start = 0
+            if last is not None and data['timestamp'][0] == last:
+                # Forming candle updated: overwrite the last row in place
+                n = len(self)
+                for col in COLUMNS:
+                    with open(self._file(col), 'r+b') as f:
+                        f.seek((n - 1) * DTYPES[col].itemsize)
+                        f.write(data[col][:1].tobytes())
+                start = 1
+            for col in COLUMNS:
+                with open(self._file(col), 'ab') as f:
+                    f.write(data[col][start:].tobytes())
+            return len(data['timestamp']) - start
+
+        # Candles older than our last one (backfill): merge and rewrite
+        existing = {col: np.array(values) for col, values in self.arrays().items()}
+        self.maps = None
+        merged = {col: np.concatenate([existing[col], data[col]]) for col in COLUMNS}
+        before = len(existing['timestamp'])
+        merged = _to_columns(merged)
+        for col in COLUMNS:
+            tmp = self._file(col) + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(merged[col].tobytes())
+            os.replace(tmp, self._file(col))
+        return len(merged['timestamp']) - before
+
+class HistoryStore:
+    """Columnar, append-only OHLCV history on local disk
+
+    Every fetched candle is persisted once per (pair, timeframe), one raw
+    little-endian file per column, so appends are plain file appends and
+    reads are zero-copy memory maps. load() returns contiguous NumPy views
+    of a time range found by binary search on the timestamp column.
+    """
+
+    def __init__(self, root='database/history'):
+        self.root = root
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _series(self, pair, timeframe):
+        key = (pair, str(timeframe))
+        with self.lock:
+            if key not in self.series:
+                self.series[key] = _Series(os.path.join(self.root, pair, str(timeframe)))
+            return self.series[key]
+
+    def append(self, pair, timeframe, rows):
+        """Persist candles, de-duplicated by timestamp; returns new row count"""
+        data = _to_columns(rows)
+        series = self._series(pair, timeframe)
+        with series.lock:
+            return series.write(data)
+
+    def last_timestamp(self, pair, timeframe):
+        series = self._series(pair, timeframe)
+        with series.lock:
+            return series.last_timestamp()
+
+    def count(self, pair, timeframe):
+        return len(self._series(pair, timeframe))
+
+    def load(self, pair, timeframe, start=None, end=None):
+        """Columns for start <= timestamp < end as read-only views (no copies)"""
+        series = self._series(pair, timeframe)
+        with series.lock:
+            arrays = series.arrays()
+        ts = arrays['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+        return {col: arrays[col][lo:hi] for col in COLUMNS}
+
+    def tail(self, pair, timeframe, n):
+        """Last n candles as read-only views"""
+        series = self._series(pair, timeframe)
+        with series.lock:
+            arrays = series.arrays()
+        return {col: arrays[col][-n:] if n else arrays[col][:0] for col in COLUMNS}
+
+    def pairs(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
\ No newline at end of file
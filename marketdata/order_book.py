@@ -0,0 +1,309 @@
+import bisect
+import threading
+import time
+
+class BookSide:
+    """Price levels of one side, kept sorted best-first with bisect
+
+    Levels live in a dict (price -> amount) plus a sorted key list; bids
+    use negated prices as keys so index 0 is the best level on both
+    sides. Updating an existing level is O(1), adding or removing one is
+    a binary search plus a list insert/delete.
+    """
+
+    __slots__ = ('sign', 'keys', 'sizes')
+
+    def __init__(self, descending=False):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = []
+        self.sizes = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set(self, price, amount):
+        """Set the amount at a price level, amount <= 0 removes it"""
+        if amount <= 0:
+            if self.sizes.pop(price, None) is not None:
+                key = self.sign * price
+                del self.keys[bisect.bisect_left(self.keys, key)]
+            return
+        if price not in self.sizes:
+            bisect.insort(self.keys, self.sign * price)
+        self.sizes[price] = amount
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+
+    def best(self):
+        """(price, amount) of the best level or None"""
+        if not self.keys:
+            return None
+        price = self.sign * self.keys[0]
+        return price, self.sizes[price]
+
+    def levels(self, depth=None):
+        """[(price, amount)] best-first, the top `depth` levels when given"""
+        keys = self.keys if depth is None else self.keys[:depth]
+        sign = self.sign
+        sizes = self.sizes
+        return [(sign * key, sizes[sign * key]) for key in keys]
+
+    def volume(self, depth=None):
+        """Total amount on the top `depth` levels"""
+        keys = self.keys if depth is None else self.keys[:depth]
+        sign = self.sign
+        sizes = self.sizes
+        return sum(sizes[sign * key] for key in keys)
+
+    def walk(self, amount):
+        """Fill `amount` against this side
+
+        Returns (filled, cost, worst_price); filled < amount when the book
+        does not have enough liquidity.
+        """
+        filled = 0.0
+        cost = 0.0
+        worst = None
+        sign = self.sign
+        for key in self.keys:
+            if filled >= amount:
+                break
+            price = sign * key
+            take = min(self.sizes[price], amount - filled)
+            filled += take
+            cost += take * price
+            worst = price
+        return filled, cost, worst
+
+class OrderBook:
+    """Incrementally maintained L2 order book for one pair
+
+    Snapshots (REST /depth or the websocket order-book channel) are
+    diffed against the current levels so only changed levels are touched;
+    single-level deltas go through update(). Queries read the sorted
+    levels directly and take microseconds.
+    """
+
+    def __init__(self, pair):
+        self.pair = pair
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide()
+        self.lock = threading.RLock()
+        self.updated = 0.0
+        self.snapshots = 0
+        self.changes = 0
+
+    def _side(self, side):
+        side = side.lower()
+        if side in ('buy', 'bid', 'bids'):
+            return self.bids
+        if side in ('sell', 'ask', 'asks'):
+            return self.asks
+        raise ValueError(f"Unknown order book side: {side}")
+
+    def apply_snapshot(self, bids, asks):
+        """Replace the book with [(price, amount)] levels, touching only changes"""
+        with self.lock:
+            for book_side, levels in ((self.bids, bids), (self.asks, asks)):
+                new = {}
+                for price, amount in levels:
+                    price = float(price)
+                    new[price] = new.get(price, 0.0) + float(amount)
+                for price in [p for p in book_side.sizes if p not in new]:
+                    book_side.set(price, 0)
+                    self.changes += 1
+                for price, amount in new.items():
+                    if book_side.sizes.get(price) != amount:
+                        book_side.set(price, amount)
+                        self.changes += 1
+            self.snapshots += 1
+            self.updated = time.time()
+
+    def update(self, side, price, amount):
+        """Apply one level delta; amount 0 removes the level"""
+        with self.lock:
+            self._side(side).set(float(price), float(amount))
+            self.changes += 1
+            self.updated = time.time()
+
+    def age(self):
+        return time.time() - self.updated if self.updated else float('inf')
+
+    def best_bid(self):
+        with self.lock:
+            level = self.bids.best()
+        return level[0] if level else None
+
+    def best_ask(self):
+        with self.lock:
+            level = self.asks.best()
+        return level[0] if level else None
+
+    def spread(self):
+        """Relative bid/ask spread, None when a side is empty"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (ask - bid) / ((ask + bid) / 2)
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def weighted_mid(self, depth=5):
+        """Depth-weighted mid: leans towards the side with less resting volume"""
+        with self.lock:
+            bid, ask = self.best_bid(), self.best_ask()
+            if bid is None or ask is None:
+                return None
+            bid_volume = self.bids.volume(depth)
+            ask_volume = self.asks.volume(depth)
+        total = bid_volume + ask_volume
+        if total <= 0:
+            return (bid + ask) / 2
+        return (bid * ask_volume + ask * bid_volume) / total
+
+    def imbalance(self, depth=5):
+        """(bid volume - ask volume) / total over the top levels, in [-1, 1]"""
+        with self.lock:
+            bid_volume = self.bids.volume(depth)
+            ask_volume = self.asks.volume(depth)
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total > 0 else 0.0
+
+    def estimate_fill(self, action, amount):
+        """Expected fill of a marketable order of `amount` coins
+
+        A BUY walks the asks, a SELL the bids. Returns a dict with the
+        average and worst price, the filled amount and the slippage of
+        the average price against the best level, or None for an empty
+        side.
+        """
+        book_side = self.asks if action.upper() == 'BUY' else self.bids
+        with self.lock:
+            best = book_side.best()
+            if best is None:
+                return None
+            filled, cost, worst = book_side.walk(amount)
+        avg_price = cost / filled if filled else best[0]
+        return {
+            'avg_price': avg_price,
+            'worst_price': worst if worst is not None else best[0],
+            'filled': filled,
+            'complete': filled >= amount,
+            'slippage': abs(avg_price - best[0]) / best[0]
+        }
+
+    def slippage(self, action, amount):
+        """Relative slippage of the average fill price, inf when too thin"""
+        fill = self.estimate_fill(action, amount)
+        if fill is None or not fill['complete']:
+            return float('inf')
+        return fill['slippage']
+
+    def max_amount(self, action, max_slippage):
+        """Largest amount whose average fill stays within max_slippage"""
+        book_side = self.asks if action.upper() == 'BUY' else self.bids
+        with self.lock:
+            levels = book_side.levels()
+        if not levels:
+            return 0.0
+        best = levels[0][0]
+        # Average price bound; filling a level at `price` keeps the
+        # average within it while cost <= limit * filled
+        limit = best * (1 + max_slippage) if action.upper() == 'BUY' else best * (1 - max_slippage)
+        filled = 0.0
+        cost = 0.0
+        for price, amount in levels:
+            within = (cost + amount * price <= limit * (filled + amount)
+                      if action.upper() == 'BUY'
+                      else cost + amount * price >= limit * (filled + amount))
+            if within:
+                filled += amount
+                cost += amount * price
+                continue
+            # Partial level: solve cost + x * price == limit * (filled + x)
+            denominator = price - limit
+            if denominator:
+                filled += max(0.0, (limit * filled - cost) / denominator)
+            break
+        return filled
+
+    def to_dict(self, depth=10):
+        with self.lock:
+            return {
+                'pair': self.pair,
+                'bids': self.bids.levels(depth),
+                'asks': self.asks.levels(depth),
+                'updated': self.updated
+            }
+
+def parse_depth(data):
+    """REST /depth ({'buy': [[price, amount]], 'sell': [...]}) or websocket
+    order-book data ({'bid': [{'price', '<coin>_volume'}], 'ask': [...]})
+    to (bids, asks) lists of (price, amount)"""
+    def levels(rows):
+        parsed = []
+        for row in rows or []:
+            if isinstance(row, dict):
+                amount = next(
+                    (v for k, v in row.items() if k.endswith('_volume') and not k.startswith('idr')),
+                    0
+                )
+                parsed.append((float(row['price']), float(amount)))
+            else:
+                parsed.append((float(row[0]), float(row[1])))
+        return parsed
+
+    if 'buy' in data or 'sell' in data:
+        return levels(data.get('buy')), levels(data.get('sell'))
+    return levels(data.get('bid')), levels(data.get('ask'))
+
+def limit_price(book, action, amount, fallback):
+    """Limit price that fills `amount` against the book, else fallback"""
+    if book is None:
+        return fallback
+    fill = book.estimate_fill(action, amount)
+    if fill is None or not fill['complete']:
+        return fallback
+    return fill['worst_price']
+
+class OrderBooks:
+    """Order books for all pairs, refreshed from REST when stale
+
+    The websocket feed keeps books current when enabled; otherwise
+    fresh() pulls a /depth snapshot at most once per max_age seconds.
+    """
+
+    def __init__(self, api, pairs=(), max_age=2.0):
+        self.api = api
+        self.max_age = max_age
+        self.books = {pair: OrderBook(pair) for pair in pairs}
+        self.lock = threading.Lock()
+
+    def get(self, pair):
+        with self.lock:
+            if pair not in self.books:
+                self.books[pair] = OrderBook(pair)
+            return self.books[pair]
+
+    def apply_snapshot(self, pair, data):
+        bids, asks = parse_depth(data)
+        book = self.get(pair)
+        book.apply_snapshot(bids, asks)
+        return book
+
+    def refresh(self, pair):
+        """Fetch a /depth snapshot into the pair's book"""
+        return self.apply_snapshot(pair, self.api.get_order_book(pair))
+
+    def fresh(self, pair):
+        """The pair's book, refreshed first when older than max_age"""
+        book = self.get(pair)
+        if book.age() > self.max_age:
+            book = self.refresh(pair)
+        return book
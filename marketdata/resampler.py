@@ -0,0 +1,177 @@
+import numpy as np
+from marketdata.candles import CandleRing
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+def timeframe_seconds(timeframe):
+    """'1m' -> 60, '4h' -> 14400, '1d' -> 86400; ints are already seconds"""
+    if isinstance(timeframe, (int, np.integer)):
+        return int(timeframe)
+    unit = timeframe[-1].lower()
+    if unit not in UNIT_SECONDS or not timeframe[:-1].isdigit():
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return int(timeframe[:-1]) * UNIT_SECONDS[unit]
+
+def resample(rows, seconds):
+    """Aggregate [t, o, h, l, c, v] rows (sorted by t) into `seconds` candles
+
+    Vectorized counterpart of TimeframeAggregator for whole histories;
+    returns a float64 array with one row per non-empty bucket.
+    """
+    rows = np.asarray(rows, dtype='float64').reshape(-1, 6)
+    if not len(rows):
+        return rows.copy()
+    ts = rows[:, 0]
+    buckets = ts - ts % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(rows)] - 1
+    return np.column_stack([
+        buckets[starts],
+        rows[starts, 1],
+        np.maximum.reduceat(rows[:, 2], starts),
+        np.minimum.reduceat(rows[:, 3], starts),
+        rows[ends, 4],
+        np.add.reduceat(rows[:, 5], starts)
+    ])
+
+class TimeframeAggregator:
+    """Candles of one timeframe built incrementally from base candles
+
+    Base candles may be sent repeatedly while they form; a newer base
+    timestamp closes the previous one. Closed base candles of the current
+    bucket are folded into one partial candle, so every update is O(1)
+    no matter how many base candles a bucket holds.
+    """
+
+    def __init__(self, seconds, capacity=500):
+        self.seconds = seconds
+        self.ring = CandleRing(capacity)
+        self.closed = None  # fold of the closed base candles of the last bucket
+        self.base = None  # forming base candle
+
+    def bucket(self, timestamp):
+        return timestamp - timestamp % self.seconds
+
+    def update(self, row):
+        """Apply a base candle, return the updated candle (None if too old)"""
+        if self.base is not None and row[0] < self.base[0]:
+            return None
+        if self.base is not None and row[0] > self.base[0]:
+            self._fold(self.base)
+        self.base = list(row[:6])
+
+        start = self.bucket(row[0])
+        closed = self.closed
+        if closed is not None and closed[0] == start:
+            candle = [start, closed[1], max(closed[2], row[2]), min(closed[3], row[3]),
+                      row[4], closed[5] + row[5]]
+        else:
+            candle = [start, row[1], row[2], row[3], row[4], row[5]]
+
+        if self.ring.last_timestamp() == start:
+            self.ring.replace_last(candle)
+        else:
+            self.ring.push(candle)
+        return candle
+
+    def _fold(self, row):
+        start = self.bucket(row[0])
+        closed = self.closed
+        if closed is None or closed[0] != start:
+            self.closed = [start, row[1], row[2], row[3], row[4], row[5]]
+        else:
+            closed[2] = max(closed[2], row[2])
+            closed[3] = min(closed[3], row[3])
+            closed[4] = row[4]
+            closed[5] += row[5]
+
+    def seed(self, rows):
+        """Load history: complete buckets in bulk, the last one incrementally"""
+        rows = np.asarray(rows, dtype='float64').reshape(-1, 6)
+        if not len(rows):
+            return
+        if self.base is not None:
+            rows = rows[rows[:, 0] >= self.base[0]]
+        else:
+            last = self.bucket(rows[-1, 0])
+            head = rows[:, 0] < last
+            self.ring.merge(resample(rows[head], self.seconds))
+            rows = rows[~head]
+        for row in rows:
+            self.update(row.tolist())
+
+    def backfill(self, rows):
+        """Put candles of this timeframe fetched directly before the buffer
+
+        For when the base history is too short to build enough of them:
+        rows older than the first closed candle are prepended and that
+        one, likely built from a partial bucket, is replaced too. The
+        forming candle stays with the base stream. Returns how many were
+        added.
+        """
+        rows = np.asarray(rows, dtype='float64').reshape(-1, 6)
+        current = self.ring.to_array()
+        if len(current) < 2 or not len(rows):
+            return 0
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+        rows = rows[rows[:, 0] <= current[0, 0]]
+        if not len(rows):
+            return 0
+        current = current[current[:, 0] > rows[-1, 0]]
+        ring = CandleRing(self.ring.capacity)
+        ring.merge(np.concatenate([rows, current])[-ring.capacity:])
+        self.ring = ring
+        return len(rows)
+
+class Resampler:
+    """1m/5m/15m/1h/4h/... candles of one pair from a single base stream
+
+    Feed base candles (e.g. 1m from /tradingview/history) and every
+    configured timeframe is kept up to date without extra API calls. Each timeframe must be a whole
+    multiple of the base timeframe.
+    """
+
+    def __init__(self, base_timeframe='1m', timeframes=('5m',), capacity=500):
+        self.base_timeframe = base_timeframe
+        self.base_seconds = timeframe_seconds(base_timeframe)
+        self.aggregators = {}
+        for timeframe in dict.fromkeys((base_timeframe,) + tuple(timeframes)):
+            seconds = timeframe_seconds(timeframe)
+            if seconds % self.base_seconds:
+                raise ValueError(
+                    f"{timeframe} is not a multiple of the {base_timeframe} base timeframe"
+                )
+            self.aggregators[timeframe] = TimeframeAggregator(seconds, capacity)
+
+    @property
+    def timeframes(self):
+        return list(self.aggregators)
+
+    def update(self, rows):
+        """Apply base candles, return {timeframe: changed candles}
+
+        Changed candles are the final version of candles closed by these
+        rows followed by the forming one, ready for StreamingIndicators.
+        """
+        changed = {timeframe: {} for timeframe in self.aggregators}
+        for row in rows:
+            for timeframe, aggregator in self.aggregators.items():
+                candle = aggregator.update(row)
+                if candle is not None:
+                    changed[timeframe][candle[0]] = candle
+        return {timeframe: list(candles.values()) for timeframe, candles in changed.items()}
+
+    def seed(self, rows):
+        for aggregator in self.aggregators.values():
+            aggregator.seed(rows)
+
+    def candles(self, timeframe):
+        """Candles of one timeframe, oldest first, the last one forming"""
+        return self.aggregators[timeframe].ring.to_array()
+
+    def frame(self, timeframe):
+        """Candles of one timeframe as an OHLCV DataFrame for TechnicalAnalysis"""
+        import pandas as pd
+        return pd.DataFrame(self.candles(timeframe), columns=CANDLE_COLUMNS)
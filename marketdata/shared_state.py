@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+from utils.metrics import REGISTRY
+
+LOCK_TAKEOVERS = REGISTRY.counter(
+    'shared_lock_takeovers_total', 'Ring locks taken over from a process that died holding them'
+)
+
+# Header counters and flags
+CYCLE, TICKS, STOP = 0, 1, 2
+HEADER_SLOTS = 4
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SharedMarketState:
+    """Candle rings, tickers and account figures in one shared memory block
+
+    Written by the market-data process (candles, tickers) and the gateway
+    (equity, balance), read in place by the worker processes. Every
+    (pair, timeframe) has a CandleRing-style ring of [t, o, h, l, c, v]
+    rows behind its own multiprocessing Lock, held only to merge rows in
+    or copy the tail out, so nothing is pickled between processes. The
+    lock's acquire/release are the memory barriers, which keeps this
+    correct on weakly ordered CPUs (ARM phones) too. Tickers, account
+    figures and header counters are single aligned 8-byte values, read on
+    their own.
+
+    The locks travel with the object: pass the state itself as a spawn
+    Process argument and the child attaches to the block by name. A ring
+    lock whose holder was killed is taken over after `lock_timeout`
+    seconds (the holder's pid is kept next to the ring), so a crashed
+    worker can't stall the market-data process for good.
+
+    Layout: int64 header, int64 [owner pid, head, count] per ring, float64
+    [price, time] per pair, float64 [equity, balance], float64 rings.
+    """
+
+    def __init__(self, pairs, timeframes, capacity=500, name=None, create=False,
+                 locks=None, lock_timeout=2.0):
+        self.pairs = list(pairs)
+        self.timeframes = list(timeframes)
+        self.capacity = capacity
+        self.slots = {
+            (pair, tf): i
+            for i, (pair, tf) in enumerate((p, t) for p in self.pairs for t in self.timeframes)
+        }
+        shapes = [
+            ('header', np.int64, (HEADER_SLOTS,)),
+            ('meta', np.int64, (len(self.slots), 3)),
+            ('tickers', np.float64, (len(self.pairs), 2)),
+            ('account', np.float64, (2,)),
+            ('rings', np.float64, (len(self.slots), capacity, 6)),
+        ]
+        if locks is None:
+            if not create:
+                raise ValueError("attach to a SharedMarketState by passing it to the process")
+            locks = [multiprocessing.get_context('spawn').Lock() for _ in self.slots]
+        self.locks = locks
+        self.lock_timeout = lock_timeout
+        size = sum(int(np.prod(shape)) * 8 for _, _, shape in shapes)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.name = self.shm.name
+        self.owner = create
+        offset = 0
+        for attr, dtype, shape in shapes:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, attr, array)
+            offset += array.nbytes
+        if create:
+            for attr, _, _ in shapes:
+                getattr(self, attr)[...] = 0
+        self.pair_index = {pair: i for i, pair in enumerate(self.pairs)}
+
+    def __reduce__(self):
+        # Processes get the block name and the ring locks, never the arrays
+        return (SharedMarketState, (
+            self.pairs, self.timeframes, self.capacity, self.name, False,
+            self.locks, self.lock_timeout
+        ))
+
+    @contextmanager
+    def _locked(self, slot):
+        lock = self.locks[slot]
+        meta = self.meta[slot]
+        while not lock.acquire(timeout=self.lock_timeout):
+            owner = int(meta[0])
+            if owner and not _alive(owner):
+                # Killed inside the critical section, the lock is ours now
+                LOCK_TAKEOVERS.inc()
+                break
+        meta[0] = os.getpid()
+        try:
+            yield meta, self.rings[slot]
+        finally:
+            meta[0] = 0
+            lock.release()
+
+    # Writer side (one process per field group)
+
+    def publish(self, pair, timeframe, rows):
+        """Merge candles into a ring: newer ones are appended, the forming one replaced"""
+        with self._locked(self.slots[(pair, timeframe)]) as (meta, ring):
+            for row in rows:
+                head, count = meta[1], meta[2]
+                last = ring[(head + count - 1) % self.capacity, 0] if count else None
+                if last is None or row[0] > last:
+                    if count < self.capacity:
+                        ring[(head + count) % self.capacity] = row
+                        meta[2] = count + 1
+                    else:
+                        ring[head] = row
+                        meta[1] = (head + 1) % self.capacity
+                elif row[0] == last:
+                    ring[(head + count - 1) % self.capacity] = row
+
+    def set_ticker(self, pair, price, timestamp=None):
+        ticker = self.tickers[self.pair_index[pair]]
+        ticker[1] = timestamp if timestamp is not None else time.time()
+        ticker[0] = price
+
+    def set_account(self, equity, balance):
+        self.account[0] = equity
+        self.account[1] = balance
+
+    def bump(self, counter):
+        """Tell the readers a cycle (CYCLE) or a ticker round (TICKS) is ready"""
+        self.header[counter] += 1
+
+    def request_stop(self):
+        # A flag rather than a multiprocessing.Event: a process killed
+        # while waiting on an Event can leave its lock held
+        self.header[STOP] = 1
+
+    def stopping(self):
+        return bool(self.header[STOP])
+
+    def wait_stop(self, timeout):
+        """Sleep up to `timeout` seconds; True once a stop was requested"""
+        deadline = time.monotonic() + timeout
+        while not self.stopping():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(remaining, 0.1))
+        return True
+
+    # Reader side
+
+    def counter(self, counter):
+        return int(self.header[counter])
+
+    def ticker(self, pair):
+        price = self.tickers[self.pair_index[pair], 0]
+        return float(price) if price else None
+
+    def equity(self):
+        return float(self.account[0])
+
+    def balance(self):
+        return float(self.account[1])
+
+    def candles_since(self, pair, timeframe, since=None):
+        """Rows with timestamp >= since (all rows when None), oldest first
+
+        Only the matching tail is copied out of the ring, normally the
+        forming candle and any that closed since the last read.
+        """
+        with self._locked(self.slots[(pair, timeframe)]) as (meta, ring):
+            head, count = int(meta[1]), int(meta[2])
+            start = 0
+            if since is not None and count:
+                # Walk back from the newest row, the delta is short
+                start = count
+                while start > 0 and ring[(head + start - 1) % self.capacity, 0] >= since:
+                    start -= 1
+            index = (head + np.arange(start, count)) % self.capacity
+            return ring[index]
+
+    def close(self):
+        # Drop the numpy views before the buffer is released
+        self.header = self.meta = self.tickers = self.account = self.rings = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
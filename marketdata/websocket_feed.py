@@ -0,0 +1,255 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+import websocket
+from utils.metrics import REGISTRY
+
+WS_ERRORS = REGISTRY.counter('ws_errors_total', 'Websocket connect/listen failures')
+
+DEFAULT_WS_URL = 'wss://ws3.indodax.com/ws/'
+
+def channel_pair(pair):
+    """'btc_idr' -> 'btcidr' as used in websocket channel names"""
+    return pair.replace('_', '').lower()
+
+class PairState:
+    """Live market state for one pair kept in memory by the feed"""
+
+    def __init__(self, pair, max_trades=1000):
+        self.pair = pair
+        self.last_price = None
+        self.last_trade_id = None
+        self.updated = 0.0
+        self.ticker = {}
+        self.trades = deque(maxlen=max_trades)
+
+class MarketDataFeed:
+    """Streaming ticker/trade state from the Indodax websocket
+
+    Runs in a background thread, reconnects with jittered backoff, and
+    uses the channel offsets to detect missed messages. Gaps and
+    reconnects are backfilled from the REST trades endpoint so no trade
+    is lost. Listeners are called for every new trade so the strategy
+    can react per tick instead of once per candle; candles come from the
+    CandleCache REST delta, which is authoritative and already cheap.
+    """
+
+    def __init__(self, api, pairs, url=DEFAULT_WS_URL, token=None, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0, timeout=30, order_books=None,
+                 max_price_age=10.0, logger=None):
+        self.api = api
+        self.logger = logger
+        self.pairs = list(pairs)
+        self.url = url
+        self.token = token
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.timeout = timeout
+        self.max_price_age = max_price_age
+
+        self.states = {pair: PairState(pair) for pair in self.pairs}
+        self.channels = {
+            f"market:trade-activity-{channel_pair(pair)}": pair for pair in self.pairs
+        }
+        # Order book snapshots go straight into the shared OrderBooks
+        self.order_books = order_books
+        self.book_channels = {}
+        if order_books is not None:
+            self.book_channels = {
+                f"market:order-book-{channel_pair(pair)}": pair for pair in self.pairs
+            }
+        self.offsets = {}
+        self.listeners = []
+        self.lock = threading.RLock()
+
+        self.ws = None
+        self.thread = None
+        self.running = False
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.gaps = 0
+        self.listener_errors = 0
+
+    def add_listener(self, callback):
+        """Register callback(pair, price, trade) called on every new trade"""
+        self.listeners.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='ws-feed', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        ws = self.ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def last_price(self, pair):
+        """Last traded price, None when older than max_price_age seconds
+
+        A quiet pair or a feed stuck reconnecting shouldn't drive SL/TP or
+        order pricing with an old price; on None callers use the REST ticker.
+        """
+        state = self.states.get(pair)
+        if state is None or state.last_price is None:
+            return None
+        if time.time() - state.updated > self.max_price_age:
+            return None
+        return state.last_price
+
+    def _run(self):
+        delay = self.reconnect_delay
+        first = True
+        while self.running:
+            try:
+                self._connect()
+                if not first:
+                    self.reconnects += 1
+                    # Anything traded while we were away comes from REST
+                    for pair in self.pairs:
+                        self.backfill(pair)
+                first = False
+                delay = self.reconnect_delay
+                self._listen()
+            except Exception as e:
+                if self.running:
+                    # Stopping closes the socket under recv, that's not an error
+                    stage = 'listen' if self.connected.is_set() else 'connect'
+                    WS_ERRORS.inc(stage=stage)
+                    if self.logger is not None:
+                        self.logger.logger.warning(
+                            f"Websocket {stage} failed: {type(e).__name__}: {e}",
+                            extra={'event': 'ws_error', 'stage': stage}
+                        )
+            finally:
+                self.connected.clear()
+                if self.ws is not None:
+                    try:
+                        self.ws.close()
+                    except Exception:
+                        pass
+                    self.ws = None
+
+            if self.running:
+                time.sleep(random.uniform(0, delay))
+                delay = min(self.max_reconnect_delay, delay * 2)
+
+    def _connect(self):
+        self.ws = websocket.create_connection(self.url, timeout=self.timeout)
+        request_id = 1
+        self.ws.send(json.dumps({'params': {'token': self.token}, 'id': request_id}))
+        for channel in list(self.channels) + list(self.book_channels):
+            request_id += 1
+            self.ws.send(json.dumps({
+                'method': 1,
+                'params': {'channel': channel},
+                'id': request_id
+            }))
+        self.connected.set()
+
+    def _listen(self):
+        while self.running:
+            raw = self.ws.recv()
+            if not raw:
+                raise ConnectionError('websocket closed')
+            # The server may batch several JSON messages separated by newlines
+            for line in raw.splitlines():
+                if line.strip():
+                    self.handle_message(line)
+
+    def handle_message(self, line):
+        """Process one websocket message (public for replay/testing)"""
+        message = json.loads(line)
+        if not message:
+            # Empty message is a server ping
+            if self.ws is not None:
+                self.ws.send('{}')
+            return
+
+        result = message.get('result') or {}
+        channel = result.get('channel')
+        if channel in self.book_channels:
+            data = (result.get('data') or {}).get('data')
+            if data:
+                self.order_books.apply_snapshot(self.book_channels[channel], data)
+            return
+        pair = self.channels.get(channel)
+        if pair is None:
+            return
+
+        data = result.get('data') or {}
+        offset = data.get('offset')
+        if offset is not None:
+            last = self.offsets.get(channel)
+            if last is not None and offset > last + 1:
+                self.gaps += 1
+                self.backfill(pair)
+            if last is None or offset > last:
+                self.offsets[channel] = offset
+
+        for row in data.get('data') or []:
+            # [pair, timestamp, trade id, side, price, idr volume, coin volume]
+            self.apply_trade(
+                pair,
+                trade_id=int(row[2]),
+                timestamp=int(row[1]),
+                side=row[3],
+                price=float(row[4]),
+                amount=float(row[6])
+            )
+
+    def backfill(self, pair):
+        """Fill missed trades from the REST trades endpoint"""
+        try:
+            trades = self.api.get_trades(pair)
+        except Exception:
+            return 0
+
+        applied = 0
+        for trade in sorted(trades, key=lambda t: int(t['tid'])):
+            if self.apply_trade(
+                pair,
+                trade_id=int(trade['tid']),
+                timestamp=int(trade['date']),
+                side=trade.get('type'),
+                price=float(trade['price']),
+                amount=float(trade['amount'])
+            ):
+                applied += 1
+        return applied
+
+    def apply_trade(self, pair, trade_id, timestamp, side, price, amount):
+        """Apply a trade once, return False if it was already seen"""
+        with self.lock:
+            state = self.states[pair]
+            if state.last_trade_id is not None and trade_id <= state.last_trade_id:
+                return False
+            trade = {
+                'tid': trade_id,
+                'date': timestamp,
+                'type': side,
+                'price': price,
+                'amount': amount
+            }
+            state.last_trade_id = trade_id
+            state.last_price = price
+            state.updated = time.time()
+            state.ticker['last'] = price
+            state.trades.append(trade)
+
+        for listener in self.listeners:
+            try:
+                listener(pair, price, trade)
+            except Exception:
+                self.listener_errors += 1
+        return True
\ No newline at end of file
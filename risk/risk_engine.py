@@ -0,0 +1,298 @@
+import math
+import threading
+import time
+import numpy as np
+from utils.metrics import REGISTRY
+
+RISK_EQUITY = REGISTRY.gauge('risk_equity', 'Cash plus marked value of open positions (IDR)')
+RISK_GROSS = REGISTRY.gauge('risk_gross_exposure', 'Marked value of open positions (IDR)')
+RISK_UNREALIZED = REGISTRY.gauge('risk_unrealized_pnl', 'Open PnL of all positions (IDR)')
+RISK_REALIZED = REGISTRY.gauge('risk_realized_pnl_today', 'Realized PnL since the day started (IDR)')
+RISK_DAILY_LOSS = REGISTRY.gauge('risk_daily_loss', 'Equity lost since the day started, fraction')
+RISK_HALTED = REGISTRY.gauge('risk_halted', '1 while new entries are blocked by max_daily_loss')
+RISK_REJECTED = REGISTRY.counter('risk_rejected_total', 'Entries blocked, by limit')
+
+DAY = 86400
+
+class Position:
+    """Holdings of one pair, marked at the last seen price"""
+
+    __slots__ = ('amount', 'cost', 'price')
+
+    def __init__(self):
+        self.amount = 0.0
+        self.cost = 0.0  # IDR paid for `amount`, fees included
+        self.price = 0.0
+
+    @property
+    def value(self):
+        return self.amount * self.price
+
+    @property
+    def unrealized(self):
+        return self.value - self.cost
+
+class RiskEngine:
+    """Portfolio exposure, PnL and loss limits across all pairs
+
+    Positions, gross exposure and unrealized PnL are kept as running
+    totals: mark() on every tick is O(1), on_fill() is O(pairs) and the
+    pre-trade check max_buy() only reads totals, so it is O(1) however
+    many pairs are traded. Entries are capped by:
+
+    - max_daily_loss: no new entries once equity fell that fraction
+      below the day's starting equity (until the next day)
+    - max_pair_exposure: value held in one pair, fraction of equity
+    - max_gross_exposure: value held across all pairs
+    - max_correlated_exposure: value held in pairs whose returns
+      correlate with the pair above correlation_threshold
+
+    Correlations come from update_correlations(), run once per candle
+    off the order path. Exits are never blocked.
+    """
+
+    def __init__(self, pairs, cash, max_daily_loss=0.05, max_pair_exposure=0.2,
+                 max_gross_exposure=0.6, max_correlated_exposure=0.4,
+                 correlation_threshold=0.7, day_offset=7 * 3600, fee=0.0,
+                 journal=None, key='risk', clock=time.time):
+        self.pairs = list(pairs)
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.max_daily_loss = max_daily_loss
+        self.max_pair_exposure = max_pair_exposure
+        self.max_gross_exposure = max_gross_exposure
+        self.max_correlated_exposure = max_correlated_exposure
+        self.correlation_threshold = correlation_threshold
+        self.day_offset = day_offset  # day boundary, 7h = midnight WIB
+        self.fee = fee  # fraction of notional paid on entries
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.positions = {pair: Position() for pair in self.pairs}
+        self.cash = float(cash)
+        self.gross = 0.0
+        self.cost = 0.0
+        # 1.0 where two pairs are counted together; only itself until
+        # correlations are known
+        self.correlated = np.eye(len(self.pairs))
+        self.correlated_cost = np.zeros(len(self.pairs))
+
+        self.day = self._day(clock())
+        self.day_start_equity = self.cash
+        self.realized_today = 0.0
+        self.halted = False
+        self.restored = False
+
+        # Optional StateJournal, the day's baseline survives restarts
+        self.journal = journal
+        self.key = key
+        if journal is not None:
+            self.restore(journal.get(key))
+
+        RISK_EQUITY.set_function(self.equity)
+        RISK_GROSS.set_function(lambda: self.gross)
+        RISK_UNREALIZED.set_function(lambda: self.gross - self.cost)
+        RISK_REALIZED.set_function(lambda: self.realized_today)
+        RISK_DAILY_LOSS.set_function(self.daily_loss)
+        RISK_HALTED.set_function(lambda: float(self.halted))
+
+    @classmethod
+    def from_config(cls, config, cash, **kwargs):
+        return cls(
+            config.pairs,
+            cash,
+            max_daily_loss=config.max_daily_loss,
+            max_pair_exposure=config.max_pair_exposure,
+            max_gross_exposure=config.max_gross_exposure,
+            max_correlated_exposure=config.max_correlated_exposure,
+            correlation_threshold=config.correlation_threshold,
+            fee=config.taker_fee,
+            **kwargs
+        )
+
+    def _day(self, now):
+        return int((now + self.day_offset) // DAY)
+
+    def to_state(self):
+        return {
+            'day': self.day,
+            'day_start_equity': self.day_start_equity,
+            'realized_today': self.realized_today,
+            'halted': self.halted
+        }
+
+    def restore(self, state):
+        """Resume the day's baseline so a restart can't reset the daily loss"""
+        if state and state.get('day') == self.day:
+            self.day_start_equity = state['day_start_equity']
+            self.realized_today = state['realized_today']
+            self.halted = state['halted']
+            self.restored = True
+
+    def start_day(self):
+        """Take the current equity as the day's baseline unless one was restored"""
+        with self.lock:
+            if not self.restored:
+                self.day_start_equity = self.equity()
+                self.save()
+
+    def save(self):
+        if self.journal is not None:
+            self.journal.record(self.key, self.to_state())
+
+    def equity(self):
+        return self.cash + self.gross
+
+    def daily_loss(self):
+        if self.day_start_equity <= 0:
+            return 0.0
+        return (self.day_start_equity - self.equity()) / self.day_start_equity
+
+    def _check_day(self, now):
+        day = self._day(now)
+        if day != self.day:
+            self.day = day
+            self.day_start_equity = self.equity()
+            self.realized_today = 0.0
+            self.halted = False
+            self.save()
+
+    def _check_loss(self):
+        if not self.halted and self.daily_loss() >= self.max_daily_loss:
+            self.halted = True
+            self.save()
+
+    def mark(self, pair, price):
+        """Revalue one pair at the latest price (every tick)"""
+        with self.lock:
+            position = self.positions[pair]
+            if position.amount:
+                self.gross += position.amount * (price - position.price)
+            position.price = price
+            self._check_day(self.clock())
+            self._check_loss()
+
+    def max_buy(self, pair, price):
+        """Largest entry amount all limits allow right now (0 when blocked)"""
+        with self.lock:
+            self._check_day(self.clock())
+            if self.halted:
+                RISK_REJECTED.inc(limit='daily_loss')
+                return 0.0
+            equity = self.equity()
+            i = self.index[pair]
+            position = self.positions[pair]
+            held = position.amount * price
+            room = {
+                'pair': self.max_pair_exposure * equity - held,
+                'gross': self.max_gross_exposure * equity - self.gross,
+                'correlated': self.max_correlated_exposure * equity - self.correlated_cost[i],
+                # The fee is paid on top of the notional
+                'cash': self.cash / (1 + self.fee)
+            }
+        limit = min(room, key=room.get)
+        notional = room[limit]
+        if notional <= 0:
+            RISK_REJECTED.inc(limit=limit)
+            return 0.0
+        return notional / price
+
+    def on_fill(self, pair, side, price, amount, fee=0.0):
+        """Book an executed trade; fee is in IDR"""
+        with self.lock:
+            position = self.positions[pair]
+            value, cost = position.value, position.cost
+            position.price = price
+            if side == 'BUY':
+                position.amount += amount
+                position.cost += price * amount + fee
+                self.cash -= price * amount + fee
+            else:
+                amount = min(amount, position.amount)
+                if position.amount:
+                    released = position.cost * amount / position.amount
+                else:
+                    released = 0.0
+                proceeds = price * amount - fee
+                position.amount -= amount
+                position.cost -= released
+                if position.amount <= 1e-12:
+                    position.amount = 0.0
+                    position.cost = 0.0
+                self.cash += proceeds
+                self.realized_today += proceeds - released
+            # Only this pair changed: O(pairs) for the correlated column
+            self.gross += position.value - value
+            self.cost += position.cost - cost
+            self.correlated_cost += self.correlated[:, self.index[pair]] * (position.cost - cost)
+            self._check_day(self.clock())
+            self._check_loss()
+            self.save()
+
+    def sync(self, cash, holdings=None):
+        """Adopt reconciled exchange balances ({coin: amount} for holdings)"""
+        with self.lock:
+            self.cash = float(cash)
+            for pair, position in self.positions.items():
+                if holdings is None:
+                    break
+                held = float(holdings.get(pair.split('_')[0], 0.0))
+                if held < position.amount:
+                    # Sold or withdrawn outside the bot, cost basis shrinks with it
+                    position.cost = position.cost * held / position.amount
+                    position.amount = held
+            self._resum()
+
+    def restore_position(self, pair, amount, entry_price):
+        """Seed a position resumed from the strategy journal"""
+        with self.lock:
+            position = self.positions[pair]
+            position.amount = float(amount)
+            position.cost = float(amount) * entry_price
+            position.price = entry_price
+            self._resum()
+
+    def _resum(self):
+        """Recompute the totals exactly from the positions, O(pairs^2)"""
+        values = [p.amount * p.price for p in self.positions.values()]
+        costs = np.array([p.cost for p in self.positions.values()])
+        self.gross = math.fsum(values)
+        self.cost = math.fsum(costs)
+        self.correlated_cost = self.correlated @ costs
+
+    def update_correlations(self, closes, min_periods=30):
+        """Recompute which pairs move together from {pair: close array}
+
+        Uses the correlation of log returns over the common tail of the
+        arrays; pairs with too little history only count themselves.
+        """
+        n = min((len(closes.get(pair, ())) for pair in self.pairs), default=0)
+        correlated = np.eye(len(self.pairs))
+        if n > min_periods:
+            prices = np.array([np.asarray(closes[pair][-n:], dtype='float64')
+                               for pair in self.pairs])
+            returns = np.diff(np.log(prices), axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                corr = np.corrcoef(returns)
+            correlated[np.nan_to_num(np.atleast_2d(corr)) >= self.correlation_threshold] = 1.0
+        with self.lock:
+            # Also resets any float drift of the running totals
+            self.correlated = correlated
+            self._resum()
+        return correlated
+
+    def snapshot(self):
+        """Exposure and PnL summary for logging"""
+        with self.lock:
+            return {
+                'equity': self.equity(),
+                'cash': self.cash,
+                'gross_exposure': self.gross,
+                'unrealized_pnl': self.gross - self.cost,
+                'realized_pnl_today': self.realized_today,
+                'daily_loss': self.daily_loss(),
+                'halted': self.halted,
+                'positions': {
+                    pair: {'amount': p.amount, 'value': p.value, 'unrealized': p.unrealized}
+                    for pair, p in self.positions.items() if p.amount
+                }
+            }
@@ -1,13 +1,42 @@
+STATE_FIELDS = ('position', 'entry_price', 'stop_loss', 'take_profit', 'position_size')
+
 class ScalpingStrategy:
-    def __init__(self, config):
+    def __init__(self, config, journal=None, key=None):
         self.config = config
         self.position = None
         self.entry_price = 0
         self.stop_loss = 0
         self.take_profit = 0
+        self.position_size = 0
         
-    def execute_strategy(self, signal, current_price, balance):
-        """Execute scalping strategy"""
+        # Optional StateJournal, position changes are recorded under `key`
+        self.journal = journal
+        self.key = key
+        if journal is not None:
+            self.restore(journal.get(key))
+    
+    def to_state(self):
+        return {field: getattr(self, field) for field in STATE_FIELDS}
+    
+    def restore(self, state):
+        """Resume a journaled position (SL/TP monitoring continues)"""
+        if not state:
+            return
+        for field in STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+    
+    def save(self):
+        """Journal the current position state"""
+        if self.journal is not None:
+            self.journal.record(self.key, self.to_state())
+        
+    def execute_strategy(self, signal, current_price, balance, max_amount=None):
+        """Execute scalping strategy
+        
+        max_amount caps the entry size to what the order book can fill
+        within the configured slippage.
+        """
         action = 'HOLD'
         amount = 0
         
@@ -15,6 +44,10 @@ class ScalpingStrategy:
             # Calculate position size
             position_size = balance * self.config.max_position_size
             amount = position_size / current_price
+            if max_amount is not None:
+                amount = min(amount, max_amount)
+            if amount <= 0:
+                return 'HOLD', 0
             
             # Set stop loss and take profit
             self.stop_loss = current_price * (1 - self.config.stop_loss)
@@ -22,29 +55,44 @@ class ScalpingStrategy:
             
             self.position = 'LONG'
             self.entry_price = current_price
+            self.position_size = amount
             action = 'BUY'
+            self.save()
             
         elif self.position == 'LONG':
-            # Check stop loss
-            if current_price <= self.stop_loss:
-                action = 'SELL'
-                amount = self.position_size
-                self.position = None
-                
-            # Check take profit
-            elif current_price >= self.take_profit:
-                action = 'SELL'
-                amount = self.position_size
-                self.position = None
+            # Check stop loss / take profit
+            action, amount = self.check_exit(current_price)
                 
             # Check if we should cut loss based on signal
-            elif signal == 'SELL':
+            if action == 'HOLD' and signal == 'SELL':
                 action = 'SELL'
                 amount = self.position_size
                 self.position = None
+                self.save()
         
         return action, amount
     
+    def check_exit(self, current_price):
+        """Check stop loss and take profit only, cheap enough to run every tick"""
+        if self.position != 'LONG':
+            return 'HOLD', 0
+        
+        # Check stop loss
+        if current_price <= self.stop_loss:
+            amount = self.position_size
+            self.position = None
+            self.save()
+            return 'SELL', amount
+            
+        # Check take profit
+        if current_price >= self.take_profit:
+            amount = self.position_size
+            self.position = None
+            self.save()
+            return 'SELL', amount
+        
+        return 'HOLD', 0
+    
     def calculate_dynamic_stop_loss(self, atr, current_price):
         """Calculate dynamic stop loss based on ATR"""
         atr_multiplier = 1.5
@@ -1,36 +1,276 @@
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+import time
 from datetime import datetime
+from utils.metrics import REGISTRY
+
+LOG_DROPPED = REGISTRY.counter('log_records_dropped_total', 'Log records dropped on a full queue')
+LOG_SUPPRESSED = REGISTRY.counter(
+    'log_records_suppressed_total', 'Repeated warnings/errors held back by the rate limit'
+)
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+def _fields(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, message and the extra fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+class ConsoleFormatter(logging.Formatter):
+    """The classic text line, with the extra fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _fields(record)
+        fields.pop('event', None)
+        if fields:
+            line += ' | ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+class RotatingLogFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotate when the file exceeds max_bytes or the local day changes"""
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, daily=True):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        self.daily = daily
+        self.day = self._today()
+
+    @staticmethod
+    def _today():
+        return time.strftime('%Y-%m-%d')
+
+    def shouldRollover(self, record):
+        if self.daily and self._today() != self.day:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        self.day = self._today()
+        if self.stream is None and not os.path.exists(self.baseFilename):
+            return
+        super().doRollover()
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message kind for warnings and errors
+
+    Messages are grouped by level and text with digits removed, so an
+    outage failing every pair every second counts as one kind. Each kind
+    may log `burst` records at once and `rate` per second after that;
+    the next record let through carries the number held back.
+    """
+
+    DIGITS = re.compile(r'\d+')
+
+    def __init__(self, rate=0.2, burst=5, level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.level = level
+        self.buckets = {}  # key -> [tokens, last time, suppressed]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+        key = (record.levelno, self.DIGITS.sub('#', str(record.msg))[:120])
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                if len(self.buckets) > 1000:
+                    self.buckets.clear()
+                bucket = self.buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                LOG_SUPPRESSED.inc()
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The writer is in-process: only merge msg and args, formatting
+        # happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_DROPPED.inc()
+
+class LogWriter:
+    """Background thread writing queued records to the handlers
+
+    Wakes every flush_interval and drains the queue in one go instead
+    of waking for every record, so logging costs the trading threads a
+    queue put and no thread switch.
+    """
+
+    def __init__(self, log_queue, handlers, flush_interval=0.5):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.flush_interval = flush_interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.drain()
+        self.drain()
+
+    def drain(self):
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def stop(self, timeout=10):
+        self.stopped.set()
+        self.thread.join(timeout)
 
 class TradingLogger:
-    def __init__(self, log_file='trading_log.log'):
+    """Non-blocking logger for the trading threads
+
+    Calls only build the record and put it on a bounded queue; a
+    background writer formats JSON lines to a size/daily rotated file
+    and text to the console. Repeated warnings/errors are rate limited
+    before they are queued, and records are dropped rather than waiting
+    when the queue is full, so slow storage never stalls the order path.
+    Structured fields (pair, stage, latency_ms, ...) go in as `extra`.
+    """
+
+    def __init__(self, log_file='trading_log.log', max_bytes=10 * 1024 * 1024,
+                 backup_count=5, daily=True, console=True, error_rate=0.2,
+                 error_burst=5, queue_size=10000, flush_interval=0.5):
         self.logger = logging.getLogger('TradingBot')
         self.logger.setLevel(logging.INFO)
-        
-        # File handler
-        fh = logging.FileHandler(log_file)
-        fh.setLevel(logging.INFO)
-        
-        # Console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        
-        # Formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        self.logger.propagate = False
+        for handler in list(self.logger.handlers):
+            # A previous TradingLogger in this process
+            self.logger.removeHandler(handler)
+            handler.close()
+
+        handlers = []
+        if log_file:
+            file_handler = RotatingLogFileHandler(log_file, max_bytes, backup_count, daily)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(ConsoleFormatter())
+            handlers.append(console_handler)
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.queue_handler.addFilter(RateLimitFilter(error_rate, error_burst))
+        self.logger.addHandler(self.queue_handler)
+        self.writer = LogWriter(self.queue, handlers, flush_interval)
+
+    @classmethod
+    def from_config(cls, config, log_file=None):
+        return cls(
+            log_file or config.log_file,
+            max_bytes=config.log_max_bytes,
+            backup_count=config.log_backup_count,
+            daily=config.log_rotate_daily,
+            console=config.log_console,
+            error_rate=config.log_error_rate,
+            error_burst=config.log_error_burst,
+            flush_interval=config.log_flush_interval
         )
-        fh.setFormatter(formatter)
-        ch.setFormatter(formatter)
-        
-        self.logger.addHandler(fh)
-        self.logger.addHandler(ch)
-        
+
     def log_trade(self, action, pair, price, amount):
         message = f"{action} {amount} {pair} at {price}"
-        self.logger.info(message)
-        
-    def log_signal(self, signal, indicators):
-        message = f"Signal: {signal} | RSI: {indicators.get('rsi', 0):.2f} | MACD: {indicators.get('macd', 0):.6f}"
-        self.logger.info(message)
-        
-    def log_error(self, error_message):
-        self.logger.error(error_message)
\ No newline at end of file
+        self.logger.info(message, extra={
+            'event': 'trade', 'pair': pair, 'action': action, 'price': price, 'amount': amount
+        })
+
+    def log_signal(self, signal, indicators, pair=None):
+        rsi = float(indicators.get('rsi', 0))
+        macd = float(indicators.get('macd', 0))
+        message = f"Signal: {signal} | RSI: {rsi:.2f} | MACD: {macd:.6f}"
+        self.logger.info(message, extra={
+            'event': 'signal', 'pair': pair, 'signal': signal, 'rsi': rsi, 'macd': macd
+        })
+
+    def log_trend_filter(self, pair, timeframe, active, candles, needed):
+        """The higher timeframe trend filter turning on (warmed up) or off"""
+        extra = {'event': 'trend_filter', 'pair': pair, 'timeframe': timeframe,
+                 'active': active, 'candles': candles, 'needed': needed}
+        if active:
+            self.logger.info(f"{pair} {timeframe} trend filter active", extra=extra)
+        else:
+            self.logger.warning(
+                f"{pair} {timeframe} trend filter inactive, {candles}/{needed} candles: "
+                "BUY signals are not filtered", extra=extra
+            )
+
+    def log_cycle(self, pair, price, signal, action, balance, latency_ms, **fields):
+        """One status record per pair and cycle"""
+        message = (
+            f"{pair} {price:,.0f} IDR | Signal: {signal} | Action: {action} "
+            f"| Balance: {balance:,.0f} IDR"
+        )
+        self.logger.info(message, extra={
+            'event': 'cycle', 'pair': pair, 'price': price, 'signal': signal,
+            'action': action, 'balance': balance, 'latency_ms': round(latency_ms, 3), **fields
+        })
+
+    def log_error(self, error_message, pair=None, stage=None, **fields):
+        extra = {'event': 'error', **fields}
+        if pair is not None:
+            extra['pair'] = pair
+        if stage is not None:
+            extra['stage'] = stage
+        self.logger.error(error_message, extra=extra)
+
+    def close(self):
+        """Write out queued records and stop the background writer"""
+        if self.writer is not None:
+            self.writer.stop()
+            for handler in self.writer.handlers:
+                handler.close()
+            self.writer = None
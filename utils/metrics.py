@@ -0,0 +1,331 @@
+import bisect
+import collections
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Seconds; covers in-memory stages (~10us) up to slow API calls
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ''
+    parts = []
+    for name, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help=''):
+        self.name = name
+        self.help = help
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        with self.lock:
+            items = list(self.values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}" for key, v in items]
+
+class Counter(_Metric):
+    """Monotonic count, e.g. errors or retries"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(_label_key(labels), 0)
+
+class Gauge(_Metric):
+    """Current value; set directly or read from a callback at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, help=''):
+        super().__init__(name, help)
+        self.functions = {}
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[_label_key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn, **labels):
+        """Evaluate fn() on every scrape, for queue depths and the like"""
+        with self.lock:
+            self.functions[_label_key(labels)] = fn
+
+    def value(self, **labels):
+        key = _label_key(labels)
+        fn = self.functions.get(key)
+        return fn() if fn is not None else self.values.get(key, 0)
+
+    def _samples(self):
+        lines = super()._samples()
+        with self.lock:
+            functions = list(self.functions.items())
+        for key, fn in functions:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram per label set"""
+    kind = 'histogram'
+
+    def __init__(self, name, help='', buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # [per-bucket counts (+Inf last), sum, count, max]
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+            if value > state[3]:
+                state[3] = value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum', 'max'} for one label set"""
+        with self.lock:
+            state = self.values.get(_label_key(labels))
+            if state is None:
+                return {'count': 0, 'sum': 0.0, 'max': 0.0}
+            return {'count': state[2], 'sum': state[1], 'max': state[3]}
+
+    def _samples(self):
+        with self.lock:
+            items = [(key, list(s[0]), s[1], s[2]) for key, s in self.values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                labels = _format_labels(key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics, rendered in the Prometheus text exposition format
+
+    counter()/gauge()/histogram() return the existing metric when the name
+    is already registered, so modules can declare what they instrument at
+    import time and share one registry.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = collections.OrderedDict()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name, help=''):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=''):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help='', buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry used by the bot's instrumentation
+REGISTRY = MetricsRegistry()
+
+class SamplingProfiler:
+    """Low-overhead stack sampler that can be switched on at runtime
+
+    A background thread snapshots every thread's stack each `interval`
+    seconds and counts identical stacks, which are returned in collapsed
+    ("frame;frame;frame count") format for flame graph tools.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.lock = threading.Lock()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started = None
+        self.thread = None
+        self.running = False
+
+    def start(self, interval=None):
+        if interval is not None:
+            self.interval = interval
+        with self.lock:
+            if self.running:
+                return False
+            self.stacks.clear()
+            self.samples = 0
+            self.started = time.time()
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while self.running:
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(ident, str(ident)))
+                with self.lock:
+                    self.stacks[';'.join(reversed(stack))] += 1
+            with self.lock:
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        with self.lock:
+            items = self.stacks.most_common()
+        return '\n'.join(f"{stack} {count}" for stack, count in items) + '\n'
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+    profiler = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/metrics':
+            self._reply(200, self.registry.render(), 'text/plain; version=0.0.4')
+        elif url.path == '/profile/start':
+            interval = float(query['interval'][0]) if 'interval' in query else None
+            started = self.profiler.start(interval)
+            self._reply(200, 'started\n' if started else 'already running\n')
+        elif url.path == '/profile/stop':
+            self.profiler.stop()
+            self._reply(200, f"stopped after {self.profiler.samples} samples\n")
+        elif url.path == '/profile':
+            self._reply(200, self.profiler.collapsed())
+        else:
+            self._reply(404, 'not found\n')
+
+    def _reply(self, status, body, content_type='text/plain'):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsServer:
+    """Local HTTP endpoint for metrics and the sampling profiler
+
+    GET /metrics               Prometheus text format
+    GET /profile/start         start sampling (?interval=seconds)
+    GET /profile/stop          stop sampling
+    GET /profile               collapsed stacks collected so far
+    """
+
+    def __init__(self, host='127.0.0.1', port=9108, registry=REGISTRY, profiler=None):
+        self.registry = registry
+        self.profiler = profiler or SamplingProfiler()
+        handler = type('MetricsHandler', (_Handler,), {
+            'registry': registry,
+            'profiler': self.profiler
+        })
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name='metrics', daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.profiler.stop()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,147 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import REGISTRY
+
+JOB_LATENESS = REGISTRY.histogram(
+    'scheduler_lateness_seconds', 'Delay between a job\'s scheduled and actual start'
+)
+JOB_SECONDS = REGISTRY.histogram('scheduler_job_seconds', 'Job run time')
+JOB_SKIPPED = REGISTRY.counter(
+    'scheduler_skipped_total', 'Runs skipped or coalesced because the previous run overran'
+)
+JOB_ERRORS = REGISTRY.counter('scheduler_job_errors_total', 'Job runs that raised')
+
+SKIP = 'skip'
+COALESCE = 'coalesce'
+
+class Job:
+    def __init__(self, name, interval, fn, offset=0.0, policy=SKIP):
+        if policy not in (SKIP, COALESCE):
+            raise ValueError(f"Unknown overrun policy: {policy}")
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.offset = offset
+        self.policy = policy
+        self.running = False
+        self.pending = None  # scheduled time of a coalesced run
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self.last_lateness = 0.0
+
+    def next_after(self, now):
+        """Next slot on the fixed grid offset + k * interval after `now`
+
+        Slots are computed from the wall clock, never from the previous
+        run, so slow runs and timer jitter do not accumulate as drift.
+        """
+        k = (now - self.offset) // self.interval + 1
+        return self.offset + k * self.interval
+
+class Scheduler:
+    """Run jobs on fixed, wall-clock aligned grids
+
+    A job with interval 300 and offset 2 fires at hh:00:02, hh:05:02, ...
+    i.e. 2 seconds after every 5-minute candle closes. Jobs run on a small
+    thread pool so a slow job never delays the others. When a run is
+    still going at its next slot, policy 'skip' drops that slot and
+    'coalesce' runs once as soon as the previous run finishes; missed
+    slots are never queued up. Lateness and run time are recorded per job.
+    """
+
+    def __init__(self, max_workers=4, logger=None, clock=time.time):
+        self.clock = clock
+        self.logger = logger
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='job'
+        )
+        self.jobs = {}
+        self.queue = []
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def every(self, name, interval, fn, offset=0.0, policy=SKIP):
+        """Add a job running fn() every `interval` seconds at `offset`"""
+        job = Job(name, interval, fn, offset, policy)
+        with self.lock:
+            self.jobs[name] = job
+            self._push(job.next_after(self.clock()), job)
+        self.wakeup.set()
+        return job
+
+    def _push(self, at, job):
+        heapq.heappush(self.queue, (at, next(self.sequence), job))
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self, wait=True):
+        self.running = False
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.executor.shutdown(wait=wait)
+
+    def _run(self):
+        while self.running:
+            with self.lock:
+                now = self.clock()
+                due = []
+                while self.queue and self.queue[0][0] <= now:
+                    at, _, job = heapq.heappop(self.queue)
+                    due.append((at, job))
+                    self._push(job.next_after(now), job)
+                timeout = self.queue[0][0] - now if self.queue else 1.0
+            for at, job in due:
+                self._fire(job, at)
+            self.wakeup.wait(max(0.0, min(timeout, 1.0)))
+            self.wakeup.clear()
+
+    def _fire(self, job, scheduled):
+        with self.lock:
+            if job.running:
+                job.skipped += 1
+                JOB_SKIPPED.inc(job=job.name)
+                if job.policy == COALESCE and job.pending is None:
+                    job.pending = scheduled
+                return
+            job.running = True
+        self.executor.submit(self._execute, job, scheduled)
+
+    def _execute(self, job, scheduled):
+        while True:
+            start = self.clock()
+            job.last_lateness = start - scheduled
+            JOB_LATENESS.observe(max(0.0, job.last_lateness), job=job.name)
+            began = time.perf_counter()
+            try:
+                job.fn()
+            except Exception as e:
+                job.errors += 1
+                JOB_ERRORS.inc(job=job.name)
+                if self.logger is not None:
+                    self.logger.log_error(f"Job {job.name} failed: {e}", stage=job.name)
+            job.last_duration = time.perf_counter() - began
+            JOB_SECONDS.observe(job.last_duration, job=job.name)
+            job.runs += 1
+
+            with self.lock:
+                if job.pending is None or not self.running:
+                    job.running = False
+                    job.pending = None
+                    return
+                # One catch-up run for the slots the overrun covered
+                scheduled = job.pending
+                job.pending = None